@@ -0,0 +1,57 @@
+"""
+Chat Event Stream
+Server-sent events for /chat/stream, kept apart from the RAG imports so the
+event sequence can be exercised against any ProviderManager:
+  sources -> token* -> done     (or sources -> token* -> error)
+The upstream provider stream is closed as soon as the consumer stops reading
+(client disconnect), not when the generator is garbage-collected.
+"""
+
+import json
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from app.ai.providers import ProviderManager, provider_manager
+
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def replay_events(cached: Dict[str, Any]) -> AsyncIterator[str]:
+    """A semantic-cache hit, sent in the same shape as a live answer."""
+    yield sse("sources", cached["sources"])
+    yield sse("token", {"text": cached["response"]})
+    yield sse("done", {"response": cached["response"], "cached": True})
+
+
+async def chat_events(
+    messages: List[Dict[str, str]],
+    sources: List[str],
+    on_complete: Optional[Callable[[str], Awaitable[None]]] = None,
+    mock_text: Optional[str] = None,
+    manager: ProviderManager = provider_manager
+) -> AsyncIterator[str]:
+    """
+    Streams the answer to `messages` as SSE. Without a configured provider
+    `mock_text` is sent as one chunk. on_complete gets the full text of a
+    successful, non-empty answer (e.g. to cache it) before `done` is sent.
+    """
+    yield sse("sources", sources)
+    if not manager.configured():
+        yield sse("token", {"text": mock_text or ""})
+        yield sse("done", {"response": mock_text or ""})
+        return
+    parts = []
+    try:
+        async with aclosing(manager.stream(messages)) as tokens:
+            async for text in tokens:
+                parts.append(text)
+                yield sse("token", {"text": text})
+    except Exception as e:
+        print(f"❌ Chat stream failed: {e}")
+        yield sse("error", {"detail": f"AI Error: {str(e)}", "response": "".join(parts)})
+        return
+    response_text = "".join(parts)
+    if response_text and on_complete is not None:
+        await on_complete(response_text)
+    yield sse("done", {"response": response_text})
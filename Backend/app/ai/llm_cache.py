@@ -0,0 +1,258 @@
+"""
+LLM Response Cache
+Exact cache: completions keyed by SHA-256 of the canonical JSON of provider,
+model, messages and sampling parameters. Re-opening an audit or repeating a
+prompt is served from SQLite instead of a paid call. Entries expire by TTL and,
+past the size limit, least-recently-used first (same policy as ResultCache).
+
+Semantic cache (chat only): questions are stored with their normalized
+embedding per scope (audit ID + regulation corpus size). A new question within
+CHAT_CACHE_MAX_DISTANCE (cosine distance) of a cached one gets its answer.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "auditx_llm_cache.db")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CHAT_CACHE_TTL = int(os.getenv("CHAT_CACHE_TTL", str(7 * 24 * 3600)))
+CHAT_CACHE_MAX_DISTANCE = float(os.getenv("CHAT_CACHE_MAX_DISTANCE", "0.08"))
+CHAT_CACHE_MAX_PER_SCOPE = int(os.getenv("CHAT_CACHE_MAX_PER_SCOPE", "500"))
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    return sqlite3.connect(path, timeout=30)
+
+
+class LLMCache:
+    """SQLite-backed LRU/TTL cache of LLM completions."""
+
+    def __init__(self, path: str = LLM_CACHE_DB, ttl: int = LLM_CACHE_TTL, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        conn = _connect(self.path)
+        c = conn.cursor()
+        c.execute("PRAGMA journal_mode=WAL")
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                response TEXT,
+                size_bytes INTEGER,
+                created_at REAL,
+                last_access REAL
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access)')
+        c.execute('CREATE TABLE IF NOT EXISTS llm_cache_stats (name TEXT PRIMARY KEY, value INTEGER)')
+        c.execute("INSERT OR IGNORE INTO llm_cache_stats (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(provider: str, model: str, messages: List[Dict[str, str]], **params) -> str:
+        """Canonical hash: key order and whitespace in the JSON encoding do not matter."""
+        canonical = json.dumps(
+            {"provider": provider, "model": model, "messages": messages, "params": params},
+            sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _count(self, c: sqlite3.Cursor, name: str, amount: int = 1):
+        c.execute('UPDATE llm_cache_stats SET value = value + ? WHERE name = ?', (amount, name))
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = _connect(self.path)
+            c = conn.cursor()
+            c.execute('SELECT response, created_at FROM llm_cache WHERE cache_key = ?', (key,))
+            row = c.fetchone()
+            if row and now - row[1] > self.ttl:
+                c.execute('DELETE FROM llm_cache WHERE cache_key = ?', (key,))
+                self._count(c, "evictions")
+                row = None
+            if row:
+                c.execute('UPDATE llm_cache SET last_access = ? WHERE cache_key = ?', (now, key))
+                self._count(c, "hits")
+            else:
+                self._count(c, "misses")
+            conn.commit()
+            conn.close()
+        return row[0] if row else None
+
+    def get_any(self, keys: List[str]) -> Optional[str]:
+        """First cached response among `keys` (in order); one hit or miss."""
+        now = time.time()
+        with self._lock:
+            conn = _connect(self.path)
+            c = conn.cursor()
+            c.execute(
+                f'SELECT cache_key, response FROM llm_cache WHERE cache_key IN ({", ".join("?" * len(keys))}) AND created_at >= ?',
+                (*keys, now - self.ttl)
+            )
+            found = dict(c.fetchall())
+            key = next((k for k in keys if k in found), None)
+            if key:
+                c.execute('UPDATE llm_cache SET last_access = ? WHERE cache_key = ?', (now, key))
+            self._count(c, "hits" if key else "misses")
+            conn.commit()
+            conn.close()
+        return found[key] if key else None
+
+    def put(self, key: str, response: str, provider: str = None, model: str = None):
+        size = len(response.encode())
+        now = time.time()
+        if not response or size > self.max_bytes:
+            return
+        with self._lock:
+            conn = _connect(self.path)
+            c = conn.cursor()
+            c.execute('''
+                INSERT OR REPLACE INTO llm_cache (cache_key, provider, model, response, size_bytes, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (key, provider, model, response, size, now, now))
+            self._evict(c, now)
+            conn.commit()
+            conn.close()
+
+    def _evict(self, c: sqlite3.Cursor, now: float):
+        """Drops expired entries, then least-recently-used ones until under the size limit."""
+        c.execute('DELETE FROM llm_cache WHERE created_at < ?', (now - self.ttl,))
+        evicted = c.rowcount
+        c.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM llm_cache')
+        excess = c.fetchone()[0] - self.max_bytes
+        if excess > 0:
+            c.execute('SELECT cache_key, size_bytes FROM llm_cache ORDER BY last_access ASC')
+            victims = []
+            for cache_key, size in c.fetchall():
+                if excess <= 0:
+                    break
+                victims.append((cache_key,))
+                excess -= size
+            c.executemany('DELETE FROM llm_cache WHERE cache_key = ?', victims)
+            evicted += len(victims)
+        if evicted:
+            self._count(c, "evictions", evicted)
+
+    def stats(self) -> Dict[str, int]:
+        conn = _connect(self.path)
+        c = conn.cursor()
+        c.execute('SELECT name, value FROM llm_cache_stats')
+        stats = dict(c.fetchall())
+        c.execute('SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_cache')
+        stats["entries"], stats["size_bytes"] = c.fetchone()
+        conn.close()
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+class SemanticChatCache:
+    """Chat answers looked up by question-embedding distance within one scope."""
+
+    def __init__(self, path: str = LLM_CACHE_DB, ttl: int = CHAT_CACHE_TTL,
+                 max_distance: float = CHAT_CACHE_MAX_DISTANCE, max_per_scope: int = CHAT_CACHE_MAX_PER_SCOPE):
+        self.path = path
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.max_per_scope = max_per_scope
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self):
+        conn = _connect(self.path)
+        c = conn.cursor()
+        c.execute("PRAGMA journal_mode=WAL")
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS chat_cache (
+                entry_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scope TEXT,
+                question TEXT,
+                embedding BLOB,
+                response TEXT,
+                sources TEXT,
+                created_at REAL,
+                last_access REAL
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_chat_cache_scope ON chat_cache (scope, last_access)')
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_scope(audit_id: Optional[str], corpus_size: int) -> str:
+        """Answers depend on the audit and on the regulations indexed at the time."""
+        return f"{audit_id or ''}:{corpus_size}"
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, scope: str, vector) -> Optional[Dict[str, Any]]:
+        """Closest cached answer in the scope, if within max_distance."""
+        query = self._normalize(vector)
+        now = time.time()
+        conn = _connect(self.path)
+        rows = conn.execute(
+            'SELECT entry_id, question, embedding, response, sources FROM chat_cache WHERE scope = ? AND created_at >= ?',
+            (scope, now - self.ttl)
+        ).fetchall()
+        if not rows:
+            conn.close()
+            return None
+        embeddings = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+        distances = 1.0 - embeddings @ query
+        best = int(np.argmin(distances))
+        if distances[best] > self.max_distance:
+            conn.close()
+            return None
+        entry_id, question, _, response, sources = rows[best]
+        conn.execute('UPDATE chat_cache SET last_access = ? WHERE entry_id = ?', (now, entry_id))
+        conn.commit()
+        conn.close()
+        return {
+            "question": question,
+            "response": response,
+            "sources": json.loads(sources),
+            "distance": round(float(distances[best]), 4),
+        }
+
+    def put(self, scope: str, question: str, vector, response: str, sources: List[str]):
+        now = time.time()
+        embedding = self._normalize(vector).tobytes()
+        with self._lock:
+            conn = _connect(self.path)
+            c = conn.cursor()
+            c.execute('''
+                INSERT INTO chat_cache (scope, question, embedding, response, sources, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (scope, question, embedding, response, json.dumps(sources), now, now))
+            c.execute('DELETE FROM chat_cache WHERE created_at < ?', (now - self.ttl,))
+            # Keep the most recently used max_per_scope entries of this scope
+            c.execute('''
+                DELETE FROM chat_cache WHERE scope = ? AND entry_id NOT IN (
+                    SELECT entry_id FROM chat_cache WHERE scope = ? ORDER BY last_access DESC LIMIT ?
+                )
+            ''', (scope, scope, self.max_per_scope))
+            conn.commit()
+            conn.close()
+
+
+# Global Instances
+llm_cache = LLMCache()
+chat_cache = SemanticChatCache()
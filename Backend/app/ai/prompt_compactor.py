@@ -0,0 +1,208 @@
+"""
+Prompt Compactor
+Fits the audit summary sent to the LLM into PROMPT_TOKEN_BUDGET tokens, so the
+prompt stays roughly the same size whether the file has 5 columns or 500.
+Columns are ranked by anomaly relevance (failed rules naming them, Benford
+non-conformity, null rate, PII, posting anomalies) and added most relevant
+first, each as a rounded one-line summary, until the budget is spent. Dropped
+columns are listed by name (up to OMITTED_NAMES_MAX) and reported.
+Tokens are counted with tiktoken when installed, else estimated from length.
+"""
+
+import json
+import math
+import os
+from typing import Any, Dict, List, NamedTuple, Optional
+from app.models.schemas import MetadataSummary, RuleResult
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "4000"))
+PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", "cl100k_base")
+CHARS_PER_TOKEN = 3.5  # heuristic for JSON-heavy text without tiktoken
+OMITTED_NAMES_MAX = 40
+RULE_DETAIL_MAX_ITEMS = 10
+
+SEVERITY_WEIGHT = {"HIGH": 3, "MEDIUM": 2, "LOW": 1}
+BENFORD_LABEL_WEIGHT = {"Non-conforming": 30, "Marginal": 15, "Acceptable": 3}
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    global _encoding
+    if tiktoken is not None and _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding(PROMPT_TOKENIZER)
+        except Exception as e:  # encoding files unavailable offline
+            print(f"⚠️  tiktoken unavailable ({e}); estimating token counts")
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def tokenizer_name() -> str:
+    return PROMPT_TOKENIZER if _encoding else "heuristic"
+
+
+class CompactPrompt(NamedTuple):
+    summary: str
+    failed_rules: str
+    report: Dict[str, Any]
+
+
+def _round(value: Any) -> Any:
+    if isinstance(value, float):
+        return float(f"{value:.4g}") if math.isfinite(value) else None
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _rule_columns(rule: RuleResult, columns: set) -> List[str]:
+    details = rule.details or {}
+    named = [key for key in details if key in columns]
+    named += [c for c in details.get("columns", []) or [] if c in columns]
+    return named
+
+
+def rank_columns(metadata: MetadataSummary, rule_results: List[RuleResult]) -> Dict[str, float]:
+    """Relevance per column; higher means more worth the LLM's attention."""
+    columns = set(metadata.columns)
+    score = {col: 0.0 for col in metadata.columns}
+
+    for rule in rule_results:
+        if not rule.passed:
+            for col in _rule_columns(rule, columns):
+                score[col] += 100 * SEVERITY_WEIGHT.get(rule.severity, 1)
+
+    benford = metadata.benford_analysis
+    if benford:
+        for col, label in benford.risk_labels.items():
+            if col in score:
+                score[col] += BENFORD_LABEL_WEIGHT.get(label, 0)
+        for col, tests in benford.first_digit_tests.items():
+            if col in score:
+                score[col] += 2 * len(tests.get("significant_digits", []))
+
+    for col, stats in metadata.column_stats.items():
+        if col in score:
+            score[col] += (stats.get("null_percentage") or 0) / 2
+
+    for col in metadata.suspicious_entities.get("pii_columns", []) or []:
+        if col in score:
+            score[col] += 20
+
+    for col, findings in metadata.posting_anomalies.items():
+        if col in score:
+            score[col] += min(5 * findings.get("anomaly_count", 0), 50)
+    return score
+
+
+def _column_entry(col: str, metadata: MetadataSummary) -> Dict[str, Any]:
+    """Rounded per-column summary: stats, Benford verdict, date range, posting findings."""
+    entry = {k: _round(v) for k, v in metadata.column_stats.get(col, {}).items() if v is not None}
+    benford = metadata.benford_analysis
+    if benford and col in benford.mad_scores:
+        entry["benford"] = {"mad": _round(benford.mad_scores[col]), "label": benford.risk_labels.get(col)}
+        tests = benford.first_digit_tests.get(col)
+        if tests:
+            entry["benford"]["chi_square_fail"] = tests.get("chi_square", 0) > tests.get("chi_square_critical", math.inf)
+            if tests.get("significant_digits"):
+                entry["benford"]["significant_digits"] = tests["significant_digits"]
+        extended = benford.extended_mad_scores.get(col)
+        if extended:
+            entry["benford"]["extended_mad"] = {k: _round(v) for k, v in extended.items()}
+    if col in metadata.date_ranges:
+        entry["date_range"] = metadata.date_ranges[col]
+    findings = metadata.posting_anomalies.get(col)
+    if findings:
+        entry["posting"] = {
+            k: _round(findings[k]) for k in
+            ("findings", "spike_count", "off_day_cluster_count", "period_end_count", "weekend_share", "after_hours_share")
+            if k in findings
+        }
+    return entry
+
+
+def _compact_details(details: Optional[Dict[str, Any]], ranking: Dict[str, float]) -> Any:
+    """Keeps the RULE_DETAIL_MAX_ITEMS most relevant entries of a per-column details dict."""
+    if not details or len(details) <= RULE_DETAIL_MAX_ITEMS:
+        return details
+    keys = sorted(details, key=lambda k: -ranking.get(k, 0))
+    kept = {k: details[k] for k in keys[:RULE_DETAIL_MAX_ITEMS]}
+    kept["..."] = f"{len(details) - RULE_DETAIL_MAX_ITEMS} more"
+    return kept
+
+
+def compact_failed_rules(rule_results: List[RuleResult], ranking: Dict[str, float]) -> str:
+    text = ""
+    for rule in rule_results:
+        if not rule.passed:
+            text += f"- {rule.rule_id} ({rule.severity}): {rule.description}. Details: {_compact_details(rule.details, ranking)}\n"
+    return text
+
+
+def compact_metadata(
+    metadata: MetadataSummary,
+    rule_results: List[RuleResult],
+    budget: int = PROMPT_TOKEN_BUDGET
+) -> CompactPrompt:
+    """Budgeted JSON summary of the audit plus the failed-rules text and a compaction report."""
+    ranking = rank_columns(metadata, rule_results)
+    position = {col: i for i, col in enumerate(metadata.columns)}
+    order = sorted(metadata.columns, key=lambda c: (-ranking[c], position[c]))
+
+    header = {
+        "row_count": metadata.row_count,
+        "column_count": len(metadata.columns),
+        "duplicate_analysis": metadata.duplicate_analysis,
+        "row_checks": metadata.row_checks,
+        "suspicious_entities": metadata.suspicious_entities,
+    }
+    if metadata.benford_analysis:
+        header["benford_passed"] = metadata.benford_analysis.passed
+
+    # Room for the omitted-columns note, sized for the worst case
+    names_reserve = count_tokens(_dumps(metadata.columns[:OMITTED_NAMES_MAX])) + 20
+    remaining = budget - count_tokens(_dumps(header)) - names_reserve
+
+    included: Dict[str, Any] = {}
+    for col in order:
+        entry = _column_entry(col, metadata)
+        cost = count_tokens(_dumps({col: entry})) + 1
+        if cost > remaining:
+            continue  # a smaller, less relevant column may still fit
+        included[col] = entry
+        remaining -= cost
+
+    while True:
+        dropped = [c for c in order if c not in included]
+        summary = {**header, "columns": included}
+        if dropped:
+            summary["omitted_columns"] = {
+                "count": len(dropped),
+                "reason": f"lowest anomaly relevance; prompt limited to {budget} tokens",
+                "names": dropped[:OMITTED_NAMES_MAX],
+            }
+        text = _dumps(summary)
+        # Per-entry counts are estimates of the joined text; trim if they undershot
+        if not included or count_tokens(text) <= budget:
+            break
+        included.pop(next(reversed(included)))
+
+    report = {
+        "tokenizer": tokenizer_name(),
+        "budget": budget,
+        "summary_tokens": count_tokens(text),
+        "columns_total": len(metadata.columns),
+        "columns_included": len(included),
+        "columns_dropped": dropped,
+    }
+    return CompactPrompt(text, compact_failed_rules(rule_results, ranking), report)
@@ -0,0 +1,417 @@
+"""
+LLM Provider Manager
+Every provider (OpenAI, Groq, Gemini) is called through its OpenAI-compatible
+/chat/completions endpoint over persistent pooled httpx clients (one sync, one
+async per provider), created once. Per provider it keeps:
+  - rolling stats of the last PROVIDER_WINDOW calls (latency, errors), for
+    full completions and for time-to-first-token of streams
+  - a circuit breaker: opens when failed or slow calls reach
+    BREAKER_FAILURE_RATE, probes again after BREAKER_COOLDOWN_SECONDS
+Requests are hedged: if the preferred provider has not answered (or sent its
+first token) by its p95 latency, the same request goes to the next provider and
+whichever answers first wins. Completions are cached in llm_cache.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, AsyncIterator, Dict, List, Optional
+import httpx
+import numpy as np
+from app.ai.llm_cache import llm_cache
+
+# AI Provider Configuration
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "grok").lower()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+GROK_API_KEY = os.getenv("GROK_API_KEY")
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+# name -> (default base URL, API key, model); <NAME>_BASE_URL overrides the URL
+PROVIDER_SPECS = {
+    "openai": ("https://api.openai.com/v1", OPENAI_API_KEY, "gpt-4o"),
+    "grok": ("https://api.groq.com/openai/v1", GROK_API_KEY, "llama-3.3-70b-versatile"),
+    "gemini": ("https://generativelanguage.googleapis.com/v1beta/openai", GEMINI_API_KEY, "gemini-2.0-flash"),
+}
+# Failover order after the configured LLM_PROVIDER
+FALLBACK_ORDER = ["gemini", "grok", "openai"]
+
+DEFAULT_TEMPERATURE = 0.3
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+
+PROVIDER_WINDOW = int(os.getenv("PROVIDER_WINDOW", "50"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+# Trips at once on this many bad calls in a row, whatever the window holds
+BREAKER_CONSECUTIVE_FAILURES = int(os.getenv("BREAKER_CONSECUTIVE_FAILURES", "5"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "30"))
+# A call slower than this counts against the breaker even if it succeeded
+SLOW_SECONDS = {
+    "completion": float(os.getenv("PROVIDER_SLOW_SECONDS", "60")),
+    "first_token": float(os.getenv("PROVIDER_SLOW_FIRST_TOKEN_SECONDS", "15")),
+}
+
+LLM_HEDGE = os.getenv("LLM_HEDGE", "true").lower() == "true"
+HEDGE_MIN_SAMPLES = 10
+HEDGE_MIN_SECONDS = float(os.getenv("HEDGE_MIN_SECONDS", "0.5"))
+# Hedge deadline until a provider has HEDGE_MIN_SAMPLES successful calls
+HEDGE_DEFAULT_SECONDS = {"completion": 30.0, "first_token": 8.0}
+
+
+class NoProviderAvailable(RuntimeError):
+    pass
+
+
+class RollingStats:
+    """Latency and outcome of the last `window` calls."""
+
+    def __init__(self, window: int = PROVIDER_WINDOW):
+        self.calls: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self.calls.append((latency, ok))
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            latencies = [latency for latency, ok in self.calls if ok]
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return float(np.percentile(latencies, 95))
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = list(self.calls)
+        p95 = self.p95()
+        return {
+            "calls": len(calls),
+            "error_rate": round(sum(not ok for _, ok in calls) / len(calls), 3) if calls else 0.0,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+        }
+
+
+class CircuitBreaker:
+    """
+    closed -> open when bad calls (failed or slow) reach the failure rate or
+    come BREAKER_CONSECUTIVE_FAILURES in a row -> half-open probe after cooldown.
+    """
+
+    def __init__(self, name: str, window: int = PROVIDER_WINDOW):
+        self.name = name
+        self.outcomes: deque = deque(maxlen=window)
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probing = False
+        self.consecutive = 0
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            return not self.probing and time.monotonic() - self.opened_at >= BREAKER_COOLDOWN_SECONDS
+
+    def on_launch(self):
+        with self._lock:
+            if self.state != "closed":
+                self.state = "half_open"
+                self.probing = True
+
+    def release(self):
+        """A probe was abandoned (lost a hedge) before it finished."""
+        with self._lock:
+            self.probing = False
+
+    def record(self, good: bool):
+        with self._lock:
+            if self.state != "closed":
+                self.probing = False
+                if good:
+                    self.state = "closed"
+                    self.outcomes.clear()
+                    print(f"✅ {self.name} circuit closed")
+                else:
+                    self.state, self.opened_at = "open", time.monotonic()
+                return
+            self.outcomes.append(good)
+            self.consecutive = 0 if good else self.consecutive + 1
+            bad = self.outcomes.count(False)
+            rate_tripped = len(self.outcomes) >= BREAKER_MIN_CALLS and bad / len(self.outcomes) >= BREAKER_FAILURE_RATE
+            if rate_tripped or self.consecutive >= BREAKER_CONSECUTIVE_FAILURES:
+                self.state, self.opened_at = "open", time.monotonic()
+                self.consecutive = 0
+                print(f"⚡ {self.name} circuit opened after {bad}/{len(self.outcomes)} bad calls")
+
+
+class Provider:
+    """One OpenAI-compatible endpoint with its pooled clients, stats and breaker."""
+
+    def __init__(self, name: str, base_url: str, api_key: str, model: str):
+        self.name = name
+        self.url = f"{base_url.rstrip('/')}/chat/completions"
+        self.model = model
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.stats = {"completion": RollingStats(), "first_token": RollingStats()}
+        self.breaker = CircuitBreaker(name)
+        self.hedged = 0
+        self.hedge_wins = 0
+        timeout = httpx.Timeout(10.0, read=LLM_TIMEOUT_SECONDS)
+        limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+        self.client = httpx.Client(timeout=timeout, limits=limits)
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._timeout, self._limits = timeout, limits
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(timeout=self._timeout, limits=self._limits)
+        return self._async_client
+
+    def record(self, kind: str, latency: float, ok: bool):
+        self.stats[kind].record(latency, ok)
+        self.breaker.record(ok and latency <= SLOW_SECONDS[kind])
+
+    def hedge_deadline(self, kind: str) -> float:
+        """Seconds to wait before hedging: this provider's p95 latency."""
+        p95 = self.stats[kind].p95()
+        if p95 is None:
+            return HEDGE_DEFAULT_SECONDS[kind]
+        return max(HEDGE_MIN_SECONDS, p95)
+
+    def payload(self, messages: List[Dict[str, str]], temperature: float, stream: bool = False) -> Dict[str, Any]:
+        payload = {"model": self.model, "messages": messages, "temperature": temperature}
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float) -> str:
+        start = time.monotonic()
+        try:
+            response = self.client.post(self.url, json=self.payload(messages, temperature), headers=self.headers)
+            response.raise_for_status()
+            text = response.json()["choices"][0]["message"]["content"]
+        except Exception:
+            self.record("completion", time.monotonic() - start, False)
+            raise
+        self.record("completion", time.monotonic() - start, True)
+        return text
+
+    async def stream(self, messages: List[Dict[str, str]], temperature: float) -> AsyncIterator[str]:
+        """Yields content deltas from the provider's SSE stream."""
+        async with self.async_client.stream(
+            "POST", self.url,
+            json=self.payload(messages, temperature, stream=True),
+            headers={**self.headers, "Accept": "text/event-stream"},
+        ) as response:
+            if response.status_code != 200:
+                body = (await response.aread()).decode(errors="replace")
+                raise RuntimeError(f"{self.name} returned {response.status_code}: {body[:200]}")
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    return
+                chunk = json.loads(data)
+                if chunk.get("error"):
+                    raise RuntimeError(f"{self.name} stream error: {chunk['error']}")
+                for choice in chunk.get("choices", []):
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        yield text
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "circuit": self.breaker.state,
+            "completion": self.stats["completion"].summary(),
+            "first_token": self.stats["first_token"].summary(),
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+class ProviderManager:
+    """Preference-ordered providers with circuit breaking, hedging and caching."""
+
+    def __init__(self, primary: str = LLM_PROVIDER):
+        self.providers: List[Provider] = []
+        for name in [primary] + [n for n in FALLBACK_ORDER if n != primary]:
+            if name not in PROVIDER_SPECS:
+                continue
+            base_url, api_key, model = PROVIDER_SPECS[name]
+            if api_key:
+                base_url = os.getenv(f"{name.upper()}_BASE_URL", base_url)
+                self.providers.append(Provider(name, base_url, api_key, model))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Threads for blocking completions, started on first use rather than at
+        import. Hedged losers keep running to completion here, so their
+        latency is still recorded.
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=2 * LLM_MAX_CONNECTIONS, thread_name_prefix="llm")
+        return self._executor
+
+    def configured(self) -> bool:
+        return bool(self.providers)
+
+    def candidates(self) -> List[Provider]:
+        candidates = [p for p in self.providers if p.breaker.available()]
+        if not candidates:
+            raise NoProviderAvailable("No LLM provider available (all circuits open)" if self.providers else "No LLM provider configured")
+        return candidates
+
+    @staticmethod
+    def cache_key(provider: Provider, messages: List[Dict[str, str]], temperature: float) -> str:
+        return llm_cache.make_key(provider.name, provider.model, messages, temperature=temperature)
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float = DEFAULT_TEMPERATURE) -> str:
+        """Blocking completion (for worker threads), hedged across providers."""
+        candidates = self.candidates()
+        cached = llm_cache.get_any([self.cache_key(p, messages, temperature) for p in candidates])
+        if cached:
+            return cached
+
+        pending, errors = {}, []
+
+        def launch() -> Provider:
+            provider = candidates.pop(0)
+            provider.breaker.on_launch()
+            pending[self.executor.submit(provider.complete, messages, temperature)] = provider
+            return provider
+
+        latest, hedge = launch(), None
+        while pending:
+            can_hedge = LLM_HEDGE and candidates and len(pending) < 2
+            done, _ = wait(pending, timeout=latest.hedge_deadline("completion") if can_hedge else None, return_when=FIRST_COMPLETED)
+            if not done:
+                latest = hedge = launch()
+                hedge.hedged += 1
+                print(f"🔀 Hedging LLM request to {hedge.name}")
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    print(f"❌ {provider.name} failed: {e}")
+                    errors.append(f"{provider.name}: {e}")
+                    continue
+                if provider is hedge:
+                    provider.hedge_wins += 1
+                llm_cache.put(self.cache_key(provider, messages, temperature), text, provider.name, provider.model)
+                return text
+            if not pending and candidates:
+                latest = launch()
+        raise RuntimeError("All LLM providers failed: " + "; ".join(errors))
+
+    async def _open_stream(self, provider: Provider, messages: List[Dict[str, str]], temperature: float):
+        """Starts a stream and waits for its first chunk: (stream, first chunk)."""
+        start = time.monotonic()
+        stream = provider.stream(messages, temperature)
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = ""
+        except asyncio.CancelledError:
+            provider.breaker.release()
+            raise
+        except Exception:
+            provider.record("first_token", time.monotonic() - start, False)
+            raise
+        provider.record("first_token", time.monotonic() - start, True)
+        return stream, first
+
+    async def stream(self, messages: List[Dict[str, str]], temperature: float = DEFAULT_TEMPERATURE) -> AsyncIterator[str]:
+        """
+        Streams a completion from whichever provider sends its first token first;
+        a cached completion comes back as one chunk, a finished stream is cached.
+        """
+        candidates = self.candidates()
+        keys = [self.cache_key(p, messages, temperature) for p in candidates]
+        cached = await asyncio.to_thread(llm_cache.get_any, keys)
+        if cached:
+            yield cached
+            return
+
+        pending, errors, winner = {}, [], None
+
+        def launch() -> Provider:
+            provider = candidates.pop(0)
+            provider.breaker.on_launch()
+            pending[asyncio.create_task(self._open_stream(provider, messages, temperature))] = provider
+            return provider
+
+        latest, hedge = launch(), None
+        try:
+            while pending and winner is None:
+                can_hedge = LLM_HEDGE and candidates and len(pending) < 2
+                done, _ = await asyncio.wait(pending, timeout=latest.hedge_deadline("first_token") if can_hedge else None, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    latest = hedge = launch()
+                    hedge.hedged += 1
+                    print(f"🔀 Hedging chat stream to {hedge.name}")
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is not None:
+                        print(f"❌ {provider.name} failed: {task.exception()}")
+                        errors.append(f"{provider.name}: {task.exception()}")
+                    elif winner is None:
+                        winner = (provider, *task.result())
+                        if provider is hedge:
+                            provider.hedge_wins += 1
+                    else:
+                        await task.result()[0].aclose()
+                if winner is None and not pending and candidates:
+                    latest = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(result, tuple):
+                    await result[0].aclose()
+        if winner is None:
+            raise RuntimeError("All LLM providers failed: " + "; ".join(errors))
+
+        provider, stream, first = winner
+        parts = [first] if first else []
+        try:
+            if first:
+                yield first
+            async for text in stream:
+                parts.append(text)
+                yield text
+        except Exception:
+            provider.breaker.record(False)
+            raise
+        finally:
+            await stream.aclose()
+        await asyncio.to_thread(llm_cache.put, self.cache_key(provider, messages, temperature), "".join(parts), provider.name, provider.model)
+
+    async def acomplete(self, messages: List[Dict[str, str]], temperature: float = DEFAULT_TEMPERATURE) -> str:
+        return "".join([text async for text in self.stream(messages, temperature)])
+
+    def status(self) -> Dict[str, Any]:
+        return {p.name: p.status() for p in self.providers}
+
+    async def aclose(self):
+        for provider in self.providers:
+            if provider._async_client is not None:
+                await provider._async_client.aclose()
+
+
+# Global Instance
+provider_manager = ProviderManager()
@@ -0,0 +1,56 @@
+import json
+import os
+import shutil
+import tempfile
+from fastapi import APIRouter, UploadFile, File, Request, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import List
+from app.core.batch import BATCH_MAX_FILES, expand_batch, run_batch
+from app.api.analyze import finalize_audit
+from app.api.rate_limit import limiter
+
+router = APIRouter()
+
+# Batch jobs draw on their own budget, not the per-file /analyze limit
+BATCH_RATE_LIMIT = os.getenv("BATCH_RATE_LIMIT", "5/minute")
+
+# Plain def: spooling the uploads and listing archive members block, so FastAPI
+# runs this in its thread pool; the audits themselves stream from run_batch
+@router.post("/analyze/batch")
+@limiter.shared_limit(BATCH_RATE_LIMIT, scope="batch")
+def analyze_batch(request: Request, files: List[UploadFile] = File(...)):
+    """
+    Audits many files in one request: several uploads and/or zip archives
+    (one audit per member). Streams one JSON line per finished audit (an
+    AuditResult, or {"fileName", "error"}) in completion order.
+    """
+    workdir = tempfile.mkdtemp(prefix="auditx_batch_")
+    try:
+        # Uploads are closed once the endpoint returns; workers read spooled copies
+        spooled = []
+        for i, upload in enumerate(files):
+            path = os.path.join(workdir, f"{i}.upload")
+            with open(path, "wb") as out:
+                shutil.copyfileobj(upload.file, out, length=1024 * 1024)
+            spooled.append((path, upload.filename or f"upload_{i}.csv"))
+        items = expand_batch(spooled)
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    if not items or len(items) > BATCH_MAX_FILES:
+        shutil.rmtree(workdir, ignore_errors=True)
+        if not items:
+            raise HTTPException(status_code=400, detail="No files to audit.")
+        raise HTTPException(status_code=413, detail=f"A batch holds at most {BATCH_MAX_FILES} files.")
+
+    async def results():
+        try:
+            async for item, audit_result, error in run_batch(items, finalize_audit):
+                if error is not None:
+                    yield json.dumps({"fileName": item.name, "error": str(error)}) + "\n"
+                else:
+                    yield audit_result.model_dump_json() + "\n"
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
@@ -1,21 +1,14 @@
-import os
+import asyncio
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 from app.api.history import get_audit
-from app.rag.query import query_regulations
-
-# Try import Google Generative AI
-try:
-    import google.generativeai as genai
-    GEMINI_KEY = os.getenv("GEMINI_API_KEY")
-    if GEMINI_KEY:
-        genai.configure(api_key=GEMINI_KEY)
-        model = genai.GenerativeModel('gemini-2.0-flash')
-    else:
-        model = None
-except Exception:
-    model = None
+from app.rag.query import query_regulations, corpus_size
+from app.rag.embeddings import embedding_service
+from app.ai.providers import provider_manager
+from app.ai.chat_stream import chat_events, replay_events
+from app.ai.llm_cache import chat_cache
 
 router = APIRouter()
 
@@ -34,8 +27,14 @@ Answering the user's question clearly and concisely.
 If the audit report shows specific failures, explain them.
 """
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def lookup_cached_answer(request: ChatRequest):
+    """Embeds the question once (micro-batched); returns (vector, scope, semantic cache hit or None)."""
+    vector = await embedding_service.aembed(request.message)
+    scope = chat_cache.make_scope(request.audit_id, corpus_size())
+    return vector, scope, await asyncio.to_thread(chat_cache.get, scope, vector)
+
+def build_chat_prompt(request: ChatRequest, query_vector=None):
+    """Audit summary + regulation RAG -> (prompt, audit context, regulation docs)."""
     context = ""
     
     # 1. content from specific audit if provided
@@ -51,13 +50,10 @@ async def chat(request: ChatRequest):
                     context += f"- {rule.description}: {rule.details}\n"
     
     # 2. RAG on regulations based on user query
-    docs = query_regulations(request.message, top_k=3)
+    docs = query_regulations(request.message, top_k=3, query_vector=query_vector)
     rag_context = "\n".join([f"- {d['text']} (Source: {d['source']})" for d in docs])
     
-    # 3. LLM Call
     full_prompt = f"""
-    {SYSTEM_PROMPT}
-
     Context:
     {context}
     
@@ -66,19 +62,60 @@ async def chat(request: ChatRequest):
     
     User Question: {request.message}
     """
+    return full_prompt, context, docs
+
+def chat_messages(prompt: str):
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": prompt}]
+
+def mock_chat_response(request: ChatRequest, context: str, docs: list) -> str:
+    return f"[MOCK CHAT RESPONSE]\nYou asked: {request.message}\nFound {len(docs)} relevant regulation articles.\nAudit context: {'Present' if context else 'None'}.\n(Set GROK_API_KEY or GEMINI_API_KEY for live response)"
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    vector, scope, cached = await lookup_cached_answer(request)
+    if cached:
+        return ChatResponse(response=cached["response"], sources=cached["sources"])
+
+    prompt, context, docs = await asyncio.to_thread(build_chat_prompt, request, vector)
+    sources = [d['source'] for d in docs]
     
-    response_text = "I cannot provide an answer at this moment."
-    
-    if model and os.getenv("GEMINI_API_KEY"):
+    # 3. LLM Call
+    if provider_manager.configured():
         try:
-            response = model.generate_content(full_prompt)
-            response_text = response.text
+            response_text = await provider_manager.acomplete(chat_messages(prompt))
+            await asyncio.to_thread(chat_cache.put, scope, request.message, vector, response_text, sources)
         except Exception as e:
             response_text = f"AI Error: {str(e)}"
     else:
-        response_text = f"[MOCK CHAT RESPONSE]\nYou asked: {request.message}\nFound {len(docs)} relevant regulation articles.\nAudit context: {'Present' if context else 'None'}.\n(Set GEMINI_API_KEY for live response)"
+        response_text = mock_chat_response(request, context, docs)
 
     return ChatResponse(
         response=response_text,
-        sources=[d['source'] for d in docs]
+        sources=sources
+    )
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Server-sent events: `sources` first, then one `token` event per chunk as the
+    model produces it, then `done` with the full text (or `error`).
+    """
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    vector, scope, cached = await lookup_cached_answer(request)
+    if cached:
+        return StreamingResponse(replay_events(cached), media_type="text/event-stream", headers=headers)
+
+    prompt, context, docs = await asyncio.to_thread(build_chat_prompt, request, vector)
+    sources = [d['source'] for d in docs]
+
+    async def cache_answer(response_text: str):
+        await asyncio.to_thread(chat_cache.put, scope, request.message, vector, response_text, sources)
+
+    events = chat_events(
+        chat_messages(prompt),
+        sources,
+        on_complete=cache_answer,
+        # Same mock answer as /chat, sent as one chunk
+        mock_text=mock_chat_response(request, context, docs)
     )
+    return StreamingResponse(events, media_type="text/event-stream", headers=headers)
@@ -0,0 +1,92 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Request, Header
+from pydantic import BaseModel
+from typing import Optional
+from app.core.chunked_upload import upload_sessions, UploadError
+from app.core.result_cache import result_cache
+from app.api.analyze import run_audit_pipeline
+from app.models.schemas import AuditResult
+from app.api.rate_limit import limiter
+
+router = APIRouter()
+
+class UploadInitRequest(BaseModel):
+    filename: str
+
+def _raise(e: UploadError):
+    raise HTTPException(status_code=e.status_code, detail=str(e))
+
+@router.post("/upload/initiate")
+@limiter.limit("10/minute")
+def initiate_upload(request: Request, body: UploadInitRequest):
+    """
+    Starts a resumable upload. Send the file as numbered parts (1, 2, ...),
+    then call /complete. GET the upload to find the next part after a disconnect.
+    """
+    session = upload_sessions.create(body.filename)
+    return session.status()
+
+@router.post("/upload/{upload_id}/parts/{part_number}")
+@limiter.limit("600/minute")
+async def upload_part(
+    request: Request,
+    upload_id: str,
+    part_number: int,
+    x_part_sha256: Optional[str] = Header(default=None)
+):
+    """
+    Raw part bytes as the request body. Complete CSV records in the part are
+    profiled immediately; the ack carries the part's SHA-256.
+    """
+    data = await request.body()
+    try:
+        # Parsing, profiling and the checkpoint write run off the event loop
+        return await asyncio.to_thread(_add_part, upload_id, part_number, data, x_part_sha256)
+    except UploadError as e:
+        _raise(e)
+
+def _add_part(upload_id: str, part_number: int, data: bytes, sha256: Optional[str]):
+    session = upload_sessions.get(upload_id)
+    # A retry of this part waits here and is then acknowledged as a duplicate
+    with session.lock:
+        ack = session.add_part(part_number, data, sha256)
+        if not ack["duplicate"]:
+            upload_sessions.checkpoint(session)
+    return ack
+
+@router.get("/upload/{upload_id}")
+def upload_status(upload_id: str):
+    try:
+        return upload_sessions.get(upload_id).status()
+    except UploadError as e:
+        _raise(e)
+
+# Plain def: profiling the last record and the audit pipeline block, so FastAPI
+# runs this in its thread pool
+@router.post("/upload/{upload_id}/complete", response_model=AuditResult)
+@limiter.limit("10/minute")
+def complete_upload(request: Request, upload_id: str):
+    """
+    Finishes profiling the last record and runs the audit pipeline. The session
+    is kept until the audit is stored, so a failed pipeline can be retried.
+    """
+    try:
+        session = upload_sessions.get(upload_id)
+        cache_key = result_cache.make_key(session.content_hash)
+        cached = result_cache.get(cache_key)
+        metadata = None if cached else session.complete()
+    except UploadError as e:
+        _raise(e)
+    if cached:
+        upload_sessions.discard(upload_id)
+        return AuditResult.model_validate({**cached, "cache_hit": True})
+
+    audit_result = run_audit_pipeline(metadata, session.filename)
+    result_cache.put(cache_key, audit_result.model_dump(mode="json"))
+    upload_sessions.discard(upload_id)
+    return audit_result
+
+@router.post("/upload/{upload_id}/abort")
+def abort_upload(upload_id: str):
+    upload_sessions.discard(upload_id)
+    return {"upload_id": upload_id, "status": "aborted"}
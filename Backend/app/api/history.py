@@ -2,7 +2,8 @@ import sqlite3
 import json
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from app.models.schemas import AuditResult
+from app.models.schemas import AuditResult, ComplianceScore
+from app.core.scoring import calculate_score, scoring_version
 
 DB_PATH = "auditx.db"
 
@@ -19,6 +20,20 @@ def init_db():
             provenance_hash TEXT
         )
     ''')
+    # Scores written by bulk re-scoring, one row per audit and scoring version
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS audit_scores (
+            audit_id TEXT,
+            scoring_version TEXT,
+            final_score INTEGER,
+            risk_band TEXT,
+            rescored_at TEXT,
+            PRIMARY KEY (audit_id, scoring_version)
+        )
+    ''')
+    columns = [row[1] for row in c.execute('PRAGMA table_info(audits)')]
+    if 'scoring_version' not in columns:
+        c.execute('ALTER TABLE audits ADD COLUMN scoring_version TEXT')
     conn.commit()
     conn.close()
 
@@ -29,15 +44,16 @@ def save_audit(audit: AuditResult):
     audit_json = audit.model_dump_json()
     
     c.execute('''
-        INSERT INTO audits (audit_id, timestamp, final_score, risk_band, audit_data, provenance_hash)
-        VALUES (?, ?, ?, ?, ?, ?)
+        INSERT INTO audits (audit_id, timestamp, final_score, risk_band, audit_data, provenance_hash, scoring_version)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
     ''', (
         audit.audit_id,
         audit.timestamp.isoformat(),
         audit.compliance_score.final_score,
         audit.compliance_score.risk_band,
         audit_json,
-        audit.provenance_hash
+        audit.provenance_hash,
+        scoring_version()
     ))
     conn.commit()
     conn.close()
@@ -46,7 +62,7 @@ def get_all_audits() -> List[Dict[str, Any]]:
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
-    c.execute('SELECT audit_id, timestamp, final_score, risk_band, audit_data, provenance_hash FROM audits ORDER BY timestamp DESC')
+    c.execute('SELECT audit_id, timestamp, final_score, risk_band, audit_data, provenance_hash, scoring_version FROM audits ORDER BY timestamp DESC')
     rows = c.fetchall()
     conn.close()
     
@@ -68,16 +84,38 @@ def get_all_audits() -> List[Dict[str, Any]]:
     
     return audits
 
+def current_score(audit: AuditResult, final_score: Optional[int], risk_band: Optional[str], version: Optional[str]) -> ComplianceScore:
+    """
+    The audit's score as of the last bulk re-scoring. Re-scoring updates the
+    listing columns only (the stored record is hashed for provenance), so the
+    stored compliance_score can be out of date.
+    """
+    stored = audit.compliance_score
+    if final_score is None or (final_score == stored.final_score and risk_band == stored.risk_band):
+        return stored
+    rescored = calculate_score(audit.rule_results)
+    if rescored.final_score == final_score and rescored.risk_band == risk_band:
+        # Same rule results under the current deduction table
+        return rescored
+    # Rules were re-evaluated too; the stored per-rule results predate them
+    return ComplianceScore(
+        final_score=final_score,
+        risk_band=risk_band,
+        breakdown=[f"Re-scored against the current rule set (version {version}); originally {stored.final_score} ({stored.risk_band})"]
+    )
+
 def get_audit(audit_id: str) -> Optional[AuditResult]:
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     c = conn.cursor()
-    c.execute('SELECT audit_data FROM audits WHERE audit_id = ?', (audit_id,))
+    c.execute('SELECT audit_data, final_score, risk_band, scoring_version FROM audits WHERE audit_id = ?', (audit_id,))
     row = c.fetchone()
     conn.close()
     
     if row:
-        return AuditResult.model_validate_json(row['audit_data'])
+        audit = AuditResult.model_validate_json(row['audit_data'])
+        audit.compliance_score = current_score(audit, row['final_score'], row['risk_band'], row['scoring_version'])
+        return audit
     return None
 
 # Initialize DB on module load (safe for hackathon)
@@ -1,9 +1,33 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
 from typing import List, Dict, Any
-from app.api.history import get_all_audits
+from app.api.history import get_all_audits, DB_PATH
+from app.core.parallel import PROFILE_WORKERS, get_executor
+from app.core.rescoring import rescore_jobs
+from app.api.rate_limit import limiter
 
 router = APIRouter()
 
 @router.get("/history", response_model=List[Dict[str, Any]])
 async def history():
     return get_all_audits()
+
+@router.post("/history/rescore", status_code=202)
+@limiter.limit("5/minute")
+async def start_rescore(request: Request, rerun_rules: bool = False):
+    """
+    Re-applies the current scoring config to every stored audit.
+    rerun_rules=true also re-evaluates the current rule set on the stored metadata.
+    """
+    executor = get_executor(PROFILE_WORKERS) if rerun_rules and PROFILE_WORKERS > 1 else None
+    try:
+        job = rescore_jobs.start(DB_PATH, rerun_rules=rerun_rules, executor=executor)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return job.progress()
+
+@router.get("/history/rescore/{job_id}")
+async def rescore_progress(job_id: str):
+    job = rescore_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Re-scoring job not found")
+    return job.progress()
@@ -0,0 +1,75 @@
+import asyncio
+import json
+import os
+from fastapi import APIRouter, UploadFile, File, Request, HTTPException, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.core.jobs import job_queue, FINAL_STATUSES
+from app.api.rate_limit import limiter
+
+router = APIRouter()
+
+JOB_EVENT_POLL_SECONDS = float(os.getenv("JOB_EVENT_POLL_SECONDS", "0.5"))
+SSE_HEARTBEAT_SECONDS = 15
+
+def _job_or_404(job_id: str):
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("upload_path", None)
+    job.pop("content_hash", None)
+    return job
+
+@router.post("/jobs/analyze", status_code=202)
+@limiter.limit("10/minute")
+def submit_analysis(request: Request, file: UploadFile = File(...)):
+    """
+    Queues an audit and returns its job at once. Poll GET /jobs/{job_id} or
+    follow GET /jobs/{job_id}/events (SSE); the AuditResult is at /jobs/{job_id}/result.
+    """
+    job = job_queue.submit(file.file, file.filename or "upload.csv")
+    job.pop("upload_path", None)
+    job.pop("content_hash", None)
+    return job
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    return await asyncio.to_thread(_job_or_404, job_id)
+
+@router.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = await asyncio.to_thread(_job_or_404, job_id)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=422, detail=job["error"] or "Job failed")
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']} ({job['stage']})")
+    return await asyncio.to_thread(job_queue.result, job_id)
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, last_event_id: Optional[str] = Header(default=None)):
+    """
+    Server-sent events, one per stage change (ingest, analysis, explanation,
+    provenance, save, completed / failed). Reconnects resume after Last-Event-ID.
+    """
+    await asyncio.to_thread(_job_or_404, job_id)
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    async def stream():
+        nonlocal after
+        idle = 0.0
+        while True:
+            events = await asyncio.to_thread(job_queue.events, job_id, after)
+            for event in events:
+                after = event["seq"]
+                yield f"id: {event['seq']}\nevent: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+                if event["status"] in FINAL_STATUSES:
+                    return
+            if events:
+                idle = 0.0
+            elif idle >= SSE_HEARTBEAT_SECONDS:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            await asyncio.sleep(JOB_EVENT_POLL_SECONDS)
+            idle += JOB_EVENT_POLL_SECONDS
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
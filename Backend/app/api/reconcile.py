@@ -0,0 +1,46 @@
+from fastapi import APIRouter, UploadFile, File, Request, HTTPException
+from typing import BinaryIO, Optional
+from app.core.decoding import detect_compression, open_decompressed
+from app.core.reconciliation import reconcile, ReconciliationError
+from app.models.schemas import ReconciliationResult
+from app.api.rate_limit import limiter
+
+router = APIRouter()
+
+def _csv_stream(upload: UploadFile) -> BinaryIO:
+    codec = detect_compression(upload.file, upload.filename or "")
+    return open_decompressed(upload.file, codec) if codec else upload.file
+
+def _columns(value: str):
+    return [col.strip() for col in value.split(",") if col.strip()]
+
+@router.post("/reconcile", response_model=ReconciliationResult)
+@limiter.limit("5/minute")
+def reconcile_ledgers(
+    request: Request,
+    left: UploadFile = File(...),
+    right: UploadFile = File(...),
+    key: str = ...,
+    amount: str = ...,
+    right_key: Optional[str] = None,
+    right_amount: Optional[str] = None,
+    tolerance: float = 0.0
+):
+    """
+    Matches two CSV ledgers (e.g. GL vs bank statement), optionally compressed.
+    key / right_key: comma-separated key columns (right_* default to the left names).
+    Returns match rates, unmatched counts and amount variance; no rows or keys.
+    """
+    try:
+        with _csv_stream(left) as left_stream, _csv_stream(right) as right_stream:
+            result = reconcile(
+                left_stream, right_stream,
+                left_keys=_columns(key), left_amount=amount,
+                right_keys=_columns(right_key) if right_key else None, right_amount=right_amount,
+                tolerance=tolerance
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result["left"]["file"] = left.filename
+    result["right"]["file"] = right.filename
+    return result
@@ -0,0 +1,453 @@
+"""
+Mergeable Column Accumulators
+Aggregate-only state used by the ingestion pipeline. Each accumulator is fed
+DataFrame chunks, keeps nothing but counts and running statistics, and can be
+merged with another accumulator built from a different chunk of the same file.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+from app.models.schemas import MetadataSummary, BenfordAnalysis
+from app.core.benford import extract_digit_histograms
+from app.core.entity_scanner import entity_matcher
+from app.core.sketches import KLLSketch, HyperLogLog, SpaceSaving, REPORTED_QUANTILES, encode_bytes
+from app.core.duplicates import DuplicateFingerprinter
+from app.core.segmented_benford import SegmentedBenford, segment_pseudonym
+from app.core.row_checks import RowCheckCounter
+from app.core.rule_registry import rule_registry
+from app.core.posting_calendar import PostingHistogram
+
+# Header keywords that mark a column as PII-risk
+PII_KEYWORDS = ["ssn", "social security", "cvv", "credit card", "password", "pwd", "secret", "card number"]
+
+
+def _merge_dtype(current: Optional[str], incoming: str) -> str:
+    """Widens a column dtype the same way pandas would for the whole file."""
+    if current is None or current == incoming:
+        return incoming
+    try:
+        a, b = np.dtype(current), np.dtype(incoming)
+        if a.kind in "biuf" and b.kind in "biuf":
+            return str(np.result_type(a, b))
+    except TypeError:
+        pass
+    # Numeric mixed with text (or two different text dtypes) ends up as text
+    if current.startswith(("int", "uint", "float", "bool")):
+        return incoming
+    return current
+
+
+class ColumnAccumulator:
+    """Running, mergeable statistics for a single column."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.dtype: Optional[str] = None
+        self.has_values = False  # dtype was seen on a chunk with at least one value
+        self.row_count = 0
+        self.null_count = 0
+
+        # Numeric
+        self.numeric_count = 0
+        self.numeric_sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.digit_histograms = extract_digit_histograms(np.empty(0))  # index = digit value
+        self.quantiles = KLLSketch()
+
+        # Any type: distinct count and most frequent values
+        self.distinct = HyperLogLog()
+        self.heavy_hitters = SpaceSaving()
+
+        # Text
+        self.placeholder_hits: Dict[str, int] = {}
+
+        # Dates
+        self.date_min: Optional[pd.Timestamp] = None
+        self.date_max: Optional[pd.Timestamp] = None
+        self.postings = PostingHistogram()
+
+    def __setstate__(self, state):
+        # Accumulators stored by incremental audits before posting calendars existed
+        state.setdefault("postings", PostingHistogram())
+        self.__dict__.update(state)
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.dtype is not None and self.dtype.startswith(("int", "uint", "float", "bool"))
+
+    @property
+    def is_date_candidate(self) -> bool:
+        return 'date' in self.name.lower() or 'time' in self.name.lower()
+
+    def _reset_numeric(self):
+        self.numeric_count = 0
+        self.numeric_sum = 0.0
+        self.min = None
+        self.max = None
+        self.digit_histograms = extract_digit_histograms(np.empty(0))
+        self.quantiles = KLLSketch()
+
+    def _set_dtype(self, dtype: str, has_values: bool):
+        """
+        Applies a chunk dtype. All-null chunks parse as float64 in pandas, so they
+        only decide the dtype when no chunk with real values has been seen.
+        """
+        if not has_values and self.has_values:
+            return
+        if has_values and not self.has_values:
+            merged = dtype
+        else:
+            merged = _merge_dtype(self.dtype, dtype)
+
+        was_numeric = self.is_numeric
+        self.dtype = merged
+        self.has_values = self.has_values or has_values
+        if was_numeric and not self.is_numeric:
+            # Column turned out to be text; numeric stats no longer apply
+            self._reset_numeric()
+
+    def add_counts(self, rows: int, nulls: int, dtype: str):
+        """Records row / null counts and the dtype of one chunk."""
+        self.row_count += rows
+        self.null_count += nulls
+        self._set_dtype(dtype, rows - nulls > 0)
+
+    def add_extremes(self, chunk_min: Optional[float], chunk_max: Optional[float]):
+        if chunk_min is not None:
+            self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        if chunk_max is not None:
+            self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+
+    def add_date_range(self, chunk_min: pd.Timestamp, chunk_max: pd.Timestamp):
+        self.date_min = chunk_min if self.date_min is None else min(self.date_min, chunk_min)
+        self.date_max = chunk_max if self.date_max is None else max(self.date_max, chunk_max)
+
+    def scan_text(self, series: pd.Series):
+        """Suspicious Name Check (single automaton pass over the column)."""
+        try:
+            for p, count in entity_matcher.count_rows(series).items():
+                self.placeholder_hits[p] = self.placeholder_hits.get(p, 0) + count
+        except Exception:
+            pass
+        values = series.dropna()
+        self.distinct.update(values)
+        self.heavy_hitters.update(values)
+
+    def scan_numeric(self, values: np.ndarray, is_bool: bool = False, extremes: bool = True):
+        """
+        Numeric Stats & Benford's Leading Digits for non-null values.
+        extremes=False when min/max already came from file-level statistics.
+        """
+        if values.size == 0:
+            return
+        # Distinct / heavy-hitter sketches cover every chunk, even once the column is text
+        self.distinct.update(values)
+        self.heavy_hitters.update(values)
+        if not self.is_numeric:
+            return
+        if extremes:
+            self.add_extremes(float(values.min()), float(values.max()))
+        self.numeric_sum += float(values.sum())
+        self.numeric_count += int(values.size)
+
+        # Leading / first-two / second / last-two digit histograms in one pass
+        if not is_bool:
+            as_float = values.astype(np.float64, copy=False)
+            histograms = extract_digit_histograms(as_float)
+            for test_name, counts in histograms.items():
+                self.digit_histograms[test_name] += counts
+            self.quantiles.update(as_float)
+
+    def scan_datetimes(self, values: pd.Series, extremes: bool = True):
+        """
+        Native datetime values (non-null): distinct / heavy-hitter sketches,
+        range and posting calendar. extremes=False when the range came from
+        file-level statistics.
+        """
+        if values.empty:
+            return
+        self.distinct.update(values)
+        self.heavy_hitters.update(values)
+        if extremes:
+            self.add_date_range(values.min(), values.max())
+        self.postings.update(values)
+
+    def scan_dates(self, series: pd.Series):
+        """Date Stats for text columns whose name looks like a date."""
+        try:
+            # Force coercion to catch mixed formats/errors as NaT
+            dt_series = pd.to_datetime(series, errors='coerce').dropna()
+            if not dt_series.empty:
+                self.add_date_range(dt_series.min(), dt_series.max())
+                self.postings.update(dt_series)
+        except Exception:
+            pass  # Not a date column or parse failed
+
+    def update(self, series: pd.Series):
+        """Folds one chunk of the column into the accumulator."""
+        self.add_counts(len(series), int(series.isnull().sum()), str(series.dtype))
+
+        if pd.api.types.is_string_dtype(series):
+            self.scan_text(series)
+
+        if pd.api.types.is_numeric_dtype(series):
+            valid_nums = series.dropna()
+            self.scan_numeric(valid_nums.to_numpy(), is_bool=pd.api.types.is_bool_dtype(valid_nums))
+
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            # Already parsed (XLSX cells, typed frames), whatever the column name
+            self.scan_datetimes(series.dropna())
+
+        # Date Stats (heuristic on the column name)
+        elif self.is_date_candidate:
+            self.scan_dates(series)
+
+    def merge(self, other: "ColumnAccumulator") -> "ColumnAccumulator":
+        """Merges another accumulator for the same column into this one."""
+        if other.dtype is not None:
+            self._set_dtype(other.dtype, other.has_values)
+        self.row_count += other.row_count
+        self.null_count += other.null_count
+
+        if self.is_numeric and other.is_numeric:
+            self.numeric_count += other.numeric_count
+            self.numeric_sum += other.numeric_sum
+            if other.min is not None:
+                self.min = other.min if self.min is None else min(self.min, other.min)
+            if other.max is not None:
+                self.max = other.max if self.max is None else max(self.max, other.max)
+            for test_name, counts in other.digit_histograms.items():
+                self.digit_histograms[test_name] += counts
+            self.quantiles.merge(other.quantiles)
+
+        self.distinct.merge(other.distinct)
+        self.heavy_hitters.merge(other.heavy_hitters)
+
+        for p, count in other.placeholder_hits.items():
+            self.placeholder_hits[p] = self.placeholder_hits.get(p, 0) + count
+
+        if other.date_min is not None:
+            self.date_min = other.date_min if self.date_min is None else min(self.date_min, other.date_min)
+        if other.date_max is not None:
+            self.date_max = other.date_max if self.date_max is None else max(self.date_max, other.date_max)
+        self.postings.merge(other.postings)
+        return self
+
+    def stats(self, total_rows: int) -> Dict[str, Any]:
+        null_percentage = (self.null_count / total_rows) * 100 if total_rows > 0 else 0
+        stats = {
+            "type": self.dtype or "object",
+            "null_percentage": round(float(null_percentage), 2)
+        }
+        if self.is_numeric:
+            if self.numeric_count > 0:
+                stats["min"] = self.min
+                stats["max"] = self.max
+                stats["mean"] = self.numeric_sum / self.numeric_count
+                if self.quantiles.n > 0:
+                    values = self.quantiles.quantiles(list(REPORTED_QUANTILES.values()))
+                    stats.update(zip(REPORTED_QUANTILES.keys(), values))
+            else:
+                stats["min"] = None
+                stats["max"] = None
+                stats["mean"] = None
+        distinct = self.distinct.count()
+        if self.row_count > self.null_count and distinct > 0:
+            # HLL estimates can overshoot; a column cannot have more distinct values than values.
+            # An empty sketch means the values were never scanned (e.g. nested types), not zero.
+            stats["distinct_count"] = min(distinct, self.row_count - self.null_count)
+        return stats
+
+    def sketches(self, include_values: bool = True) -> Dict[str, Any]:
+        """
+        Serialized sketches (zlib + base64) for storage with the audit.
+        Heavy-hitter values are keyed pseudonyms, like segment labels: the
+        summary is stored, returned and hashed, so raw values (vendor names,
+        account numbers) never leave the accumulator. include_values=False
+        withholds them entirely (PII-risk columns).
+        """
+        sketches = {"distinct": encode_bytes(self.distinct.to_bytes())}
+        if self.is_numeric and self.quantiles.n > 0:
+            sketches["quantiles"] = encode_bytes(self.quantiles.to_bytes())
+        if include_values:
+            sketches["heavy_hitters"] = encode_bytes(self.heavy_hitters.to_bytes(label=segment_pseudonym))
+            sketches["top_values"] = self.heavy_hitters.top(label=segment_pseudonym)
+        return sketches
+
+    def digit_counts(self, test_name: str = "first") -> Dict[str, int]:
+        """Non-zero bins of a digit histogram, keyed the way BenfordAnalysis stores them."""
+        counts = self.digit_histograms[test_name]
+        if test_name == "first":
+            bins = range(1, 10)
+        elif test_name == "first_two":
+            bins = range(10, 100)
+        else:
+            bins = range(len(counts))
+        width = 2 if test_name == "last_two" else 1
+        return {str(d).zfill(width): int(counts[d]) for d in bins if counts[d] > 0}
+
+    def date_range(self) -> Optional[Dict[str, Any]]:
+        if self.is_numeric or self.date_min is None:
+            return None
+        return {"min": self.date_min.isoformat(), "max": self.date_max.isoformat()}
+
+    def posting_calendar(self) -> Optional[Dict[str, Any]]:
+        if self.is_numeric:
+            return None
+        return self.postings.summary()
+
+
+class DatasetAccumulator:
+    """
+    Per-file collection of column accumulators plus the row count.
+    With row_level=False (column-group workers) only column state is kept and
+    the caller feeds whole rows to update_rows itself.
+    """
+
+    def __init__(self, row_level: bool = True):
+        self.row_count = 0
+        self.columns: Dict[str, ColumnAccumulator] = {}
+        self.row_level = row_level
+        self.fingerprints: Optional[DuplicateFingerprinter] = None
+        self.segments: Optional[SegmentedBenford] = None
+        self.row_checks: Optional[RowCheckCounter] = None
+        self._row_scans_ready = False
+
+    def update(self, df: pd.DataFrame):
+        """Folds one DataFrame chunk into the accumulator."""
+        self.row_count += len(df)
+        for col in df.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnAccumulator(col)
+            self.columns[col].update(df[col])
+        if self.row_level:
+            self.update_rows(df)
+
+    def init_row_scans(self, columns: List[str]) -> List[str]:
+        """Sets up the row-level scans for a header; returns the columns they read."""
+        if not self._row_scans_ready:
+            self.fingerprints = DuplicateFingerprinter.for_columns(columns)
+            self.segments = SegmentedBenford.for_columns(columns)
+            self.row_checks = RowCheckCounter.for_columns(rule_registry.ruleset.row_predicates, columns)
+            self._row_scans_ready = True
+        needed = list(self.fingerprints.keys.values()) if self.fingerprints is not None else []
+        if self.segments is not None:
+            needed += self.segments.columns
+        if self.row_checks is not None:
+            needed += self.row_checks.columns
+        return list(dict.fromkeys(needed))
+
+    def update_rows(self, df: pd.DataFrame):
+        """Row-level scans that need whole rows (duplicates, segmented Benford, row rules)."""
+        self.init_row_scans(df.columns.tolist())
+        if self.fingerprints is not None:
+            self.fingerprints.update(df)
+        if self.segments is not None:
+            self.segments.update(df)
+        if self.row_checks is not None:
+            self.row_checks.update(df)
+
+    def register_columns(self, columns: List[str]):
+        """Fixes column order up front when column results arrive out of order."""
+        for col in columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnAccumulator(col)
+
+    def merge_columns(self, columns: Dict[str, ColumnAccumulator]):
+        """Merges column accumulators without touching the row count."""
+        for col, acc in columns.items():
+            if col in self.columns:
+                self.columns[col].merge(acc)
+            else:
+                self.columns[col] = acc
+
+    def merge(self, other: "DatasetAccumulator") -> "DatasetAccumulator":
+        """Merges an accumulator built from another chunk of the same file."""
+        self.row_count += other.row_count
+        self.merge_columns(other.columns)
+        if other.fingerprints is not None:
+            if self.fingerprints is None:
+                self.fingerprints = other.fingerprints
+            else:
+                self.fingerprints.merge(other.fingerprints)
+        if other.segments is not None:
+            if self.segments is None:
+                self.segments = other.segments
+            else:
+                self.segments.merge(other.segments)
+        if other.row_checks is not None:
+            if self.row_checks is None:
+                self.row_checks = other.row_checks
+            else:
+                self.row_checks.merge(other.row_checks)
+        self._row_scans_ready = self._row_scans_ready or other._row_scans_ready
+        return self
+
+    def to_summary(self) -> MetadataSummary:
+        """Builds the MetadataSummary from the aggregated state."""
+        columns: List[str] = list(self.columns.keys())
+        column_stats = {}
+        date_ranges = {}
+        lead_digit_counts = {}
+        first_two_counts = {}
+        second_counts = {}
+        last_two_counts = {}
+        suspicious_entities = {}
+        column_sketches = {}
+        posting_calendar = {}
+
+        for col in columns:
+            acc = self.columns[col]
+            column_stats[col] = acc.stats(self.row_count)
+
+            for p in entity_matcher.patterns:
+                count = acc.placeholder_hits.get(p, 0)
+                if count > 0:
+                    suspicious_entities[p] = suspicious_entities.get(p, 0) + count
+
+            # PII Guardrail (Header Scan)
+            is_pii = any(keyword in col.lower() for keyword in PII_KEYWORDS)
+            if is_pii:
+                suspicious_entities.setdefault("pii_columns", []).append(col)
+            column_sketches[col] = acc.sketches(include_values=not is_pii)
+
+            if acc.is_numeric:
+                lead_digit_counts[col] = acc.digit_counts("first")
+                first_two_counts[col] = acc.digit_counts("first_two")
+                second_counts[col] = acc.digit_counts("second")
+                last_two_counts[col] = acc.digit_counts("last_two")
+
+            date_range = acc.date_range()
+            if date_range:
+                date_ranges[col] = date_range
+            calendar = acc.posting_calendar()
+            if calendar:
+                posting_calendar[col] = calendar
+
+        # Construct partial BenfordAnalysis (just counts for now)
+        # The actual MAD calculation happens in the Benford Engine
+        benford_data = BenfordAnalysis(
+            leading_digits=lead_digit_counts,
+            mad_scores={},  # To be filled by Benford Engine
+            risk_labels={},  # To be filled by Benford Engine
+            passed=False,  # Default
+            first_two_digits=first_two_counts,
+            second_digits=second_counts,
+            last_two_digits=last_two_counts
+        )
+
+        return MetadataSummary(
+            columns=columns,
+            row_count=self.row_count,
+            column_stats=column_stats,
+            date_ranges=date_ranges,
+            benford_analysis=benford_data,
+            suspicious_entities=suspicious_entities,
+            column_sketches=column_sketches,
+            posting_calendar=posting_calendar,
+            duplicate_analysis=self.fingerprints.summary() if self.fingerprints is not None else None,
+            segmented_benford=self.segments.summary(suspicious_entities.get("pii_columns", [])) if self.segments is not None else {},
+            row_checks=self.row_checks.summary() if self.row_checks is not None else {}
+        )
@@ -0,0 +1,70 @@
+"""
+Incremental Audit State
+The mergeable accumulators behind an audit (digit counts, null counts, min/max,
+date ranges, sketches, segment counts, row-rule counts and the duplicate
+fingerprints) are stored with it. An append-only delta upload is folded into
+the stored state of its base audit, so the daily audit of a growing ledger
+costs time proportional to the new rows only.
+
+Layout: AUDIT_STATE_DIR/<audit_id>/state.pkl plus the sorted fingerprint runs.
+Runs are immutable and hard-linked from one audit to the next.
+"""
+
+import os
+import pickle
+import shutil
+import time
+import uuid
+from app.core.accumulators import DatasetAccumulator
+
+AUDIT_STATE_DIR = os.getenv("AUDIT_STATE_DIR", "audit_states")
+AUDIT_STATE_TTL = int(os.getenv("AUDIT_STATE_TTL", str(90 * 24 * 3600)))
+STATE_FILE = "state.pkl"
+
+
+class AuditStateStore:
+    """On-disk accumulator state per audit, expired after AUDIT_STATE_TTL."""
+
+    def __init__(self, directory: str = AUDIT_STATE_DIR, ttl: int = AUDIT_STATE_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, audit_id: str) -> str:
+        try:
+            uuid.UUID(audit_id)
+        except ValueError:
+            raise KeyError(audit_id)
+        return os.path.join(self.directory, audit_id)
+
+    def save(self, audit_id: str, accumulator: DatasetAccumulator):
+        """Persists the state after the audit's summary was built."""
+        directory = self._path(audit_id)
+        os.makedirs(directory, exist_ok=True)
+        if accumulator.fingerprints is not None:
+            accumulator.fingerprints.persist(directory)
+        tmp = os.path.join(directory, STATE_FILE + ".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(accumulator, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, os.path.join(directory, STATE_FILE))
+        self.expire()
+
+    def load(self, audit_id: str) -> DatasetAccumulator:
+        """State of a stored audit; KeyError when it was never kept or has expired."""
+        path = os.path.join(self._path(audit_id), STATE_FILE)
+        if not os.path.exists(path):
+            raise KeyError(audit_id)
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def expire(self):
+        """Drops states older than the TTL; hard-linked runs live on in newer audits."""
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name, STATE_FILE)
+            if os.path.exists(path) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+
+# Global Instance
+audit_states = AuditStateStore()
@@ -0,0 +1,104 @@
+"""
+Batch Audits
+Runs ingest -> Benford -> rules -> score for many files at once. Each file (or
+member of an uploaded zip) is one task on a process pool, so wall time scales
+with cores rather than file count. Finished tables are handed to an I/O-bound
+finalize step (AI explanation, provenance, storage) on threads, and results
+are yielded in completion order.
+"""
+
+import asyncio
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Callable, List, NamedTuple, Optional, Tuple
+from app.models.schemas import AuditResult, MetadataSummary, RuleResult, ComplianceScore
+from app.core.decoding import ingest_upload, ingest_archive_member, is_data_member, is_xlsx
+from app.core.pipeline import score_metadata
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 1)))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+# Concurrent finalize steps (each makes one LLM call)
+BATCH_FINALIZE_CONCURRENCY = int(os.getenv("BATCH_FINALIZE_CONCURRENCY", "8"))
+
+ScoredTable = Tuple[str, MetadataSummary, List[RuleResult], ComplianceScore]
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+class BatchItem(NamedTuple):
+    """A file on disk, or one member of a zip archive on disk."""
+    path: str
+    name: str
+    member: Optional[str] = None
+
+
+def get_batch_executor() -> ProcessPoolExecutor:
+    """Batch pool, separate from the column-profiling pool."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+    return _executor
+
+
+def expand_batch(files: List[Tuple[str, str]]) -> List[BatchItem]:
+    """(path, filename) uploads -> one item per file, zip archives split into members."""
+    items = []
+    for path, name in files:
+        with open(path, "rb") as f:
+            archive = zipfile.is_zipfile(f) and not is_xlsx(f, name)
+        if not archive:
+            items.append(BatchItem(path, name))
+            continue
+        with zipfile.ZipFile(path) as zf:
+            items.extend(BatchItem(path, f"{name}:{m.filename}", m.filename) for m in zf.infolist() if is_data_member(m))
+    return items
+
+
+def audit_item(item: BatchItem) -> List[ScoredTable]:
+    """Worker entry point: ingests one item and scores every table in it."""
+    if item.member is not None:
+        summaries = {item.name: ingest_archive_member(item.path, item.member)}
+    else:
+        with open(item.path, "rb") as f:
+            summaries = ingest_upload(f, item.name)
+    return [(name, *score_metadata(metadata)) for name, metadata in summaries.items()]
+
+
+async def run_batch(
+    items: List[BatchItem],
+    finalize: Callable[..., AuditResult],
+    executor: Optional[ProcessPoolExecutor] = None
+) -> AsyncIterator[Tuple[BatchItem, Optional[AuditResult], Optional[Exception]]]:
+    """Yields (item, result, error) per table as soon as it is finalized."""
+    loop = asyncio.get_running_loop()
+    executor = executor or get_batch_executor()
+    finalizing = asyncio.Semaphore(BATCH_FINALIZE_CONCURRENCY)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def process(item: BatchItem):
+        try:
+            tables = await loop.run_in_executor(executor, audit_item, item)
+            if not tables:
+                raise ValueError("No tabular data found")
+        except Exception as e:
+            await queue.put((item, None, e))
+            return
+        for table in tables:
+            try:
+                async with finalizing:
+                    result = await asyncio.to_thread(finalize, *table[1:], table[0])
+                await queue.put((item, result, None))
+            except Exception as e:
+                await queue.put((item, None, e))
+
+    async def run_all():
+        await asyncio.gather(*(process(item) for item in items))
+        await queue.put(None)
+
+    runner = asyncio.create_task(run_all())
+    try:
+        while (entry := await queue.get()) is not None:
+            yield entry
+    finally:
+        runner.cancel()
@@ -1,5 +1,6 @@
 import math
-from typing import Dict, Any 
+import numpy as np
+from typing import Dict, Any, List, Tuple
 from app.models.schemas import MetadataSummary, BenfordAnalysis
 
 # Benford's Law Probabilities for digits 1-9
@@ -8,17 +9,76 @@ BENFORD_PROBS = {
     '6': 0.067, '7': 0.058, '8': 0.051, '9': 0.046
 }
 
-def calculate_mad(actual_counts: Dict[str, int], total_count: int) -> float:
+# First-two digit (10-99) and second digit (0-9) expectations
+FIRST_TWO_PROBS = {str(d): math.log10(1 + 1 / d) for d in range(10, 100)}
+SECOND_DIGIT_PROBS = {
+    str(d): sum(math.log10(1 + 1 / (10 * k + d)) for k in range(1, 10)) for d in range(10)
+}
+# Last-two digits of genuine amounts are expected to be uniform
+LAST_TWO_PROBS = {f"{d:02d}": 0.01 for d in range(100)}
+
+def _first_two_digits(x: np.ndarray) -> np.ndarray:
+    """First two significant digits (10-99) of positive finite values."""
+    # Scale into [10, 100) so the integer part is the first two significant digits.
+    # Rounding absorbs float noise such as 0.57 / 0.01 = 56.99999999999999
+    exponent = np.floor(np.log10(x))
+    scaled = np.round(x / np.power(10.0, exponent - 1), 9)
+    scaled = np.where(scaled >= 100, scaled / 10, scaled)
+    scaled = np.where(scaled < 10, scaled * 10, scaled)
+    return np.floor(scaled).astype(np.int64)
+
+def first_digits(values: np.ndarray) -> np.ndarray:
+    """Leading significant digit per value; 0 where the value is zero, NaN or infinite."""
+    x = np.abs(np.asarray(values, dtype=np.float64))
+    valid = np.isfinite(x) & (x > 0)
+    digits = np.zeros(x.shape, dtype=np.int64)
+    digits[valid] = _first_two_digits(x[valid]) // 10
+    return digits
+
+def extract_digit_histograms(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized digit extraction for Benford tests.
+    Scales each value by its power of ten (log10) instead of formatting it as a
+    string, so 0.005 and 1e-05 yield their true leading digits.
+    Returns fixed-size histograms indexed by the digit value:
+      first (10), first_two (100, bins 10-99), second (10), last_two (100).
+    """
+    x = np.abs(np.asarray(values, dtype=np.float64))
+    x = x[np.isfinite(x) & (x > 0)]
+
+    if x.size == 0:
+        return {
+            "first": np.zeros(10, dtype=np.int64),
+            "first_two": np.zeros(100, dtype=np.int64),
+            "second": np.zeros(10, dtype=np.int64),
+            "last_two": np.zeros(100, dtype=np.int64),
+        }
+
+    first_two = _first_two_digits(x)
+
+    # Nigrini's first-two, second and last-two digit tests use amounts >= 10
+    large = x >= 10
+    # fmod in float64: an int64 cast overflows for values >= 2**63
+    last_two = np.fmod(np.floor(x[large]), 100).astype(np.int64)
+
+    return {
+        "first": np.bincount(first_two // 10, minlength=10),
+        "first_two": np.bincount(first_two[large], minlength=100),
+        "second": np.bincount(first_two[large] % 10, minlength=10),
+        "last_two": np.bincount(last_two, minlength=100),
+    }
+
+def calculate_mad(actual_counts: Dict[str, int], total_count: int, expected: Dict[str, float] = BENFORD_PROBS) -> float:
     """Calculates Mean Absolute Deviation (MAD)."""
     if total_count == 0:
         return 0.0
     
     sum_abs_diff = 0.0
-    for digit, prob in BENFORD_PROBS.items():
+    for digit, prob in expected.items():
         actual_prob = actual_counts.get(digit, 0) / total_count
         sum_abs_diff += abs(actual_prob - prob)
     
-    return sum_abs_diff / 9.0
+    return sum_abs_diff / len(expected)
 
 def get_risk_label(mad: float) -> str:
     """Returns risk label based on MAD thresholds."""
@@ -31,35 +91,106 @@ def get_risk_label(mad: float) -> str:
     else:
         return "Non-conforming"
 
+# Critical values at the 5% level
+CHI_SQUARE_CRITICAL = {"first": 15.507, "first_two": 112.022}  # df = 8 and 89
+Z_CRITICAL = 1.96
+KS_COEFFICIENT = 1.36  # KS critical distance = 1.36 / sqrt(N)
+MIN_SAMPLE = 10
+
+
+def counts_matrix(histograms: Dict[str, Dict[str, int]], digits) -> Tuple[List[str], np.ndarray]:
+    """Stacks per-column digit counts into one (columns x digits) matrix."""
+    columns = list(histograms.keys())
+    matrix = np.array([[histograms[col].get(d, 0) for d in digits] for col in columns], dtype=np.float64)
+    return columns, matrix.reshape(len(columns), len(digits))
+
+
+def benford_battery(matrix: np.ndarray, expected: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Nigrini's conformity tests for every row (column) of `matrix` at once:
+    MAD, chi-square, per-digit Z-statistics (with continuity correction) and the
+    Kolmogorov-Smirnov distance between cumulative distributions.
+    """
+    totals = matrix.sum(axis=1)
+    safe = np.where(totals > 0, totals, 1.0)[:, None]
+    actual = matrix / safe
+    diff = np.abs(actual - expected)
+
+    correction = 1.0 / (2.0 * safe)
+    numerator = np.where(correction < diff, diff - correction, diff)
+    z_scores = numerator / np.sqrt(expected * (1.0 - expected) / safe)
+
+    return {
+        "n": totals,
+        "mad": diff.mean(axis=1),
+        "chi_square": (safe * (actual - expected) ** 2 / expected).sum(axis=1),
+        "z_scores": z_scores,
+        "ks": np.abs(np.cumsum(actual, axis=1) - np.cumsum(expected)).max(axis=1),
+        "ks_critical": KS_COEFFICIENT / np.sqrt(safe[:, 0]),
+    }
+
+
+def _battery_report(columns: List[str], digits: List[str], results: Dict[str, np.ndarray], test_name: str) -> Dict[str, Dict[str, Any]]:
+    """Per-column JSON view of a battery; columns below MIN_SAMPLE are skipped."""
+    report = {}
+    for i, col in enumerate(columns):
+        if results["n"][i] < MIN_SAMPLE:
+            continue
+        z = results["z_scores"][i]
+        report[col] = {
+            "n": int(results["n"][i]),
+            "mad": round(float(results["mad"][i]), 5),
+            "chi_square": round(float(results["chi_square"][i]), 3),
+            "chi_square_critical": CHI_SQUARE_CRITICAL[test_name],
+            "ks": round(float(results["ks"][i]), 5),
+            "ks_critical": round(float(results["ks_critical"][i]), 5),
+            "z_scores": {d: round(float(v), 3) for d, v in zip(digits, z)},
+            "significant_digits": [d for d, v in zip(digits, z) if v > Z_CRITICAL],
+        }
+    return report
+
+
 def run_benford_analysis(metadata: MetadataSummary) -> MetadataSummary:
     """
-    Runs Benford's analysis on the leading digit counts in metadata.
-    Updates the benford_analysis field in metadata in-place (or returns updated object).
+    Runs Benford's analysis on the digit histograms in metadata.
+    All columns are tested together: each digit test is one matrix operation,
+    so the cost stays flat for files with hundreds of numeric columns.
     """
     if not metadata.benford_analysis or not metadata.benford_analysis.leading_digits:
         return metadata
 
     analysis = metadata.benford_analysis
-    overall_passed = True
-    
-    for col, counts in analysis.leading_digits.items():
-        total_count = sum(counts.values())
-        
-        # Skip analysis if sample size is too small (e.g., < 50)
-        # But we still calculate stats if possible.
-        if total_count < 10: 
+
+    # First digit: MAD drives the risk label; the full battery is reported alongside
+    first_digits = list(BENFORD_PROBS.keys())
+    columns, matrix = counts_matrix(analysis.leading_digits, first_digits)
+    first = benford_battery(matrix, np.array(list(BENFORD_PROBS.values())))
+    for i, col in enumerate(columns):
+        if first["n"][i] < MIN_SAMPLE:
             analysis.mad_scores[col] = 0.0
             analysis.risk_labels[col] = "Insufficient Data"
             continue
+        analysis.mad_scores[col] = round(float(first["mad"][i]), 5)
+        analysis.risk_labels[col] = get_risk_label(float(first["mad"][i]))
+    analysis.first_digit_tests = _battery_report(columns, first_digits, first, "first")
 
-        mad = calculate_mad(counts, total_count)
-        risk = get_risk_label(mad)
-        
-        analysis.mad_scores[col] = round(mad, 5)
-        analysis.risk_labels[col] = risk
-        
-        if risk == "Non-conforming":
-            overall_passed = False
-    
-    analysis.passed = overall_passed
+    # Extended digit tests reuse the histograms collected during ingestion
+    extended_tests = [
+        ("first_two", analysis.first_two_digits, FIRST_TWO_PROBS),
+        ("second", analysis.second_digits, SECOND_DIGIT_PROBS),
+        ("last_two", analysis.last_two_digits, LAST_TWO_PROBS),
+    ]
+    for test_name, histograms, expected in extended_tests:
+        if not histograms:
+            continue
+        digits = list(expected.keys())
+        columns, matrix = counts_matrix(histograms, digits)
+        results = benford_battery(matrix, np.array(list(expected.values())))
+        for i, col in enumerate(columns):
+            if results["n"][i] >= MIN_SAMPLE:
+                analysis.extended_mad_scores.setdefault(col, {})[test_name] = round(float(results["mad"][i]), 5)
+        if test_name == "first_two":
+            analysis.first_two_digit_tests = _battery_report(columns, digits, results, test_name)
+
+    analysis.passed = "Non-conforming" not in analysis.risk_labels.values()
     return metadata
@@ -0,0 +1,257 @@
+"""
+Resumable Chunked Uploads
+Upload sessions receive numbered parts, hash each one and fold the complete CSV
+records it contains into the dataset accumulators right away, so profiling
+overlaps the network transfer. Session state (accumulators plus the trailing
+partial record) is checkpointed to disk after every acknowledged part, so a
+client can resume after a dropped connection or a server restart. Duplicate
+fingerprints grow with the row count, so they are not pickled: new hashes are
+appended to a journal next to the checkpoint and spilled runs are kept there.
+"""
+
+import hashlib
+import os
+import pickle
+import shutil
+import threading
+import time
+import uuid
+import zlib
+import numpy as np
+import pandas as pd
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+from app.models.schemas import MetadataSummary
+from app.core.accumulators import DatasetAccumulator
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL", str(24 * 3600)))
+MAX_PART_BYTES = int(os.getenv("UPLOAD_MAX_PART_BYTES", str(64 * 1024 * 1024)))
+
+
+class UploadError(Exception):
+    """Raised for out-of-order, corrupt or unknown parts."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def record_boundaries(buffer: bytes) -> np.ndarray:
+    """
+    Offsets just past every newline that ends a CSV record. A newline is a
+    record boundary when the number of quote characters before it is even
+    (escaped quotes "" keep the parity), so quoted line breaks are skipped.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    newlines = np.flatnonzero(data == ord("\n"))
+    if newlines.size == 0:
+        return newlines
+    quotes_before = np.cumsum(data == ord('"'))[newlines]
+    return newlines[quotes_before % 2 == 0] + 1
+
+
+def split_complete_records(buffer: bytes) -> Tuple[bytes, bytes]:
+    """Splits `buffer` after its last complete record. Returns (complete, rest)."""
+    boundaries = record_boundaries(buffer)
+    if boundaries.size == 0:
+        return b"", buffer
+    cut = int(boundaries[-1])
+    return buffer[:cut], buffer[cut:]
+
+
+class UploadSession:
+    """State of one resumable upload. Holds aggregates, never the file."""
+
+    def __init__(self, filename: str):
+        self.upload_id = str(uuid.uuid4())
+        self.filename = filename or "upload.csv"
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.next_part = 1
+        self.part_hashes: Dict[int, str] = {}
+        self.bytes_received = 0
+        self.gzip = self.filename.lower().endswith(".gz")
+        self._decompressor = zlib.decompressobj(wbits=47) if self.gzip else None
+        self.header: Optional[bytes] = None
+        self.carry = b""
+        self.accumulator = DatasetAccumulator()
+        # Serializes parts, completion and checkpoints: a client may retry a part
+        # (proxy timeout) while the original request is still being profiled
+        self.lock = threading.RLock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # zlib streams cannot be pickled; gzip sessions resume only within the process
+        state["_decompressor"] = None
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
+    @property
+    def content_hash(self) -> str:
+        """Digest over the ordered part digests (stable across resumes)."""
+        digest = hashlib.sha256()
+        for number in sorted(self.part_hashes):
+            digest.update(bytes.fromhex(self.part_hashes[number]))
+        return f"{digest.hexdigest()}-{len(self.part_hashes)}"
+
+    def status(self) -> Dict:
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "next_part": self.next_part,
+            "parts_received": len(self.part_hashes),
+            "bytes_received": self.bytes_received,
+            "rows_profiled": self.accumulator.row_count,
+        }
+
+    def _feed(self, data: bytes):
+        """Profiles every complete record in carry + data; keeps the remainder."""
+        buffer = self.carry + data
+        if self.header is None:
+            boundaries = record_boundaries(buffer)
+            if boundaries.size == 0:
+                self.carry = buffer
+                return
+            cut = int(boundaries[0])
+            self.header, buffer = buffer[:cut], buffer[cut:]
+
+        complete, self.carry = split_complete_records(buffer)
+        if complete:
+            self._profile(complete)
+
+    def _profile(self, records: bytes):
+        chunk = pd.read_csv(BytesIO(self.header + records))
+        self.accumulator.update(chunk)
+        # Raw rows never outlive their part
+        del chunk
+
+    def add_part(self, number: int, data: bytes, expected_sha256: Optional[str] = None) -> Dict:
+        digest = hashlib.sha256(data).hexdigest()
+        if expected_sha256 and expected_sha256.lower() != digest:
+            raise UploadError(f"Part {number} checksum mismatch", 400)
+        with self.lock:
+            return self._add_part(number, data, digest)
+
+    def _add_part(self, number: int, data: bytes, digest: str) -> Dict:
+        if number < self.next_part:
+            # Retransmission of an acknowledged part (e.g. the ack was lost)
+            if self.part_hashes.get(number) != digest:
+                raise UploadError(f"Part {number} was already received with different content", 409)
+            return {**self.status(), "part_number": number, "sha256": digest, "duplicate": True}
+        if number != self.next_part:
+            raise UploadError(f"Expected part {self.next_part}, got {number}", 409)
+        if len(data) > MAX_PART_BYTES:
+            raise UploadError(f"Part exceeds {MAX_PART_BYTES} bytes", 413)
+
+        raw_size = len(data)
+        if self.gzip:
+            if self._decompressor is None:
+                raise UploadError("Compressed upload cannot resume after a server restart; start a new upload", 409)
+            data = self._decompressor.decompress(data)
+        try:
+            self._feed(data)
+        except (pd.errors.ParserError, UnicodeDecodeError) as e:
+            raise UploadError(f"Part {number} could not be parsed as CSV: {e}", 422)
+
+        self.part_hashes[number] = digest
+        self.bytes_received += raw_size
+        self.next_part = number + 1
+        self.updated_at = time.time()
+        return {**self.status(), "part_number": number, "sha256": digest, "duplicate": False}
+
+    def complete(self) -> MetadataSummary:
+        with self.lock:
+            return self._complete()
+
+    def _complete(self) -> MetadataSummary:
+        if self.gzip and self._decompressor is not None:
+            self._feed(self._decompressor.flush())
+        if self.header is None:
+            raise UploadError("Upload contains no CSV header", 400)
+        if self.carry.strip():
+            # Last record without a trailing newline
+            self._profile(self.carry)
+            self.carry = b""
+        return self.accumulator.to_summary()
+
+
+class UploadSessionStore:
+    """In-memory sessions with an on-disk checkpoint per acknowledged part."""
+
+    def __init__(self, directory: str = UPLOAD_DIR):
+        self.directory = directory
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f"{upload_id}.session")
+
+    def _fingerprint_dir(self, upload_id: str) -> str:
+        return os.path.join(self.directory, f"{upload_id}.fingerprints")
+
+    def create(self, filename: str) -> UploadSession:
+        self.expire()
+        session = UploadSession(filename)
+        with self._lock:
+            self._sessions[session.upload_id] = session
+        self.checkpoint(session)
+        return session
+
+    def get(self, upload_id: str) -> UploadSession:
+        with self._lock:
+            session = self._sessions.get(upload_id)
+        if session is None:
+            # Resume after restart from the last checkpoint
+            try:
+                uuid.UUID(upload_id)
+            except ValueError:
+                raise UploadError("Unknown upload", 404)
+            path = self._path(upload_id)
+            if not os.path.exists(path):
+                raise UploadError("Unknown upload", 404)
+            with open(path, "rb") as f:
+                session = pickle.load(f)
+            with self._lock:
+                # Concurrent resumes must share one session (and its lock)
+                session = self._sessions.setdefault(upload_id, session)
+        return session
+
+    def checkpoint(self, session: UploadSession):
+        with session.lock:
+            fingerprints = session.accumulator.fingerprints
+            if fingerprints is not None:
+                fingerprints.sync(self._fingerprint_dir(session.upload_id))
+            tmp = self._path(session.upload_id) + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(session, f)
+            os.replace(tmp, self._path(session.upload_id))
+
+    def discard(self, upload_id: str):
+        with self._lock:
+            self._sessions.pop(upload_id, None)
+        if os.path.exists(self._path(upload_id)):
+            os.remove(self._path(upload_id))
+        shutil.rmtree(self._fingerprint_dir(upload_id), ignore_errors=True)
+
+    def expire(self):
+        """Drops sessions idle for longer than SESSION_TTL_SECONDS."""
+        cutoff = time.time() - SESSION_TTL_SECONDS
+        with self._lock:
+            stale = [uid for uid, s in self._sessions.items() if s.updated_at < cutoff]
+        for uid in stale:
+            self.discard(uid)
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".session") and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                shutil.rmtree(self._fingerprint_dir(name[:-len(".session")]), ignore_errors=True)
+
+
+# Global Instance
+upload_sessions = UploadSessionStore()
@@ -0,0 +1,210 @@
+"""
+Columnar Ingestion (Parquet / Feather / Arrow IPC)
+Memory-maps the file and answers min / max / null counts from Parquet row-group
+statistics where they exist. Column data is only decoded for the scans that
+need values: leading digits (numeric) and placeholders (text).
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, Optional
+from app.models.schemas import MetadataSummary
+from app.core.accumulators import ColumnAccumulator, DatasetAccumulator
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Upload extension -> columnar format
+COLUMNAR_EXTENSIONS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "arrow",
+    ".arrow": "arrow",
+    ".ipc": "arrow",
+    ".arrows": "arrow_stream",
+}
+
+
+# dtype pandas reports for text columns (object, or str on pandas >= 3)
+TEXT_DTYPE = str(pd.Series(["x"]).dtype)
+
+
+def detect_columnar_format(filename: Optional[str]) -> Optional[str]:
+    """Returns the columnar format for a filename, or None for other uploads."""
+    if not filename:
+        return None
+    lower = filename.lower()
+    for ext, fmt in COLUMNAR_EXTENSIONS.items():
+        if lower.endswith(ext):
+            return fmt
+    return None
+
+
+def _pandas_dtype(arrow_type, has_nulls: bool) -> str:
+    """dtype string pandas would report for this column after a full read."""
+    if pa.types.is_integer(arrow_type) and has_nulls:
+        return "float64"  # NaN forces ints to float, as in read_csv
+    if pa.types.is_decimal(arrow_type):
+        return "float64"
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type) or pa.types.is_dictionary(arrow_type):
+        return TEXT_DTYPE
+    try:
+        return str(np.dtype(arrow_type.to_pandas_dtype()))
+    except (NotImplementedError, TypeError):
+        return "object"
+
+
+def _is_text(arrow_type) -> bool:
+    if pa.types.is_dictionary(arrow_type):
+        return _is_text(arrow_type.value_type)
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+def _is_number(arrow_type) -> bool:
+    return pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type)
+
+
+def _is_date(arrow_type) -> bool:
+    return pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type)
+
+
+def _scan_array(acc: ColumnAccumulator, array, arrow_type, extremes: bool):
+    """Decodes one array only as far as the digit / placeholder / date scans need."""
+    if _is_number(arrow_type):
+        values = array.drop_null()
+        if pa.types.is_decimal(arrow_type):
+            values = values.cast(pa.float64())
+        acc.scan_numeric(values.to_numpy(zero_copy_only=False), extremes=extremes)
+    elif pa.types.is_boolean(arrow_type):
+        acc.scan_numeric(array.drop_null().to_numpy(zero_copy_only=False), is_bool=True, extremes=extremes)
+    elif _is_text(arrow_type):
+        series = array.to_pandas()
+        acc.scan_text(series)
+        if acc.is_date_candidate:
+            acc.scan_dates(series)
+    elif _is_date(arrow_type):
+        acc.scan_datetimes(pd.to_datetime(array.drop_null().to_pandas()), extremes=extremes)
+
+
+def _row_group_stats(metadata, rg: int, leaf: Optional[int]):
+    """(null_count, min, max) from a Parquet row group, or None when missing."""
+    if leaf is None:
+        return None
+    stats = metadata.row_group(rg).column(leaf).statistics
+    if stats is None or not stats.has_null_count:
+        return None
+    if stats.has_min_max:
+        return stats.null_count, stats.min, stats.max
+    return stats.null_count, None, None
+
+
+def ingest_parquet(path: str) -> MetadataSummary:
+    """Profiles a Parquet file row group by row group, one column at a time."""
+    pf = pq.ParquetFile(path, memory_map=True)
+    metadata = pf.metadata
+    schema = pf.schema_arrow
+
+    # Top-level column name -> Parquet leaf index (nested columns have no flat stats)
+    leaves: Dict[str, int] = {}
+    for j in range(metadata.num_columns):
+        path_in_schema = metadata.schema.column(j).path
+        if "." not in path_in_schema:
+            leaves[path_in_schema] = j
+
+    accumulator = DatasetAccumulator()
+    accumulator.row_count = metadata.num_rows
+    null_totals: Dict[str, int] = {}
+    for field in schema:
+        leaf = leaves.get(field.name)
+        nulls = 0
+        for rg in range(metadata.num_row_groups):
+            stats = _row_group_stats(metadata, rg, leaf)
+            if stats is None:
+                nulls = None
+                break
+            nulls += stats[0]
+        null_totals[field.name] = nulls
+
+    for field in schema:
+        acc = ColumnAccumulator(field.name)
+        accumulator.columns[field.name] = acc
+        leaf = leaves.get(field.name)
+        arrow_type = field.type
+        nulls = null_totals[field.name]
+        # Digits, placeholders and posting calendars need values; everything else is answered by statistics
+        needs_decode = _is_number(arrow_type) or _is_text(arrow_type) or pa.types.is_boolean(arrow_type) or _is_date(arrow_type)
+
+        for rg in range(metadata.num_row_groups):
+            rows = metadata.row_group(rg).num_rows
+            stats = _row_group_stats(metadata, rg, leaf)
+            array = None
+            has_extremes = stats is not None and stats[1] is not None
+
+            if stats is None or needs_decode:
+                array = pf.read_row_group(rg, columns=[field.name]).column(0)
+
+            rg_nulls = stats[0] if stats is not None else array.null_count
+            dtype = _pandas_dtype(arrow_type, bool(nulls) if nulls is not None else rg_nulls > 0)
+            acc.add_counts(rows, rg_nulls, dtype)
+
+            if has_extremes:
+                if _is_date(arrow_type):
+                    acc.add_date_range(pd.Timestamp(stats[1]), pd.Timestamp(stats[2]))
+                elif _is_number(arrow_type) or pa.types.is_boolean(arrow_type):
+                    acc.add_extremes(float(stats[1]), float(stats[2]))
+
+            if array is not None:
+                _scan_array(acc, array, arrow_type, extremes=not has_extremes)
+            # Decoded values never outlive their row group
+            del array
+
+    # Row-level scans decode only the columns they read, one row group at a time
+    row_columns = accumulator.init_row_scans(schema.names)
+    if row_columns:
+        for rg in range(metadata.num_row_groups):
+            accumulator.update_rows(pf.read_row_group(rg, columns=row_columns).to_pandas())
+
+    return accumulator.to_summary()
+
+
+def _iter_ipc_batches(path: str, fmt: str) -> Iterator:
+    source = pa.memory_map(path, "r")
+    if fmt == "arrow_stream":
+        reader = pa.ipc.open_stream(source)
+        for batch in reader:
+            yield batch
+    else:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def ingest_arrow(path: str, fmt: str = "arrow") -> MetadataSummary:
+    """
+    Profiles a Feather v2 / Arrow IPC file batch by batch.
+    Null counts come from the array headers; memory-mapped buffers are only
+    materialized for the digit / placeholder scans.
+    """
+    accumulator = DatasetAccumulator()
+    for batch in _iter_ipc_batches(path, fmt):
+        accumulator.row_count += batch.num_rows
+        for field, array in zip(batch.schema, batch.columns):
+            acc = accumulator.columns.setdefault(field.name, ColumnAccumulator(field.name))
+            acc.add_counts(len(array), array.null_count, _pandas_dtype(field.type, array.null_count > 0))
+            _scan_array(acc, array, field.type, extremes=True)
+        row_columns = accumulator.init_row_scans(batch.schema.names)
+        if row_columns:
+            accumulator.update_rows(batch.select(row_columns).to_pandas())
+    return accumulator.to_summary()
+
+
+def ingest_columnar(path: str, fmt: str) -> MetadataSummary:
+    """Dispatches a memory-mappable columnar file to its reader."""
+    if pa is None:
+        raise RuntimeError("Columnar ingestion requires pyarrow")
+    if fmt == "parquet":
+        return ingest_parquet(path)
+    return ingest_arrow(path, fmt)
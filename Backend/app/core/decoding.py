@@ -0,0 +1,185 @@
+"""
+Upload Decoding
+Detects compression / container formats and streams the decoded content into
+the ingestion pipeline without materializing the decompressed file:
+  - .gz / .bz2 / .xz / .zst(d) single-file compression
+  - .zip archives (one summary per CSV / columnar member)
+  - .xlsx workbooks (one summary per sheet, rows streamed in read-only mode)
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import zipfile
+import pandas as pd
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+from app.models.schemas import MetadataSummary
+from app.core.accumulators import DatasetAccumulator
+from app.core.columnar import detect_columnar_format, ingest_columnar
+from app.core.ingestion import CHUNK_SIZE, ingest_csv_stream, spooled_path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# Magic bytes -> single-stream compression
+MAGIC_NUMBERS = [
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+]
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd", ".bz2": "bz2", ".xz": "xz"}
+
+
+def _peek(source: BinaryIO, size: int = 8) -> bytes:
+    head = source.read(size)
+    source.seek(0)
+    return head
+
+
+def detect_compression(source: BinaryIO, filename: str) -> Optional[str]:
+    """Compression codec from magic bytes, falling back to the extension."""
+    head = _peek(source)
+    for magic, codec in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return codec
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(filename.lower())[1])
+
+
+def strip_compression_suffix(filename: str) -> str:
+    base, ext = os.path.splitext(filename)
+    return base if ext.lower() in COMPRESSION_EXTENSIONS else filename
+
+
+def open_decompressed(source: BinaryIO, codec: str) -> BinaryIO:
+    """Wraps `source` in a streaming decompressor."""
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=source, mode="rb")
+    if codec == "bz2":
+        return bz2.BZ2File(source, mode="rb")
+    if codec == "xz":
+        return lzma.LZMAFile(source, mode="rb")
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("Zstandard uploads require the 'zstandard' package")
+        return zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True)
+    raise ValueError(f"Unsupported compression: {codec}")
+
+
+def is_xlsx(source: BinaryIO, filename: str) -> bool:
+    """A zip container named like a workbook, or holding one. The extension alone is not enough."""
+    if not zipfile.is_zipfile(source):
+        source.seek(0)
+        return False
+    source.seek(0)
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return True
+    with zipfile.ZipFile(source) as archive:
+        names = archive.namelist()
+    source.seek(0)
+    return "xl/workbook.xml" in names
+
+
+def _iter_sheet_chunks(worksheet, chunksize: int) -> Iterator[pd.DataFrame]:
+    """Streams a read-only worksheet as DataFrame chunks (header = first row)."""
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+
+    batch: List[Tuple] = []
+    for row in rows:
+        if all(v is None for v in row):
+            continue  # Trailing formatted-but-empty rows
+        batch.append(row[:len(columns)])
+        if len(batch) >= chunksize:
+            yield pd.DataFrame.from_records(batch, columns=columns).infer_objects()
+            batch = []
+    if batch:
+        yield pd.DataFrame.from_records(batch, columns=columns).infer_objects()
+
+
+def ingest_xlsx(source: BinaryIO, chunksize: int = CHUNK_SIZE) -> Dict[str, MetadataSummary]:
+    """Profiles each worksheet separately, streaming rows in bounded chunks."""
+    if openpyxl is None:
+        raise ValueError("XLSX uploads require the 'openpyxl' package")
+
+    try:
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, openpyxl.utils.exceptions.InvalidFileException) as e:
+        # Damaged or not a workbook at all (e.g. a renamed zip): a client error
+        raise ValueError(f"Invalid XLSX workbook: {e}")
+    summaries = {}
+    try:
+        for worksheet in workbook.worksheets:
+            accumulator = DatasetAccumulator()
+            for chunk in _iter_sheet_chunks(worksheet, chunksize):
+                accumulator.update(chunk)
+                del chunk
+            if accumulator.columns:
+                summaries[worksheet.title] = accumulator.to_summary()
+    finally:
+        workbook.close()
+    return summaries
+
+
+def is_data_member(member: zipfile.ZipInfo) -> bool:
+    """Archive members worth auditing: no directories, macOS metadata or dotfiles."""
+    return not (member.is_dir() or member.filename.startswith("__MACOSX/") or os.path.basename(member.filename).startswith("."))
+
+
+def _ingest_plain(stream: BinaryIO, name: str, workers: int) -> MetadataSummary:
+    """CSV or columnar content that is already decoded."""
+    columnar_format = detect_columnar_format(name)
+    if columnar_format:
+        # Columnar readers need a real file to memory-map
+        with spooled_path(stream, suffix=os.path.splitext(name)[1]) as path:
+            return ingest_columnar(path, columnar_format)
+    return ingest_csv_stream(stream, workers=workers)
+
+
+def ingest_upload(source: BinaryIO, filename: Optional[str], workers: int = 1) -> Dict[str, MetadataSummary]:
+    """
+    Single entry point for uploads. Returns one MetadataSummary per logical table:
+    the file itself, each member of a zip archive, or each sheet of a workbook.
+    Keys are "<filename>" or "<filename>:<member or sheet>".
+    """
+    filename = filename or "upload.csv"
+
+    if is_xlsx(source, filename):
+        return {f"{filename}:{sheet}": summary for sheet, summary in ingest_xlsx(source).items()}
+
+    if zipfile.is_zipfile(source):
+        source.seek(0)
+        summaries = {}
+        with zipfile.ZipFile(source) as archive:
+            for member in archive.infolist():
+                if not is_data_member(member):
+                    continue
+                # ZipFile.open decompresses the member as a stream
+                with archive.open(member) as stream:
+                    summaries[f"{filename}:{member.filename}"] = _ingest_plain(stream, member.filename, workers)
+        return summaries
+    source.seek(0)
+
+    codec = detect_compression(source, filename)
+    if codec:
+        with open_decompressed(source, codec) as stream:
+            return {filename: _ingest_plain(stream, strip_compression_suffix(filename), workers)}
+
+    return {filename: _ingest_plain(source, filename, workers)}
+
+
+def ingest_archive_member(path: str, member: str, workers: int = 1) -> MetadataSummary:
+    """One member of a zip archive on disk, streamed like the members in ingest_upload."""
+    with zipfile.ZipFile(path) as archive, archive.open(member) as stream:
+        return _ingest_plain(stream, member, workers)
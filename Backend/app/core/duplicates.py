@@ -0,0 +1,392 @@
+"""
+Duplicate Transaction Fingerprinting
+Hashes the key columns of every row (amount, date, vendor, invoice number) into
+64-bit fingerprints during ingestion. Only the fingerprints are buffered; when
+the buffer grows past FINGERPRINT_MEMORY_ROWS it is sorted and spilled to disk
+as a run. Collisions are counted with a block-wise merge of the sorted runs, so
+memory stays bounded at any row count. Runs persisted with an audit are the
+base of incremental audits: appended rows are binary-searched in them, so only
+the new rows are sorted. Only counts leave this module.
+"""
+
+import os
+import shutil
+import tempfile
+import weakref
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Hashes buffered in memory (per fingerprint kind) before a sorted run is spilled
+FINGERPRINT_MEMORY_ROWS = int(os.getenv("FINGERPRINT_MEMORY_ROWS", str(4_000_000)))
+MERGE_BLOCK_ROWS = 1 << 20
+# Persisted runs per fingerprint kind before they are compacted into one
+FINGERPRINT_MAX_RUNS = int(os.getenv("FINGERPRINT_MAX_RUNS", "8"))
+
+# Optional explicit key columns: "amount=Amt,date=PostDate,vendor=Payee,invoice=InvNo"
+DUPLICATE_KEY_COLUMNS = os.getenv("DUPLICATE_KEY_COLUMNS", "")
+
+# Near duplicates ignore the invoice number, so they need one of these besides the amount
+NEAR_DUPLICATE_ROLES = {"date", "vendor"}
+
+# Column-name hints per key role, in priority order
+ROLE_HINTS = {
+    "amount": ["amount", "amt", "total", "value", "payment"],
+    "date": ["invoice_date", "posting_date", "date", "posted", "time"],
+    "vendor": ["vendor", "supplier", "payee", "receiver", "beneficiary", "merchant", "creditor"],
+    "invoice": ["invoice", "inv_no", "inv_num", "bill_no", "document", "reference"],
+}
+
+
+def detect_key_columns(columns: List[str]) -> Dict[str, str]:
+    """Maps key roles to column names, from DUPLICATE_KEY_COLUMNS or name hints."""
+    if DUPLICATE_KEY_COLUMNS:
+        configured = dict(item.split("=", 1) for item in DUPLICATE_KEY_COLUMNS.split(",") if "=" in item)
+        return {role: col for role, col in configured.items() if col in columns}
+
+    keys: Dict[str, str] = {}
+    used = set()
+    for role, hints in ROLE_HINTS.items():
+        for hint in hints:
+            match = next((c for c in columns if hint in c.lower() and c not in used), None)
+            if match:
+                keys[role] = match
+                used.add(match)
+                break
+    return keys
+
+
+def _normalized_keys(df: pd.DataFrame, keys: Dict[str, str], amount_decimals: int) -> pd.DataFrame:
+    """Canonical key values so formatting differences do not hide duplicates."""
+    out = {"amount": pd.to_numeric(df[keys["amount"]], errors="coerce").round(amount_decimals)}
+    if "date" in keys:
+        out["date"] = pd.to_datetime(df[keys["date"]], errors="coerce").dt.normalize()
+    if "vendor" in keys:
+        out["vendor"] = df[keys["vendor"]].astype(str).str.lower().str.replace(r"[^a-z0-9]", "", regex=True)
+    return pd.DataFrame(out)
+
+
+def _link_or_copy(source: str, target: str):
+    """Hard-links a run into another directory (runs are immutable); copies across filesystems."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def _merged_blocks(paths: List[str]) -> Iterator[np.ndarray]:
+    """Sorted blocks of a k-way merge over sorted runs on disk (memory-mapped)."""
+    runs = [np.load(path, mmap_mode="r") for path in paths]
+    positions = [0] * len(runs)
+    while True:
+        live = [i for i, run in enumerate(runs) if positions[i] < len(run)]
+        if not live:
+            return
+        # Everything up to the smallest block end is final: no run can still hold a smaller value
+        bound = min(runs[i][min(positions[i] + MERGE_BLOCK_ROWS, len(runs[i])) - 1] for i in live)
+        parts = []
+        for i in live:
+            end = int(np.searchsorted(runs[i], bound, side="right"))
+            parts.append(np.asarray(runs[i][positions[i]:end]))
+            positions[i] = end
+        yield np.sort(np.concatenate(parts))
+
+
+class FingerprintRuns:
+    """
+    Buffered uint64 fingerprints with sorted runs spilled to disk.
+    After persist() the runs become the base of an incremental audit: rows
+    added later are looked up in them instead of merging everything again.
+    """
+
+    def __init__(self):
+        self.buffer: List[np.ndarray] = []
+        self.buffered = 0
+        self.runs: List[str] = []
+        self.total = 0
+        self.base_runs: List[str] = []
+        self.base_total = 0
+        self.base_stats: Optional[Dict[str, int]] = None
+        self._stats: Optional[Tuple[int, Dict[str, int]]] = None
+        self._spill_dir: Optional[str] = None
+        self._finalizer: Optional[weakref.finalize] = None
+        self._sources: List["FingerprintRuns"] = []
+        # Journal of the buffer for resumable uploads (see sync())
+        self._journal: Optional[str] = None
+        self._journaled = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_finalizer"] = None
+        state["_sources"] = []
+        if self._journal:
+            # The buffer is restored from the journal, not pickled with the checkpoint
+            state["buffer"] = []
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._journal and self.buffered:
+            # Only the synced prefix: hashes of a part that was never acknowledged are ignored
+            self.buffer = [np.fromfile(self._journal, dtype=np.uint64, count=self.buffered)]
+            self._journaled = 1
+
+    def add(self, hashes: np.ndarray):
+        self.buffer.append(hashes)
+        self.buffered += hashes.size
+        self.total += hashes.size
+        if self.buffered >= FINGERPRINT_MEMORY_ROWS:
+            self.spill()
+
+    def spill(self):
+        if not self.buffered:
+            return
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="auditx_fingerprints_")
+            # Removed with this object or at exit; resumable uploads keep theirs via sync()
+            self._finalizer = weakref.finalize(self, shutil.rmtree, self._spill_dir, True)
+        run = np.sort(np.concatenate(self.buffer))
+        path = os.path.join(self._spill_dir, f"run_{len(self.runs)}.npy")
+        np.save(path, run)
+        self.runs.append(path)
+        self.buffer, self.buffered = [], 0
+        self._journaled = 0
+
+    def sync(self, directory: str):
+        """
+        Makes the fingerprints durable under `directory` (resumable uploads).
+        Runs spill there from now on, and hashes buffered since the last sync
+        are appended to a journal, so a checkpoint writes only what is new.
+        Call it before pickling; the pickle then leaves the buffer out.
+        """
+        if self._spill_dir != directory:
+            os.makedirs(directory, exist_ok=True)
+            moved = []
+            for path in self.runs:
+                target = os.path.join(directory, os.path.basename(path))
+                _link_or_copy(path, target)
+                moved.append(target)
+            if self._finalizer is not None:
+                self._finalizer()
+            self.runs, self._spill_dir, self._finalizer = moved, directory, None
+
+        # One journal per run generation; a spill starts a new one
+        journal = os.path.join(directory, f"buffer_{len(self.runs)}.u64")
+        if journal != self._journal:
+            self._journaled = 0
+        synced = sum(hashes.size for hashes in self.buffer[:self._journaled])
+        with open(journal, "r+b" if os.path.exists(journal) else "wb") as f:
+            f.truncate(synced * 8)
+            f.seek(0, os.SEEK_END)
+            for hashes in self.buffer[self._journaled:]:
+                hashes.astype(np.uint64, copy=False).tofile(f)
+        # Journals of older generations are covered by runs; the previous one
+        # stays until the checkpoint that references the new one is written
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".u64") and path not in (journal, self._journal):
+                os.remove(path)
+        self._journal, self._journaled = journal, len(self.buffer)
+
+    def merge(self, other: "FingerprintRuns") -> "FingerprintRuns":
+        self.runs.extend(other.base_runs + other.runs)
+        self.total += other.total - other.buffered
+        # Keeps the other spill directory alive as long as its runs are referenced here
+        self._sources.append(other)
+        for hashes in other.buffer:
+            self.add(hashes)
+        return self
+
+    def collision_stats(self) -> Dict[str, int]:
+        """Group sizes of equal fingerprints, via an in-memory sort, a run merge or base lookups."""
+        if self._stats is None or self._stats[0] != self.total:
+            if self.base_stats is not None and self.total - self.base_total <= FINGERPRINT_MEMORY_ROWS:
+                stats = self._delta_stats()
+            else:
+                stats = self._full_stats()
+            self._stats = (self.total, stats)
+        return dict(self._stats[1])
+
+    def _full_stats(self) -> Dict[str, int]:
+        stats = {"duplicate_groups": 0, "duplicate_rows": 0, "excess_rows": 0, "max_group_size": 1 if self.total else 0}
+
+        def record(lengths: np.ndarray):
+            dup = lengths[lengths > 1]
+            if dup.size:
+                stats["duplicate_groups"] += int(dup.size)
+                stats["duplicate_rows"] += int(dup.sum())
+                stats["excess_rows"] += int(dup.sum() - dup.size)
+                stats["max_group_size"] = max(stats["max_group_size"], int(dup.max()))
+
+        if not self.runs and not self.base_runs:
+            if self.buffered:
+                record(_group_lengths(np.sort(np.concatenate(self.buffer))))
+            return stats
+
+        self.spill()
+        carry_value, carry_len = None, 0
+        for batch in _merged_blocks(self.base_runs + self.runs):
+            lengths = _group_lengths(batch)
+            starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+            if carry_value is not None and batch[0] == carry_value:
+                lengths[0] += carry_len
+            elif carry_value is not None:
+                record(np.array([carry_len]))
+            record(lengths[:-1])
+            carry_value, carry_len = batch[starts[-1]], int(lengths[-1])
+
+        if carry_value is not None:
+            record(np.array([carry_len]))
+        return stats
+
+    def _delta_stats(self) -> Dict[str, int]:
+        """Base stats adjusted for the groups that rows added since persist() grow."""
+        stats = dict(self.base_stats)
+        parts = self.buffer + [np.load(path) for path in self.runs]
+        if not parts:
+            return stats
+        values, added = np.unique(np.concatenate(parts), return_counts=True)
+        before = np.zeros(values.size, dtype=np.int64)
+        for path in self.base_runs:
+            run = np.load(path, mmap_mode="r")
+            before += np.searchsorted(run, values, side="right") - np.searchsorted(run, values, side="left")
+        after = before + added
+        was, now = before > 1, after > 1
+        stats["duplicate_groups"] += int(now.sum() - was.sum())
+        stats["duplicate_rows"] += int(after[now].sum() - before[was].sum())
+        stats["excess_rows"] += int((after[now] - 1).sum() - (before[was] - 1).sum())
+        stats["max_group_size"] = max(stats["max_group_size"], int(after.max()))
+        return stats
+
+    def persist(self, directory: str, prefix: str):
+        """
+        Writes all fingerprints as sorted runs under `directory` and makes them
+        the base for rows added later. Base runs of an earlier audit are
+        hard-linked; past FINGERPRINT_MAX_RUNS they are compacted into one run.
+        """
+        stats = self.collision_stats()
+        os.makedirs(directory, exist_ok=True)
+        persisted = []
+        for path in self.base_runs + self.runs:
+            target = os.path.join(directory, f"{prefix}_{len(persisted)}.npy")
+            _link_or_copy(path, target)
+            persisted.append(target)
+        if self.buffered:
+            target = os.path.join(directory, f"{prefix}_{len(persisted)}.npy")
+            np.save(target, np.sort(np.concatenate(self.buffer)))
+            persisted.append(target)
+
+        if len(persisted) > FINGERPRINT_MAX_RUNS:
+            target = os.path.join(directory, f"{prefix}_compacted.npy")
+            out = np.lib.format.open_memmap(target, mode="w+", dtype=np.uint64, shape=(self.total,))
+            offset = 0
+            for batch in _merged_blocks(persisted):
+                out[offset:offset + batch.size] = batch
+                offset += batch.size
+            out.flush()
+            del out
+            for path in persisted:
+                os.remove(path)
+            persisted = [target]
+
+        self.cleanup()
+        self.buffer, self.buffered = [], 0
+        self.base_runs, self.base_total, self.base_stats = persisted, self.total, stats
+
+    def cleanup(self):
+        if self._finalizer is not None:
+            self._finalizer()
+        elif self._spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+        self._spill_dir, self._finalizer = None, None
+        self._journal, self._journaled = None, 0
+        self.runs = []
+        self._sources = []
+
+
+def _group_lengths(sorted_values: np.ndarray) -> np.ndarray:
+    """Run lengths of equal values in a sorted array."""
+    if sorted_values.size == 0:
+        return np.empty(0, dtype=np.int64)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(sorted_values)) + 1])
+    return np.diff(np.concatenate([starts, [sorted_values.size]]))
+
+
+class DuplicateFingerprinter:
+    """
+    Exact duplicates: same amount (to the cent), date, vendor and invoice number.
+    Near duplicates: same amount (to the unit), date and vendor, whatever the
+    invoice number says -- the classic re-keyed duplicate payment. They need a
+    date or vendor key; on the amount alone every repeated amount would match.
+    """
+
+    def __init__(self, keys: Dict[str, str]):
+        self.keys = keys
+        self.rows = 0
+        self.exact = FingerprintRuns()
+        self.near = FingerprintRuns() if NEAR_DUPLICATE_ROLES & keys.keys() else None
+
+    @classmethod
+    def for_columns(cls, columns: List[str]) -> Optional["DuplicateFingerprinter"]:
+        keys = detect_key_columns(columns)
+        # An amount plus at least one other key is needed for a meaningful match
+        if "amount" not in keys or len(keys) < 2:
+            return None
+        return cls(keys)
+
+    def update(self, df: pd.DataFrame):
+        if any(col not in df.columns for col in self.keys.values()):
+            return
+        exact_keys = _normalized_keys(df, self.keys, amount_decimals=2)
+        valid = exact_keys["amount"].notna().to_numpy()
+        if "invoice" in self.keys:
+            exact_keys["invoice"] = (
+                df[self.keys["invoice"]].astype(str).str.upper()
+                .str.replace(r"[^A-Z0-9]", "", regex=True).str.lstrip("0")
+            )
+
+        self.rows += int(valid.sum())
+        self.exact.add(pd.util.hash_pandas_object(exact_keys, index=False).to_numpy()[valid])
+        if self.near is not None:
+            near_keys = _normalized_keys(df, self.keys, amount_decimals=0)
+            self.near.add(pd.util.hash_pandas_object(near_keys, index=False).to_numpy()[valid])
+
+    def merge(self, other: "DuplicateFingerprinter") -> "DuplicateFingerprinter":
+        self.rows += other.rows
+        self.exact.merge(other.exact)
+        if self.near is not None:
+            self.near.merge(other.near)
+        return self
+
+    def persist(self, directory: str):
+        """Keeps the fingerprints under `directory` as the base of an incremental audit."""
+        self.exact.persist(directory, "exact")
+        if self.near is not None:
+            self.near.persist(directory, "near")
+
+    def sync(self, directory: str):
+        """Journals the fingerprints under `directory` before a checkpoint (see FingerprintRuns.sync)."""
+        self.exact.sync(os.path.join(directory, "exact"))
+        if self.near is not None:
+            self.near.sync(os.path.join(directory, "near"))
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts only; spilled runs are removed with the fingerprinter."""
+        exact = self.exact.collision_stats()
+        summary = {
+            "key_columns": self.keys,
+            "rows_fingerprinted": self.rows,
+            "exact_duplicate_groups": exact["duplicate_groups"],
+            "exact_duplicate_rows": exact["duplicate_rows"],
+            "exact_excess_rows": exact["excess_rows"],
+            "max_group_size": exact["max_group_size"],
+            "duplicate_rate": round(exact["excess_rows"] / self.rows * 100, 4) if self.rows else 0.0,
+        }
+        if self.near is None:
+            summary["near_duplicate_skipped"] = "no date or vendor column; amount alone does not identify a payment"
+            return summary
+        near = self.near.collision_stats()
+        summary["near_duplicate_groups"] = near["duplicate_groups"]
+        summary["near_duplicate_rows"] = near["duplicate_rows"]
+        summary["near_duplicate_rate"] = round(near["excess_rows"] / self.rows * 100, 4) if self.rows else 0.0
+        return summary
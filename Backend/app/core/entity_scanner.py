@@ -0,0 +1,116 @@
+"""
+Multi-Pattern Suspicious Entity Scanner
+Compiles the placeholder / known-fake name dictionary into a single Aho-Corasick
+automaton so each text column is scanned once, whatever the number of patterns.
+Uses pyahocorasick when installed and a pure-Python automaton otherwise.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+DEFAULT_PATTERNS_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "suspicious_entities.txt")
+PATTERNS_FILE = os.getenv("SUSPICIOUS_PATTERNS_FILE", DEFAULT_PATTERNS_FILE)
+
+# Used when the pattern file is missing
+FALLBACK_PATTERNS = ["john doe", "jane doe", "test", "sample", "example"]
+
+
+class EntityMatcher:
+    """Aho-Corasick automaton over lower-cased patterns."""
+
+    def __init__(self, patterns: Iterable[str]):
+        # De-duplicate while keeping file order (drives suspicious_entities order)
+        self.patterns: List[str] = list(dict.fromkeys(p.strip().lower() for p in patterns if p.strip()))
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for idx, pattern in enumerate(self.patterns):
+                self._automaton.add_word(pattern, idx)
+            if self.patterns:
+                self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            self._build()
+
+    def _build(self):
+        """Builds the trie, failure links and merged outputs (pure-Python path)."""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[int]] = [set()]
+
+        for idx, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                if ch not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                    self._goto[state][ch] = len(self._goto) - 1
+                state = self._goto[state][ch]
+            self._out[state].add(idx)
+
+        # Depth-1 states fail back to the root; deeper states follow their parent's links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                if state != 0:
+                    self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def match_ids(self, text: str) -> Set[int]:
+        """Indexes of every pattern occurring in `text` (already lower-cased)."""
+        if self._automaton is not None:
+            if not self.patterns:
+                return set()
+            return {idx for _, idx in self._automaton.iter(text)}
+
+        found: Set[int] = set()
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+    def count_rows(self, series: pd.Series) -> Dict[str, int]:
+        """
+        Number of rows containing each pattern, in one scan of the column.
+        Repeated values are matched once and weighted by their frequency.
+        """
+        if not self.patterns:
+            return {}
+        counts = np.zeros(len(self.patterns), dtype=np.int64)
+        uniques = series.astype(str).str.lower().value_counts()
+        for text, n in uniques.items():
+            for idx in self.match_ids(text):
+                counts[idx] += n
+        return {self.patterns[i]: int(counts[i]) for i in np.flatnonzero(counts)}
+
+
+def load_patterns(path: str = PATTERNS_FILE) -> List[str]:
+    """Reads one pattern per line, skipping blanks and '#' comments."""
+    if not os.path.exists(path):
+        print(f"⚠️  Suspicious entity list not found at {path}, using built-in placeholders")
+        return FALLBACK_PATTERNS
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+# Compiled once at startup and shared by every ingestion path
+entity_matcher = EntityMatcher(load_patterns())
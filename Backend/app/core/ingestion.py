@@ -1,128 +1,104 @@
+import os
+import shutil
+import tempfile
 import pandas as pd
-import numpy as np
+from contextlib import contextmanager
 from io import BytesIO
-from typing import Dict, Any, List
-from app.models.schemas import MetadataSummary, BenfordAnalysis
+from typing import BinaryIO, Iterator, List, Optional, Union
+from app.models.schemas import MetadataSummary
+from app.core.accumulators import DatasetAccumulator
+
+# Rows parsed per chunk in streaming mode. Peak memory scales with this, not file size.
+CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_ROWS", "100000"))
+# Smaller inputs are profiled in-process: a pool and shared memory only pay off past a chunk or so
+PARALLEL_MIN_BYTES = int(os.getenv("PARALLEL_MIN_BYTES", str(16 * 1024 * 1024)))
+
+def source_size(source: Union[str, BinaryIO]) -> Optional[int]:
+    """Byte size of a path or seekable stream (from its current position); None if unknown."""
+    if isinstance(source, str):
+        return os.path.getsize(source)
+    try:
+        if not source.seekable():
+            return None
+        position = source.tell()
+        end = source.seek(0, os.SEEK_END)
+        source.seek(position)
+        return end - position
+    except (AttributeError, OSError, ValueError):
+        return None
 
 def ingest_csv(file_content: bytes) -> MetadataSummary:
     """
     Ingests a CSV file bytes, extracts metadata, and DISCARDS raw data.
     """
     df = pd.read_csv(BytesIO(file_content))
-    
-    row_count = len(df)
-    columns = df.columns.tolist()
-    
-    column_stats = {}
-    date_ranges = {}
-    lead_digit_counts = {}
-    suspicious_entities = {}
-
-    for col in columns:
-        # Data Type
-        dtype = str(df[col].dtype)
-        null_count = df[col].isnull().sum()
-        null_percentage = (null_count / row_count) * 100 if row_count > 0 else 0
-        
-        stats = {
-            "type": dtype,
-            "null_percentage": round(null_percentage, 2)
-        }
-
-        # Suspicious Name Check
-        if pd.api.types.is_string_dtype(df[col]):
-            # Check for generic placeholders
-            placeholders = ["john doe", "jane doe", "test", "sample", "example"]
-            try:
-                lower_col = df[col].astype(str).str.lower()
-                for p in placeholders:
-                    count = lower_col.str.contains(p, regex=False).sum()
-                    if count > 0:
-                        if p in suspicious_entities:
-                            suspicious_entities[p] += int(count)
-                        else:
-                            suspicious_entities[p] = int(count)
-            except Exception:
-                pass
-
-        # PII Guardrail (Header Scan)
-        pii_keywords = ["ssn", "social security", "cvv", "credit card", "password", "pwd", "secret", "card number"]
-        if any(keyword in col.lower() for keyword in pii_keywords):
-            # Mark this column as PII-risk
-            if "pii_columns" not in suspicious_entities:
-                 suspicious_entities["pii_columns"] = []
-            suspicious_entities["pii_columns"].append(col)
-        
-        # Numeric Stats & Benford's Leading Digits
-        if pd.api.types.is_numeric_dtype(df[col]):
-            # Filter valid numbers for stats
-            valid_nums = df[col].dropna()
-            if not valid_nums.empty:
-                stats["min"] = float(valid_nums.min())
-                stats["max"] = float(valid_nums.max())
-                stats["mean"] = float(valid_nums.mean())
-                
-                # Extract leading digits for Benford (1-9)
-                # Convert absolute values to string, take first char, filter 1-9
-                # We do this on the series to avoid keeping raw data in memory longer than needed
-                # Ideally, we'd process chunk by chunk for huge files, but for hackathon, this is fine.
-                
-                # Vectorized approach to get leading digits
-                # 1. abs() to handle negatives
-                # 2. astype(str)
-                # 3. str[0]
-                
-                digits = valid_nums.abs().astype(str).str[0]
-                # Filter strictly 1-9
-                digits = digits[digits.isin(['1','2','3','4','5','6','7','8','9'])]
-                
-                counts = digits.value_counts().to_dict() # {'1': 100, '2': 50...}
-                # Convert keys to string just in case
-                lead_digit_counts[col] = {str(k): int(v) for k, v in counts.items()}
-            else:
-                stats["min"] = None
-                stats["max"] = None
-                stats["mean"] = None
-                lead_digit_counts[col] = {}
 
-        # Date Stats
-        # Try to convert to datetime to extract ranges if it looks like a date
-        # This is a heuristic.
-        elif 'date' in col.lower() or 'time' in col.lower():
-             try:
-                # Force coercion to catch mixed formats/errors as NaT
-                dt_series = pd.to_datetime(df[col], errors='coerce').dropna()
-                if not dt_series.empty:
-                     date_ranges[col] = {
-                         "min": dt_series.min().isoformat(),
-                         "max": dt_series.max().isoformat()
-                     }
-             except Exception:
-                 pass # Not a date column or parse failed
+    accumulator = DatasetAccumulator()
+    accumulator.update(df)
 
-        column_stats[col] = stats
-    
-    # Construct partial BenfordAnalysis (just counts for now)
-    # The actual MAD calculation happens in the Benford Engine
-    benford_data = BenfordAnalysis(
-        leading_digits=lead_digit_counts,
-        mad_scores={}, # To be filled by Benford Engine
-        risk_labels={}, # To be filled by Benford Engine
-        passed=False # Default
-    )
-
-    summary = MetadataSummary(
-        columns=columns,
-        row_count=row_count,
-        column_stats=column_stats,
-        date_ranges=date_ranges,
-        benford_analysis=benford_data,
-        suspicious_entities=suspicious_entities
-    )
-    
     # Explicitly discard raw dataframe to enforce privacy boundary
     del df
     import gc
     gc.collect()
-    
-    return summary
+
+    return accumulator.to_summary()
+
+def ingest_csv_stream(
+    source: Union[str, BinaryIO],
+    chunksize: int = CHUNK_SIZE,
+    workers: int = 1
+) -> MetadataSummary:
+    """
+    Streaming variant of ingest_csv for large files.
+    Reads the CSV in bounded chunks, folds each chunk into mergeable column
+    accumulators and drops it before the next one is parsed.
+    With workers > 1 the column profiling runs on a process pool, unless the
+    input is known to be smaller than PARALLEL_MIN_BYTES.
+    """
+    if workers > 1:
+        size = source_size(source)
+        if size is not None and size < PARALLEL_MIN_BYTES:
+            workers = 1
+    if workers > 1:
+        from app.core.parallel import ingest_csv_parallel, pa
+        if pa is not None:
+            return ingest_csv_parallel(source, chunksize, workers)
+        print("⚠️  pyarrow not installed, falling back to single-process profiling")
+
+    return fold_csv_stream(source, DatasetAccumulator(), chunksize).to_summary()
+
+def fold_csv_stream(
+    source: Union[str, BinaryIO],
+    accumulator: DatasetAccumulator,
+    chunksize: int = CHUNK_SIZE,
+    expected_columns: Optional[List[str]] = None
+) -> DatasetAccumulator:
+    """
+    Folds a CSV into an existing accumulator chunk by chunk.
+    With expected_columns the header must carry exactly those columns.
+    """
+    with pd.read_csv(source, chunksize=chunksize) as reader:
+        for chunk in reader:
+            if expected_columns is not None and set(chunk.columns) != set(expected_columns):
+                raise ValueError(
+                    f"Columns {sorted(map(str, chunk.columns))} do not match the expected columns {sorted(expected_columns)}"
+                )
+            accumulator.update(chunk)
+            # Raw rows never outlive their chunk
+            del chunk
+
+    return accumulator
+
+@contextmanager
+def spooled_path(source: BinaryIO, suffix: str = "") -> Iterator[str]:
+    """
+    Copies an upload stream to a temporary file so it can be memory-mapped.
+    The copy is streamed in blocks and deleted on exit.
+    """
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(source, out, length=1024 * 1024)
+        yield path
+    finally:
+        os.remove(path)
@@ -0,0 +1,281 @@
+"""
+Audit Job Queue
+Submitting an analysis stores the upload under JOB_DIR, records a job in
+SQLite and returns its ID at once. Worker threads run the jobs:
+  - CPU-bound stages (ingest, Benford / rules / scoring) on a process pool
+  - I/O-bound stages (AI explanation, provenance, storage) on the worker thread
+Every stage change is appended to job_events, which clients poll or follow via
+SSE. Queued and interrupted jobs are picked up again after a restart.
+"""
+
+import json
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+from app.core.batch import get_batch_executor
+from app.core.decoding import ingest_upload
+from app.core.pipeline import score_metadata
+from app.core.result_cache import result_cache, hash_stream, HashingReader
+
+JOBS_DB = os.getenv("JOBS_DB", "auditx_jobs.db")
+JOB_DIR = os.getenv("JOB_DIR", "job_uploads")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL", str(7 * 24 * 3600)))
+
+# Stage -> progress (percent) when the stage starts
+STAGES = {
+    "queued": 0,
+    "ingest": 5,
+    "analysis": 50,
+    "explanation": 60,
+    "provenance": 85,
+    "save": 95,
+    "completed": 100,
+}
+FINAL_STATUSES = ("completed", "failed")
+
+
+def _ingest_file(path: str, filename: str):
+    """Process-pool stage: one MetadataSummary per table in the upload."""
+    with open(path, "rb") as f:
+        return ingest_upload(f, filename)
+
+
+class JobQueue:
+    """SQLite-backed queue of analysis jobs with stage-level events."""
+
+    def __init__(self, db_path: str = JOBS_DB, directory: str = JOB_DIR, workers: int = JOB_WORKERS):
+        self.db_path = db_path
+        self.directory = directory
+        self.workers = workers
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.finalize: Optional[Callable] = None
+        os.makedirs(directory, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute("PRAGMA journal_mode=WAL")
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                filename TEXT,
+                upload_path TEXT,
+                status TEXT,
+                stage TEXT,
+                progress REAL,
+                created_at REAL,
+                updated_at REAL,
+                audit_ids TEXT,
+                result TEXT,
+                error TEXT,
+                content_hash TEXT
+            )
+        ''')
+        columns = [row[1] for row in c.execute('PRAGMA table_info(jobs)')]
+        if 'content_hash' not in columns:
+            c.execute('ALTER TABLE jobs ADD COLUMN content_hash TEXT')
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS job_events (
+                job_id TEXT,
+                seq INTEGER,
+                ts REAL,
+                status TEXT,
+                stage TEXT,
+                progress REAL,
+                message TEXT,
+                PRIMARY KEY (job_id, seq)
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def start(self, finalize: Callable):
+        """Re-queues unfinished jobs and starts the workers (once)."""
+        with self._lock:
+            self.finalize = finalize
+            if self._threads:
+                return
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT job_id, upload_path FROM jobs WHERE status NOT IN (?, ?) ORDER BY created_at", FINAL_STATUSES
+            ).fetchall()
+            conn.close()
+            for row in rows:
+                if os.path.exists(row["upload_path"]):
+                    self._event(row["job_id"], "queued", "queued", "Re-queued after restart")
+                    self._queue.put(row["job_id"])
+                else:
+                    self._event(row["job_id"], "failed", "failed", "Upload lost before the job ran", error="Upload lost")
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"audit-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if rows:
+                print(f"📥 Recovered {len(rows)} unfinished audit job(s)")
+
+    def submit(self, source: BinaryIO, filename: str) -> Dict[str, Any]:
+        self.expire()
+        job_id = str(uuid.uuid4())
+        path = os.path.join(self.directory, f"{job_id}.upload")
+        source.seek(0)
+        # Hashed while it is copied, so the worker can check the result cache without reading it again
+        upload = HashingReader(source)
+        with open(path, "wb") as out:
+            shutil.copyfileobj(upload, out, length=1024 * 1024)
+        content_hash = upload.hexdigest()
+        now = time.time()
+        conn = self._connect()
+        conn.execute('''
+            INSERT INTO jobs (job_id, filename, upload_path, status, stage, progress, created_at, updated_at, content_hash)
+            VALUES (?, ?, ?, 'queued', 'queued', 0, ?, ?, ?)
+        ''', (job_id, filename, path, now, now, content_hash))
+        conn.commit()
+        conn.close()
+        self._event(job_id, "queued", "queued", "Job accepted")
+        self._queue.put(job_id)
+        return self.get(job_id)
+
+    def _event(self, job_id: str, status: str, stage: str, message: str = "", **fields):
+        """Records a stage change on the job row and appends it to its event log."""
+        now = time.time()
+        conn = self._connect()
+        c = conn.cursor()
+        columns = {"status": status, "stage": stage, "updated_at": now, **fields}
+        if stage in STAGES:
+            columns["progress"] = STAGES[stage]
+        c.execute(
+            f"UPDATE jobs SET {', '.join(f'{k} = ?' for k in columns)} WHERE job_id = ?",
+            (*columns.values(), job_id)
+        )
+        c.execute('''
+            INSERT INTO job_events (job_id, seq, ts, status, stage, progress, message)
+            SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?, ?, (SELECT progress FROM jobs WHERE job_id = ?), ?
+            FROM job_events WHERE job_id = ?
+        ''', (job_id, now, status, stage, job_id, message, job_id))
+        conn.commit()
+        conn.close()
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            except Exception as e:
+                print(f"❌ Audit job {job_id} failed: {e}")
+                self._event(job_id, "failed", "failed", str(e), error=str(e))
+            finally:
+                self._discard_upload(job_id)
+
+    def _run(self, job_id: str):
+        job = self.get(job_id)
+        if job is None or job["status"] in FINAL_STATUSES:
+            return
+        path, filename = job["upload_path"], job["filename"]
+        executor = get_batch_executor()
+
+        content_hash = job["content_hash"]
+        if content_hash is None:
+            # Queued before the hash was stored with the job
+            with open(path, "rb") as f:
+                content_hash = hash_stream(f)
+        cache_key = result_cache.make_key(content_hash)
+        cached = result_cache.get(cache_key)
+        if cached:
+            self._complete(job_id, [cached["audit_id"]], {**cached, "cache_hit": True}, "Served from the result cache")
+            return
+
+        # CPU-bound stages: process pool (this thread only waits)
+        self._event(job_id, "running", "ingest", "Extracting metadata")
+        summaries = executor.submit(_ingest_file, path, filename).result()
+        if not summaries:
+            raise ValueError("No tabular data found in upload.")
+
+        self._event(job_id, "running", "analysis", f"Benford, rules and scoring for {len(summaries)} table(s)")
+        scored = {name: executor.submit(score_metadata, metadata) for name, metadata in summaries.items()}
+
+        # I/O-bound stages: LLM, ledger, SQLite on this worker thread
+        results = []
+        for name, future in scored.items():
+            metadata, rule_results, score = future.result()
+            results.append(self.finalize(
+                metadata, rule_results, score, name,
+                on_stage=lambda stage, name=name: self._event(job_id, "running", stage, name)
+            ))
+
+        audit_result = results[0]
+        if len(results) > 1:
+            audit_result.related_audits = {r.fileName: r.audit_id for r in results[1:]}
+        payload = audit_result.model_dump(mode="json")
+        result_cache.put(cache_key, payload)
+        self._complete(job_id, [r.audit_id for r in results], payload, f"{len(results)} audit(s) saved")
+
+    def _complete(self, job_id: str, audit_ids: List[str], payload: Dict, message: str):
+        self._event(
+            job_id, "completed", "completed", message,
+            audit_ids=json.dumps(audit_ids), result=json.dumps(payload, default=str)
+        )
+
+    def _discard_upload(self, job_id: str):
+        path = os.path.join(self.directory, f"{job_id}.upload")
+        if os.path.exists(path):
+            os.remove(path)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        row = conn.execute('''
+            SELECT job_id, filename, upload_path, status, stage, progress, created_at, updated_at, audit_ids, error,
+                   content_hash
+            FROM jobs WHERE job_id = ?
+        ''', (job_id,)).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job["audit_ids"] = json.loads(job["audit_ids"]) if job["audit_ids"] else []
+        return job
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        conn = self._connect()
+        row = conn.execute('SELECT result FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        conn.close()
+        return json.loads(row["result"]) if row and row["result"] else None
+
+    def events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        rows = conn.execute('''
+            SELECT seq, ts, status, stage, progress, message FROM job_events
+            WHERE job_id = ? AND seq > ? ORDER BY seq
+        ''', (job_id, after)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def expire(self):
+        """Drops finished jobs (and their events) older than JOB_TTL_SECONDS."""
+        cutoff = time.time() - JOB_TTL_SECONDS
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute(
+            'DELETE FROM job_events WHERE job_id IN (SELECT job_id FROM jobs WHERE status IN (?, ?) AND updated_at < ?)',
+            (*FINAL_STATUSES, cutoff)
+        )
+        c.execute('DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?', (*FINAL_STATUSES, cutoff))
+        conn.commit()
+        conn.close()
+
+
+# Global Instance
+job_queue = JobQueue()
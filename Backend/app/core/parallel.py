@@ -0,0 +1,148 @@
+"""
+Parallel Column Profiling
+Spreads column groups of each parsed chunk across a process pool. Columns are
+handed to workers as Arrow IPC streams in shared memory (no pickled DataFrames);
+workers send back only their mergeable column accumulators.
+"""
+
+import os
+import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from multiprocessing import shared_memory
+from typing import BinaryIO, Deque, Dict, List, Optional, Tuple, Union
+from app.models.schemas import MetadataSummary
+from app.core.accumulators import ColumnAccumulator, DatasetAccumulator
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Worker processes used for profiling (1 disables the pool)
+PROFILE_WORKERS = int(os.getenv("PROFILE_WORKERS", str(os.cpu_count() or 1)))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """Returns the shared profiling pool, (re)creating it if the size changed."""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attaches to a parent-owned block without taking ownership of it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: pool workers share the parent's resource tracker, which
+        # already holds this block, so attaching does not create a second owner
+        return shared_memory.SharedMemory(name=name)
+
+
+def _profile_shared_group(shm_name: str) -> Dict[str, ColumnAccumulator]:
+    """Worker entry point: profiles the columns stored in one shared memory block."""
+    shm = _attach(shm_name)
+    try:
+        reader = pa.ipc.open_stream(pa.py_buffer(shm.buf))
+        df = reader.read_pandas()
+        accumulator = DatasetAccumulator(row_level=False)
+        accumulator.update(df)
+        # Release every view on the shared buffer before closing it
+        del df, reader
+        return accumulator.columns
+    finally:
+        shm.close()
+
+
+def _to_shared_memory(frame: pd.DataFrame) -> shared_memory.SharedMemory:
+    """Serializes a column group as an Arrow IPC stream directly into shared memory."""
+    batch = pa.RecordBatch.from_pandas(frame, preserve_index=False)
+
+    # Size the block first; the mock stream does not copy any data
+    sink = pa.MockOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(sink.size(), 1))
+    stream = pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf))
+    with pa.ipc.new_stream(stream, batch.schema) as writer:
+        writer.write_batch(batch)
+    stream.close()
+    return shm
+
+
+def split_columns(columns: List[str], groups: int) -> List[List[str]]:
+    """Round-robin split of columns into at most `groups` non-empty groups."""
+    groups = max(1, min(groups, len(columns)))
+    return [columns[i::groups] for i in range(groups)]
+
+
+def ingest_csv_parallel(
+    source: Union[str, BinaryIO],
+    chunksize: int,
+    workers: int = PROFILE_WORKERS
+) -> MetadataSummary:
+    """
+    Parallel variant of ingest_csv_stream.
+    The parent parses chunks; workers profile column groups of each chunk while
+    the next chunk is being parsed. At most 2 x workers groups are in flight, so
+    peak memory stays proportional to chunk size.
+    """
+    if pa is None:
+        raise RuntimeError("Parallel profiling requires pyarrow")
+
+    executor = get_executor(workers)
+    accumulator = DatasetAccumulator()
+    pending: Deque[Tuple[Future, shared_memory.SharedMemory]] = deque()
+
+    def collect_oldest():
+        future, shm = pending.popleft()
+        try:
+            accumulator.merge_columns(future.result())
+        finally:
+            shm.close()
+            shm.unlink()
+
+    try:
+        with pd.read_csv(source, chunksize=chunksize) as reader:
+            for chunk in reader:
+                accumulator.register_columns(chunk.columns.tolist())
+                accumulator.row_count += len(chunk)
+                # Row-level fingerprints need whole rows, so they stay in the parent
+                accumulator.update_rows(chunk)
+
+                for group in split_columns(chunk.columns.tolist(), workers):
+                    frame = chunk[group]
+                    try:
+                        shm = _to_shared_memory(frame)
+                    except (pa.ArrowInvalid, pa.ArrowTypeError):
+                        # Mixed-type object columns cannot become Arrow arrays; profile them here
+                        local = DatasetAccumulator(row_level=False)
+                        local.update(frame)
+                        accumulator.merge_columns(local.columns)
+                        continue
+                    pending.append((executor.submit(_profile_shared_group, shm.name), shm))
+
+                    while len(pending) >= 2 * workers:
+                        collect_oldest()
+
+                # Raw rows never outlive their chunk
+                del chunk
+
+        while pending:
+            collect_oldest()
+    finally:
+        # Never leak shared memory blocks, even if a worker failed
+        for _, shm in pending:
+            shm.close()
+            shm.unlink()
+
+    return accumulator.to_summary()
@@ -0,0 +1,23 @@
+"""
+Audit Pipeline Stages
+The CPU-bound part of an audit (Benford, posting calendar, rules, scoring) is
+free of I/O and global side effects, so it can run in worker processes. The
+AI explanation, provenance and storage stay in the API process
+(app.api.analyze.finalize_audit).
+"""
+
+from typing import List, Tuple
+from app.models.schemas import MetadataSummary, RuleResult, ComplianceScore
+from app.core.benford import run_benford_analysis
+from app.core.posting_calendar import run_posting_analysis
+from app.core.rules_engine import evaluate_rules
+from app.core.scoring import calculate_score
+
+
+def score_metadata(metadata: MetadataSummary) -> Tuple[MetadataSummary, List[RuleResult], ComplianceScore]:
+    """Benford -> Posting calendar -> Rules -> Score for one ingested table."""
+    metadata = run_benford_analysis(metadata)
+    metadata = run_posting_analysis(metadata)
+    rule_results = evaluate_rules(metadata)
+    score = calculate_score(rule_results)
+    return metadata, rule_results, score
@@ -0,0 +1,223 @@
+"""
+Posting Calendar
+Per-day and per-hour posting-volume histograms for every date column, built in
+the streaming pass as integer arrays (one slot per calendar day, capped at
+POSTING_MAX_DAYS, and 24 hour slots). After ingestion the daily series is
+scanned with rolling statistics for:
+  - volume spikes: days far above the trailing median (robust z-score)
+  - weekend / holiday clusters: runs of non-business days with real activity
+  - period-end bursts: months whose last days carry far more than their share
+Analysis runs in O(days), independent of the row count.
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+try:
+    import holidays
+except ImportError:
+    holidays = None
+
+# Daily slots kept per column; older postings are counted as outside the window
+POSTING_MAX_DAYS = int(os.getenv("POSTING_MAX_DAYS", "3660"))
+# Country calendar for the holiday check (needs the 'holidays' package)
+POSTING_HOLIDAY_COUNTRY = os.getenv("POSTING_HOLIDAY_COUNTRY", "US")
+# Fallback fixed-date holidays (MM-DD) when the package is missing
+FIXED_HOLIDAYS = ["01-01", "12-25"]
+
+ROLLING_WINDOW_DAYS = 28
+SPIKE_Z = float(os.getenv("POSTING_SPIKE_Z", "6"))
+OFF_DAY_RATIO = 0.5          # non-business day at >= half a normal business day
+PERIOD_END_DAYS = 3
+PERIOD_END_RATIO = 3.0       # last days of the month at >= 3x their expected share
+MIN_FLAG_POSTINGS = 20       # ignore anything smaller, whatever the ratio
+MAX_REPORTED = 10
+BUSINESS_HOURS = (6, 20)
+
+NS_PER_DAY = 86_400 * 10**9
+NS_PER_HOUR = 3_600 * 10**9
+EPOCH = pd.Timestamp("1970-01-01")
+
+
+class PostingHistogram:
+    """Posting counts per calendar day and per hour of day for one date column."""
+
+    def __init__(self):
+        self.origin: Optional[int] = None  # days since epoch of daily[0]
+        self.daily = np.zeros(0, dtype=np.int64)
+        self.hourly = np.zeros(24, dtype=np.int64)
+        self.timed = 0  # postings with a time of day other than midnight
+        self.outside_window = 0
+
+    @property
+    def postings(self) -> int:
+        return int(self.daily.sum()) + self.outside_window
+
+    def update(self, dates: pd.Series):
+        """Adds parsed, non-null datetimes."""
+        if dates.empty:
+            return
+        if getattr(dates.dt, "tz", None) is not None:
+            dates = dates.dt.tz_localize(None)
+        if dates.dtype != "datetime64[ns]":
+            # Coarser units (Parquet, XLSX) reach past the nanosecond range; a
+            # 9999-12-31 sentinel would silently wrap around in the cast
+            in_range = dates.between(pd.Timestamp.min, pd.Timestamp.max)
+            self.outside_window += int((~in_range).sum())
+            dates = dates[in_range]
+            if dates.empty:
+                return
+        ns =dates.to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        self.hourly += np.bincount((ns // NS_PER_HOUR) % 24, minlength=24)
+        self.timed += int(np.count_nonzero(ns % NS_PER_DAY))
+        self._add_days(ns // NS_PER_DAY)
+
+    def _add_days(self, days: np.ndarray, counts: Optional[np.ndarray] = None):
+        """Grows the daily array to cover `days`, keeping the latest POSTING_MAX_DAYS."""
+        end = int(days.max()) if self.origin is None else max(self.origin + self.daily.size - 1, int(days.max()))
+        start = int(days.min()) if self.origin is None else min(self.origin, int(days.min()))
+        start = max(start, end - POSTING_MAX_DAYS + 1)
+
+        if self.origin != start or self.daily.size != end - start + 1:
+            grown = np.zeros(end - start + 1, dtype=np.int64)
+            if self.origin is not None:
+                offset = self.origin - start
+                keep = max(0, -offset)
+                self.outside_window += int(self.daily[:keep].sum())
+                grown[offset + keep:offset + self.daily.size] = self.daily[keep:]
+            self.origin, self.daily = start, grown
+
+        inside = days >= start
+        weights = counts if counts is not None else np.ones(days.size, dtype=np.int64)
+        self.outside_window += int(weights[~inside].sum())
+        self.daily += np.bincount(days[inside] - start, weights=weights[inside], minlength=self.daily.size).astype(np.int64)
+
+    def merge(self, other: "PostingHistogram") -> "PostingHistogram":
+        self.hourly += other.hourly
+        self.timed += other.timed
+        self.outside_window += other.outside_window
+        if other.origin is not None:
+            present = np.flatnonzero(other.daily)
+            if present.size:
+                self._add_days(present + other.origin, other.daily[present])
+        return self
+
+    def summary(self) -> Optional[Dict[str, Any]]:
+        if self.origin is None:
+            return None
+        return {
+            "origin": (EPOCH + pd.Timedelta(days=self.origin)).date().isoformat(),
+            "daily": self.daily.tolist(),
+            "hourly": self.hourly.tolist(),
+            "timed_postings": self.timed,
+            "outside_window": self.outside_window,
+        }
+
+
+def _holiday_mask(days: pd.DatetimeIndex) -> np.ndarray:
+    if holidays is not None:
+        try:
+            calendar = holidays.country_holidays(POSTING_HOLIDAY_COUNTRY, years=sorted(set(days.year)))
+            return days.normalize().isin(pd.to_datetime(list(calendar.keys())))
+        except (KeyError, NotImplementedError):
+            pass
+    return days.strftime("%m-%d").isin(FIXED_HOLIDAYS) if len(days) else np.zeros(0, dtype=bool)
+
+
+def _runs(mask: np.ndarray) -> List[tuple]:
+    """(start, end) index pairs of consecutive True values."""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1))
+
+
+def analyze_calendar(calendar: Dict[str, Any]) -> Dict[str, Any]:
+    """Spike, off-day cluster and period-end findings for one column's calendar."""
+    daily = np.asarray(calendar["daily"], dtype=np.float64)
+    active = np.flatnonzero(daily)
+    if active.size == 0:
+        return {}
+    daily = daily[active[0]:active[-1] + 1]
+    days = pd.date_range(pd.Timestamp(calendar["origin"]) + pd.Timedelta(days=int(active[0])), periods=daily.size, freq="D")
+    total = daily.sum()
+
+    weekend = days.dayofweek.to_numpy() >= 5
+    holiday = np.asarray(_holiday_mask(days), dtype=bool)
+    off_day = weekend | holiday
+
+    # Volume spikes: robust z-score against the trailing window (current day excluded)
+    series = pd.Series(daily)
+    baseline = series.rolling(ROLLING_WINDOW_DAYS, min_periods=7).median().shift(1)
+    spread = (series - baseline).abs().rolling(ROLLING_WINDOW_DAYS, min_periods=7).median().shift(1) * 1.4826
+    scale = np.maximum(spread.to_numpy(), np.sqrt(np.maximum(baseline.to_numpy(), 1.0)))
+    score = (daily - baseline.to_numpy()) / scale
+    spikes = np.flatnonzero((score > SPIKE_Z) & (daily >= MIN_FLAG_POSTINGS))
+    spikes = spikes[np.argsort(-score[spikes])]
+
+    # Weekend / holiday clusters: off days busy relative to the trailing business-day median
+    business = pd.Series(np.where(off_day, np.nan, daily))
+    business_median = business.rolling(ROLLING_WINDOW_DAYS, min_periods=5).median().shift(1).ffill().to_numpy()
+    busy_off = off_day & (daily >= MIN_FLAG_POSTINGS) & (daily >= OFF_DAY_RATIO * business_median)  # NaN: no history yet
+    clusters = [(s, e, daily[s:e + 1].sum()) for s, e in _runs(busy_off)]
+    clusters.sort(key=lambda c: -c[2])
+
+    # Period-end bursts: last PERIOD_END_DAYS of each month against their expected share
+    months = days.to_period("M")
+    month_codes, month_labels = pd.factorize(months)
+    period_end = (days.days_in_month - days.day).to_numpy() < PERIOD_END_DAYS
+    month_totals = np.bincount(month_codes, weights=daily)
+    end_totals = np.bincount(month_codes, weights=daily * period_end)
+    covered = np.bincount(month_codes)
+    full_month = covered == np.asarray(month_labels.days_in_month)
+    expected = month_totals * PERIOD_END_DAYS / np.maximum(covered, 1)
+    ratio = np.divide(end_totals, expected, out=np.zeros_like(end_totals), where=expected > 0)
+    bursts = np.flatnonzero(full_month & (ratio >= PERIOD_END_RATIO) & (end_totals >= MIN_FLAG_POSTINGS))
+    bursts = bursts[np.argsort(-ratio[bursts])]
+
+    flags = []
+    if spikes.size:
+        flags.append(f"{spikes.size} volume spike day(s)")
+    if clusters:
+        flags.append(f"{len(clusters)} weekend/holiday cluster(s)")
+    if bursts.size:
+        flags.append(f"{bursts.size} period-end burst(s)")
+
+    result = {
+        "days_observed": int(daily.size),
+        "postings": int(total),
+        "spike_count": int(spikes.size),
+        "spike_days": [
+            {"date": days[i].date().isoformat(), "postings": int(daily[i]), "baseline": float(baseline.iloc[i]), "score": round(float(score[i]), 2)}
+            for i in spikes[:MAX_REPORTED]
+        ],
+        "weekend_share": round(float(daily[weekend].sum() / total * 100), 2),
+        "holiday_share": round(float(daily[holiday].sum() / total * 100), 2),
+        "off_day_cluster_count": len(clusters),
+        "off_day_clusters": [
+            {"start": days[s].date().isoformat(), "end": days[e].date().isoformat(), "postings": int(n)}
+            for s, e, n in clusters[:MAX_REPORTED]
+        ],
+        "period_end_count": int(bursts.size),
+        "period_end_bursts": [
+            {"month": str(month_labels[i]), "postings": int(end_totals[i]), "expected": round(float(expected[i]), 1), "ratio": round(float(ratio[i]), 2)}
+            for i in bursts[:MAX_REPORTED]
+        ],
+        "anomaly_count": int(spikes.size) + len(clusters) + int(bursts.size),
+        "findings": ", ".join(flags) or "none",
+    }
+    hourly = np.asarray(calendar["hourly"], dtype=np.float64)
+    if calendar.get("timed_postings"):
+        start, end = BUSINESS_HOURS
+        result["after_hours_share"] = round(float((hourly[:start].sum() + hourly[end:].sum()) / hourly.sum() * 100), 2)
+    return result
+
+
+def run_posting_analysis(metadata):
+    """Fills metadata.posting_anomalies from the posting calendars."""
+    metadata.posting_anomalies = {
+        col: findings
+        for col, calendar in metadata.posting_calendar.items()
+        if (findings := analyze_calendar(calendar))
+    }
+    return metadata
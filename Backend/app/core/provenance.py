@@ -1,6 +1,7 @@
 import hashlib
 import json
 import os
+import threading
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
@@ -14,6 +15,7 @@ class BlockchainLedger:
     _chain = [] # Local in-memory chain (persisted to file in real app, simplified for demo)
     _web3 = None
     _contract = None
+    _lock = threading.Lock() # Batch audits finalize concurrently
 
     def __new__(cls):
         if cls._instance is None:
@@ -52,16 +54,17 @@ class BlockchainLedger:
         audit_hash = hashlib.sha256(audit_string.encode()).hexdigest()
 
         # 2. Local Chain (Append)
-        prev_hash = self._chain[-1]["current_hash"] if self._chain else "GENESIS_BLOCK_0000000000000000"
-        
-        block = {
-            "index": len(self._chain) + 1,
-            "timestamp": datetime.now().isoformat(),
-            "audit_id": audit_id,
-            "previous_hash": prev_hash,
-            "current_hash": audit_hash
-        }
-        self._chain.append(block)
+        with self._lock:
+            prev_hash = self._chain[-1]["current_hash"] if self._chain else "GENESIS_BLOCK_0000000000000000"
+
+            block = {
+                "index": len(self._chain) + 1,
+                "timestamp": datetime.now().isoformat(),
+                "audit_id": audit_id,
+                "previous_hash": prev_hash,
+                "current_hash": audit_hash
+            }
+            self._chain.append(block)
         
         return audit_hash
 
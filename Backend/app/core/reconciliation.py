@@ -0,0 +1,281 @@
+"""
+Two-File Reconciliation
+Matches two ledgers (e.g. general ledger vs bank statement) on key columns and
+compares amounts per key with an out-of-core partitioned hash join:
+
+  1. Each file is streamed in chunks; only the key and amount columns are
+     parsed. Keys are hashed to 64 bits, amounts converted to integer cents,
+     and the (hash, cents) records appended to one of RECON_PARTITIONS spill
+     files per side by hash.
+  2. Partition pairs are joined one at a time: both sides are aggregated per
+     key (row count, amount sum) with a sort and intersected. A pair larger
+     than RECON_MEMORY_BYTES is split again on the next hash bits first.
+
+Memory stays bounded by the chunk size and the memory budget whatever the file
+sizes; disk use is 16 bytes per row. Only counts and amount totals are
+returned, never keys or rows.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from contextlib import ExitStack
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+from app.core.ingestion import CHUNK_SIZE
+
+RECON_PARTITION_BITS = int(os.getenv("RECON_PARTITION_BITS", "6"))
+RECON_PARTITIONS = 1 << RECON_PARTITION_BITS
+RECON_MEMORY_BYTES = int(os.getenv("RECON_MEMORY_BYTES", str(512 * 1024 * 1024)))
+AMOUNT_DECIMALS = int(os.getenv("RECON_AMOUNT_DECIMALS", "2"))
+# Times RECON_PARTITION_BITS hash bits; skew beyond that (one huge key) is joined as is
+MAX_SPLIT_DEPTH = 64 // RECON_PARTITION_BITS - 1
+SPLIT_BLOCK_ROWS = 1 << 20
+# Sort, aggregate and intersect need a few copies of a partition pair
+JOIN_OVERHEAD = 6
+
+RECORD = np.dtype([("key", "<u8"), ("cents", "<i8")])
+
+
+class ReconciliationError(ValueError):
+    """Raised for missing columns or unusable parameters."""
+
+
+def _partition_of(keys: np.ndarray, depth: int) -> np.ndarray:
+    return ((keys >> np.uint64(depth * RECON_PARTITION_BITS)) & np.uint64(RECON_PARTITIONS - 1)).astype(np.int64)
+
+
+def _append_partitioned(records: np.ndarray, files: List[BinaryIO], depth: int):
+    """Appends records to their partition files, one contiguous write per partition."""
+    partition = _partition_of(records["key"], depth)
+    order = np.argsort(partition, kind="stable")
+    bounds = np.searchsorted(partition[order], np.arange(RECON_PARTITIONS + 1))
+    ordered = records[order]
+    for p in range(RECON_PARTITIONS):
+        if bounds[p + 1] > bounds[p]:
+            ordered[bounds[p]:bounds[p + 1]].tofile(files[p])
+
+
+class LedgerSide:
+    """Streams one ledger into hash partitions and keeps its load counters."""
+
+    def __init__(self, name: str, key_columns: List[str], amount_column: str, directory: str):
+        self.name = name
+        self.key_columns = key_columns
+        self.amount_column = amount_column
+        self.directory = directory
+        self.rows = 0
+        self.null_keys = 0
+        self.invalid_amounts = 0
+        self.total_cents = 0
+
+    def path(self, partition: int) -> str:
+        return os.path.join(self.directory, f"{self.name}_{partition}.bin")
+
+    def _records(self, chunk: pd.DataFrame) -> np.ndarray:
+        keys = chunk[self.key_columns].apply(lambda s: s.str.strip().str.upper())
+        has_key = keys.notna().all(axis=1).to_numpy() & (keys != "").all(axis=1).to_numpy()
+        amounts = pd.to_numeric(chunk[self.amount_column], errors="coerce").to_numpy(dtype=np.float64)
+        has_amount = ~np.isnan(amounts)
+        self.null_keys += int(np.count_nonzero(~has_key))
+        self.invalid_amounts += int(np.count_nonzero(has_key & ~has_amount))
+
+        valid = has_key & has_amount
+        records = np.empty(int(valid.sum()), dtype=RECORD)
+        # Column names are not part of the hash, so both files hash equal keys alike
+        records["key"] = pd.util.hash_pandas_object(keys[valid], index=False, categorize=False).to_numpy()
+        records["cents"] = np.round(amounts[valid] * 10 ** AMOUNT_DECIMALS).astype(np.int64)
+        self.total_cents += int(records["cents"].sum())
+        return records
+
+    def load(self, source: Union[str, BinaryIO], chunksize: int = CHUNK_SIZE):
+        columns = list(dict.fromkeys(self.key_columns + [self.amount_column]))
+        with ExitStack() as stack:
+            files = [stack.enter_context(open(self.path(p), "ab")) for p in range(RECON_PARTITIONS)]
+            reader = stack.enter_context(pd.read_csv(
+                source, usecols=lambda col: col in columns, chunksize=chunksize,
+                dtype={col: str for col in self.key_columns}
+            ))
+            for chunk in reader:
+                missing = [c for c in columns if c not in chunk.columns]
+                if missing:
+                    raise ReconciliationError(f"The {self.name} file has no column(s) {', '.join(missing)}")
+                self.rows += len(chunk)
+                _append_partitioned(self._records(chunk), files, depth=0)
+                # Raw rows never outlive their chunk
+                del chunk
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "key_columns": self.key_columns,
+            "amount_column": self.amount_column,
+            "null_keys": self.null_keys,
+            "invalid_amounts": self.invalid_amounts,
+            "total_amount": self.total_cents / 10 ** AMOUNT_DECIMALS,
+        }
+
+
+def _aggregate(records: np.ndarray):
+    """Distinct keys (sorted) with their row counts and amount sums."""
+    if records.size == 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.argsort(records["key"], kind="stable")
+    keys = records["key"][order]
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+    counts = np.diff(np.concatenate([starts, [keys.size]]))
+    sums = np.add.reduceat(records["cents"][order], starts)
+    return keys[starts], counts, sums
+
+
+class ReconciliationStats:
+    """Match counters summed over partition pairs."""
+
+    FIELDS = [
+        "matched_keys", "amount_mismatch_keys", "left_only_keys", "right_only_keys",
+        "left_duplicate_keys", "right_duplicate_keys",
+        "left_matched_rows", "right_matched_rows", "left_mismatch_rows", "right_mismatch_rows",
+        "left_unmatched_rows", "right_unmatched_rows",
+        "left_unmatched_cents", "right_unmatched_cents",
+        "variance_cents", "absolute_variance_cents", "max_variance_cents",
+    ]
+
+    def __init__(self, tolerance_cents: int):
+        self.tolerance_cents = tolerance_cents
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        self.partitions_joined = 0
+        self.partitions_split = 0
+
+    def add(self, left: np.ndarray, right: np.ndarray):
+        lk, lc, ls = _aggregate(left)
+        rk, rc, rs = _aggregate(right)
+        _, li, ri = np.intersect1d(lk, rk, assume_unique=True, return_indices=True)
+        variance = rs[ri] - ls[li]
+        agrees = np.abs(variance) <= self.tolerance_cents
+        left_only = np.ones(lk.size, dtype=bool)
+        left_only[li] = False
+        right_only = np.ones(rk.size, dtype=bool)
+        right_only[ri] = False
+
+        self.matched_keys += int(agrees.sum())
+        self.amount_mismatch_keys += int((~agrees).sum())
+        self.left_only_keys += int(left_only.sum())
+        self.right_only_keys += int(right_only.sum())
+        self.left_duplicate_keys += int(np.count_nonzero(lc > 1))
+        self.right_duplicate_keys += int(np.count_nonzero(rc > 1))
+        self.left_matched_rows += int(lc[li][agrees].sum())
+        self.right_matched_rows += int(rc[ri][agrees].sum())
+        self.left_mismatch_rows += int(lc[li][~agrees].sum())
+        self.right_mismatch_rows += int(rc[ri][~agrees].sum())
+        self.left_unmatched_rows += int(lc[left_only].sum())
+        self.right_unmatched_rows += int(rc[right_only].sum())
+        self.left_unmatched_cents += int(ls[left_only].sum())
+        self.right_unmatched_cents += int(rs[right_only].sum())
+        self.variance_cents += int(variance.sum())
+        self.absolute_variance_cents += int(np.abs(variance).sum())
+        if variance.size:
+            self.max_variance_cents = max(self.max_variance_cents, int(np.abs(variance).max()))
+        self.partitions_joined += 1
+
+
+def _split(path: str, prefix: str, depth: int) -> List[str]:
+    """Re-partitions one spill file on the next hash bits, block by block."""
+    paths = [f"{prefix}_{p}.bin" for p in range(RECON_PARTITIONS)]
+    records = np.memmap(path, dtype=RECORD, mode="r") if os.path.getsize(path) else np.empty(0, dtype=RECORD)
+    with ExitStack() as stack:
+        files = [stack.enter_context(open(p, "wb")) for p in paths]
+        for start in range(0, records.size, SPLIT_BLOCK_ROWS):
+            _append_partitioned(np.asarray(records[start:start + SPLIT_BLOCK_ROWS]), files, depth)
+    del records
+    os.remove(path)
+    return paths
+
+
+def _join(left_path: str, right_path: str, stats: ReconciliationStats, depth: int = 0):
+    size = os.path.getsize(left_path) + os.path.getsize(right_path)
+    if size * JOIN_OVERHEAD > RECON_MEMORY_BYTES and depth < MAX_SPLIT_DEPTH:
+        stats.partitions_split += 1
+        lefts = _split(left_path, f"{left_path[:-4]}_{depth + 1}", depth + 1)
+        rights = _split(right_path, f"{right_path[:-4]}_{depth + 1}", depth + 1)
+        for left, right in zip(lefts, rights):
+            _join(left, right, stats, depth + 1)
+        return
+    stats.add(np.fromfile(left_path, dtype=RECORD), np.fromfile(right_path, dtype=RECORD))
+    os.remove(left_path)
+    os.remove(right_path)
+
+
+def _rate(part: int, whole: int) -> float:
+    return round(part / whole * 100, 4) if whole else 0.0
+
+
+def reconcile(
+    left_source: BinaryIO,
+    right_source: BinaryIO,
+    left_keys: List[str],
+    left_amount: str,
+    right_keys: Optional[List[str]] = None,
+    right_amount: Optional[str] = None,
+    tolerance: float = 0.0,
+    chunksize: int = CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Reconciles two CSV ledgers on key columns. Keys match after trimming and
+    upper-casing; several rows per key are summed before amounts are compared.
+    """
+    right_keys = right_keys or left_keys
+    right_amount = right_amount or left_amount
+    if len(left_keys) != len(right_keys):
+        raise ReconciliationError("Both files need the same number of key columns")
+    if tolerance < 0:
+        raise ReconciliationError("Tolerance must not be negative")
+
+    started = time.time()
+    directory = tempfile.mkdtemp(prefix="auditx_recon_")
+    try:
+        left = LedgerSide("left", left_keys, left_amount, directory)
+        right = LedgerSide("right", right_keys, right_amount, directory)
+        left.load(left_source, chunksize)
+        right.load(right_source, chunksize)
+
+        stats = ReconciliationStats(int(round(tolerance * 10 ** AMOUNT_DECIMALS)))
+        for p in range(RECON_PARTITIONS):
+            _join(left.path(p), right.path(p), stats)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    scale = 10 ** AMOUNT_DECIMALS
+    left_keyed = left.rows - left.null_keys - left.invalid_amounts
+    right_keyed = right.rows - right.null_keys - right.invalid_amounts
+    compared_keys = stats.matched_keys + stats.amount_mismatch_keys
+    return {
+        "left": left.summary(),
+        "right": right.summary(),
+        "tolerance": tolerance,
+        "match_rate": _rate(stats.left_matched_rows, left.rows),
+        "right_match_rate": _rate(stats.right_matched_rows, right.rows),
+        "key_match_rate": _rate(compared_keys, compared_keys + stats.left_only_keys),
+        "matched_keys": stats.matched_keys,
+        "amount_mismatch_keys": stats.amount_mismatch_keys,
+        "left_only_keys": stats.left_only_keys,
+        "right_only_keys": stats.right_only_keys,
+        "left_duplicate_keys": stats.left_duplicate_keys,
+        "right_duplicate_keys": stats.right_duplicate_keys,
+        "left_matched_rows": stats.left_matched_rows,
+        "right_matched_rows": stats.right_matched_rows,
+        "left_mismatch_rows": stats.left_mismatch_rows,
+        "right_mismatch_rows": stats.right_mismatch_rows,
+        "left_unmatched_rows": stats.left_unmatched_rows + (left.rows - left_keyed),
+        "right_unmatched_rows": stats.right_unmatched_rows + (right.rows - right_keyed),
+        "left_unmatched_amount": stats.left_unmatched_cents / scale,
+        "right_unmatched_amount": stats.right_unmatched_cents / scale,
+        "amount_variance": stats.variance_cents / scale,
+        "absolute_variance": stats.absolute_variance_cents / scale,
+        "max_key_variance": stats.max_variance_cents / scale,
+        "partitions": RECON_PARTITIONS,
+        "partitions_split": stats.partitions_split,
+        "elapsed_seconds": round(time.time() - started, 2),
+    }
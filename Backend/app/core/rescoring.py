@@ -0,0 +1,200 @@
+"""
+Bulk Re-Scoring
+Re-applies the current scoring config (and optionally the current rule set)
+to every stored audit without re-uploading anything.
+
+  - Scoring only: SQLite's JSON functions extract (rule severity, passed) for a
+    batch of audits in C; deductions are summed with one bincount and scores /
+    bands computed with vectorized calculate_score logic.
+  - rerun_rules=True: stored metadata summaries are re-evaluated against the
+    current rule registry in worker processes, then scored the same way.
+
+New scores go to audit_scores (one row per audit and version tag) and to the
+audits listing columns; the stored audit record itself is never modified, so
+provenance hashes stay valid. get_audit reports the listing columns' score.
+"""
+
+import sqlite3
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+from app.core.scoring import SEVERITY_DEDUCTIONS, score_batch, scoring_version
+from app.core.rule_registry import rule_registry
+
+RESCORE_BATCH_AUDITS = 20000
+# Metadata batches queued for rule re-evaluation at once (rerun_rules mode)
+MAX_IN_FLIGHT = 4
+
+
+def _stored_rule_rows(conn: sqlite3.Connection, low: int, high: int) -> pd.DataFrame:
+    """(rowid, audit_id, rule_id, severity, passed) for audits with low < rowid <= high."""
+    return pd.read_sql_query('''
+        SELECT a.rowid AS rid, a.audit_id AS audit_id,
+               json_extract(r.value, '$.rule_id') AS rule_id,
+               json_extract(r.value, '$.severity') AS severity,
+               json_extract(r.value, '$.passed') AS passed
+        FROM audits a, json_each(a.audit_data, '$.rule_results') r
+        WHERE a.rowid > ? AND a.rowid <= ?
+    ''', conn, params=(low, high))
+
+
+def _evaluate_stored(metadata_rows: List[Tuple[int, str, str]]) -> List[Tuple[int, str, str, str, int]]:
+    """Worker: re-runs the current rules on stored metadata summaries."""
+    from app.models.schemas import MetadataSummary
+    rows = []
+    for rid, audit_id, metadata_json in metadata_rows:
+        if not metadata_json:
+            continue
+        metadata = MetadataSummary.model_validate_json(metadata_json)
+        for result in rule_registry.evaluate(metadata):
+            rows.append((rid, audit_id, result.rule_id, result.severity, int(result.passed)))
+    return rows
+
+
+class RescoreJob:
+    """Progress of one bulk re-scoring run."""
+
+    def __init__(self, rerun_rules: bool):
+        self.job_id = str(uuid.uuid4())
+        self.rerun_rules = rerun_rules
+        self.version = scoring_version() + (f"-rules.{rule_registry.version}" if rerun_rules else "")
+        self.status = "pending"
+        self.total = 0
+        self.processed = 0
+        self.changed = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def progress(self) -> Dict:
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "scoring_version": self.version,
+            "rerun_rules": self.rerun_rules,
+            "total": self.total,
+            "processed": self.processed,
+            "changed": self.changed,
+            "percent": round(self.processed / self.total * 100, 2) if self.total else 100.0,
+            "elapsed_seconds": round(elapsed, 2),
+            "audits_per_second": round(self.processed / elapsed) if elapsed > 0 else None,
+            "error": self.error,
+        }
+
+
+def _metadata_batch(conn: sqlite3.Connection, low: int, high: int) -> List[Tuple[int, str, str]]:
+    return conn.execute('''
+        SELECT rowid, audit_id, json_extract(audit_data, '$.metadata_summary')
+        FROM audits WHERE rowid > ? AND rowid <= ?
+    ''', (low, high)).fetchall()
+
+
+def _rule_frames(conn: sqlite3.Connection, ranges: List[int], batch_audits: int, rerun_rules: bool, executor) -> Iterator[pd.DataFrame]:
+    """Per rowid range, the (audit, rule) rows to score -- stored or re-evaluated."""
+    columns = ["rid", "audit_id", "rule_id", "severity", "passed"]
+    if not rerun_rules:
+        for low in ranges:
+            yield _stored_rule_rows(conn, low, low + batch_audits)
+        return
+    if executor is None:
+        for low in ranges:
+            yield pd.DataFrame(_evaluate_stored(_metadata_batch(conn, low, low + batch_audits)), columns=columns)
+        return
+
+    # Bounded look-ahead keeps at most MAX_IN_FLIGHT batches of metadata in memory
+    in_flight: Deque[Future] = deque()
+    upcoming = iter(ranges)
+    for low in upcoming:
+        in_flight.append(executor.submit(_evaluate_stored, _metadata_batch(conn, low, low + batch_audits)))
+        if len(in_flight) >= MAX_IN_FLIGHT:
+            break
+    while in_flight:
+        rows = in_flight.popleft().result()
+        low = next(upcoming, None)
+        if low is not None:
+            in_flight.append(executor.submit(_evaluate_stored, _metadata_batch(conn, low, low + batch_audits)))
+        yield pd.DataFrame(rows, columns=columns)
+
+
+def rescore_audits(db_path: str, job: RescoreJob, batch_audits: int = RESCORE_BATCH_AUDITS, executor=None):
+    """Streams stored audits by rowid range and writes re-computed scores."""
+    job.status = "running"
+    job.started_at = time.time()
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        c = conn.cursor()
+        job.total, max_rowid = c.execute('SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM audits').fetchone()
+        rescored_at = datetime.now().isoformat()
+        ranges = list(range(0, max_rowid, batch_audits))
+
+        for low, frame in zip(ranges, _rule_frames(conn, ranges, batch_audits, job.rerun_rules, executor)):
+            high = low + batch_audits
+            audits = c.execute(
+                'SELECT rowid, audit_id, final_score, risk_band FROM audits WHERE rowid > ? AND rowid <= ? ORDER BY rowid', (low, high)
+            ).fetchall()
+            if not audits:
+                continue
+            rids = np.array([row[0] for row in audits], dtype=np.int64)
+
+            # Deductions per audit: one vectorized map + bincount over (audit, rule) rows
+            failed = frame["passed"].fillna(1).astype(np.int64).to_numpy() == 0
+            deductions = frame["severity"].map(SEVERITY_DEDUCTIONS).fillna(0).to_numpy(dtype=np.int64) * failed
+            position = np.searchsorted(rids, frame["rid"].to_numpy(dtype=np.int64))
+            totals = np.bincount(position, weights=deductions, minlength=len(rids)).astype(np.int64)
+            scores, bands = score_batch(totals)
+
+            old_scores = np.array([row[2] if row[2] is not None else -1 for row in audits])
+            old_bands = np.array([row[3] or "" for row in audits])
+            job.changed += int(np.count_nonzero((old_scores != scores) | (old_bands != bands)))
+
+            updates = [(int(s), str(b), job.version, row[0]) for row, s, b in zip(audits, scores, bands)]
+            c.executemany('UPDATE audits SET final_score = ?, risk_band = ?, scoring_version = ? WHERE rowid = ?', updates)
+            c.executemany('''
+                INSERT OR REPLACE INTO audit_scores (audit_id, scoring_version, final_score, risk_band, rescored_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(row[1], job.version, int(s), str(b), rescored_at) for row, s, b in zip(audits, scores, bands)])
+            conn.commit()
+
+            job.processed += len(audits)
+            print(f"🔁 Re-scoring {job.processed}/{job.total} audits ({job.version})")
+
+        job.status = "completed"
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(e)
+        print(f"❌ Re-scoring failed: {e}")
+    finally:
+        job.finished_at = time.time()
+        conn.close()
+
+
+class RescoreJobs:
+    """In-memory registry of re-scoring runs; one run at a time."""
+
+    def __init__(self):
+        self._jobs: Dict[str, RescoreJob] = {}
+        self._lock = threading.Lock()
+
+    def start(self, db_path: str, rerun_rules: bool = False, executor=None) -> RescoreJob:
+        with self._lock:
+            if any(job.status in ("pending", "running") for job in self._jobs.values()):
+                raise RuntimeError("A re-scoring job is already running")
+            job = RescoreJob(rerun_rules)
+            self._jobs[job.job_id] = job
+        thread = threading.Thread(target=rescore_audits, args=(db_path, job), kwargs={"executor": executor}, daemon=True)
+        thread.start()
+        return job
+
+    def get(self, job_id: str) -> Optional[RescoreJob]:
+        return self._jobs.get(job_id)
+
+
+# Global Instance
+rescore_jobs = RescoreJobs()
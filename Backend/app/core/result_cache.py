@@ -0,0 +1,245 @@
+"""
+Content-Addressed Result Cache
+Audit results keyed by SHA-256(upload bytes) + the version of the pipeline
+code and rules configuration. Repeated uploads of the same export skip rules,
+scoring and the LLM call (queued jobs, hashed while the upload is stored,
+skip ingestion too). Entries live in SQLite (survive restarts) and are
+evicted by TTL and, past the size limit, least-recently-used first.
+"""
+
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import BinaryIO, Dict, Optional
+
+RESULT_CACHE_DB = os.getenv("RESULT_CACHE_DB", "auditx_cache.db")
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(7 * 24 * 3600)))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+HASH_BLOCK_BYTES = 1024 * 1024
+
+
+def hash_stream(source: BinaryIO) -> str:
+    """SHA-256 of a seekable stream, read block by block; rewinds afterwards."""
+    source.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: source.read(HASH_BLOCK_BYTES), b""):
+        digest.update(block)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+class HashingReader(io.BufferedIOBase):
+    """
+    Read-only, seekable view of an upload that hashes the bytes as the
+    consumer reads them, so ingestion and the cache key share one pass.
+    Only reads that extend the hashed prefix count; peeks and random access
+    (zip central directories) do not, and hexdigest() reads whatever part the
+    consumer skipped.
+    """
+
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self._digest = hashlib.sha256()
+        self._hashed = 0  # bytes [0, _hashed) are in the digest
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.raw.tell()
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self.raw.seek(offset, whence)
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        position = self.raw.tell()
+        data = self.raw.read(-1 if size is None else size)
+        if position <= self._hashed < position + len(data):
+            self._digest.update(memoryview(data)[self._hashed - position:])
+            self._hashed = position + len(data)
+        return data
+
+    read1 = read
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def hexdigest(self) -> str:
+        """SHA-256 of the whole stream; the position is left unchanged."""
+        position = self.raw.tell()
+        self.raw.seek(self._hashed)
+        while self.read(HASH_BLOCK_BYTES):
+            pass
+        self.raw.seek(position)
+        return self._digest.hexdigest()
+
+
+# Modules whose code shapes a cached result: profiling (everything that fills
+# MetadataSummary), rules, scoring and the explanation prompt
+PIPELINE_MODULES = (
+    "core/accumulators.py", "core/sketches.py", "core/ingestion.py", "core/parallel.py",
+    "core/columnar.py", "core/decoding.py", "core/benford.py", "core/duplicates.py",
+    "core/row_checks.py", "core/posting_calendar.py", "core/segmented_benford.py",
+    "core/entity_scanner.py", "core/rule_registry.py", "core/rules_engine.py",
+    "core/pipeline.py", "core/scoring.py", "models/schemas.py",
+    "ai/agent.py", "ai/prompt_compactor.py",
+)
+
+
+def _code_version() -> str:
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256()
+    for module in PIPELINE_MODULES:
+        digest.update(module.encode())
+        with open(os.path.join(app_dir, module), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# Source only changes with a deploy, so it is hashed once
+PIPELINE_CODE_VERSION = _code_version()
+
+
+def pipeline_version() -> str:
+    """
+    Fingerprint of everything that shapes a result besides the data: the code
+    in PIPELINE_MODULES, the rule files (which reload at runtime) and the
+    placeholder pattern list. Editing any of them invalidates cached results.
+    RULES_VERSION can pin it.
+    """
+    pinned = os.getenv("RULES_VERSION")
+    if pinned:
+        return pinned
+    from app.core.entity_scanner import entity_matcher
+    from app.core.rule_registry import rule_registry
+
+    digest = hashlib.sha256(PIPELINE_CODE_VERSION.encode())
+    digest.update(rule_registry.version.encode())
+    digest.update("\n".join(entity_matcher.patterns).encode())
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """SQLite-backed LRU/TTL cache of serialized audit results."""
+
+    def __init__(self, path: str = RESULT_CACHE_DB, ttl: int = RESULT_CACHE_TTL, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _init_db(self):
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute("PRAGMA journal_mode=WAL")
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS result_cache (
+                cache_key TEXT PRIMARY KEY,
+                payload TEXT,
+                size_bytes INTEGER,
+                created_at REAL,
+                last_access REAL
+            )
+        ''')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_result_cache_access ON result_cache (last_access)')
+        c.execute('CREATE TABLE IF NOT EXISTS result_cache_stats (name TEXT PRIMARY KEY, value INTEGER)')
+        c.execute("INSERT OR IGNORE INTO result_cache_stats (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0)")
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(content_hash: str, version: Optional[str] = None) -> str:
+        return f"{content_hash}:{version or pipeline_version()}"
+
+    def _count(self, c: sqlite3.Cursor, name: str, amount: int = 1):
+        c.execute('UPDATE result_cache_stats SET value = value + ? WHERE name = ?', (amount, name))
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            c = conn.cursor()
+            c.execute('SELECT payload, created_at FROM result_cache WHERE cache_key = ?', (key,))
+            row = c.fetchone()
+            if row and now - row[1] > self.ttl:
+                c.execute('DELETE FROM result_cache WHERE cache_key = ?', (key,))
+                self._count(c, "evictions")
+                row = None
+            if row:
+                c.execute('UPDATE result_cache SET last_access = ? WHERE cache_key = ?', (now, key))
+                self._count(c, "hits")
+            else:
+                self._count(c, "misses")
+            conn.commit()
+            conn.close()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, payload: Dict):
+        data = json.dumps(payload, default=str)
+        now = time.time()
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            conn = self._connect()
+            c = conn.cursor()
+            c.execute('''
+                INSERT OR REPLACE INTO result_cache (cache_key, payload, size_bytes, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (key, data, len(data), now, now))
+            self._evict(c, now)
+            conn.commit()
+            conn.close()
+
+    def _evict(self, c: sqlite3.Cursor, now: float):
+        """Drops expired entries, then least-recently-used ones until under the size limit."""
+        c.execute('DELETE FROM result_cache WHERE created_at < ?', (now - self.ttl,))
+        evicted = c.rowcount
+        c.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM result_cache')
+        excess = c.fetchone()[0] - self.max_bytes
+        if excess > 0:
+            c.execute('SELECT cache_key, size_bytes FROM result_cache ORDER BY last_access ASC')
+            victims = []
+            for cache_key, size in c.fetchall():
+                if excess <= 0:
+                    break
+                victims.append((cache_key,))
+                excess -= size
+            c.executemany('DELETE FROM result_cache WHERE cache_key = ?', victims)
+            evicted += len(victims)
+        if evicted:
+            self._count(c, "evictions", evicted)
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute('SELECT name, value FROM result_cache_stats')
+        stats = dict(c.fetchall())
+        c.execute('SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM result_cache')
+        stats["entries"], stats["size_bytes"] = c.fetchone()
+        conn.close()
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute('DELETE FROM result_cache')
+            conn.commit()
+            conn.close()
+
+
+# Global Instance
+result_cache = ResultCache()
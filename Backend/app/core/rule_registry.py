@@ -0,0 +1,324 @@
+"""
+Declarative Rule Registry
+Rules are declared in JSON (or YAML, when PyYAML is installed) files under
+RULES_PATH and compiled once into predicate functions. All per-column rules
+are evaluated in a single pass over each column mapping of the
+MetadataSummary, dataset-level rules once each. Rule files are hot-reloaded
+when their modification time changes; a broken file keeps the previous rule
+set active.
+
+Rule shape:
+  id, framework, severity, description   -> copied into the RuleResult
+  check: "metric"      path (dotted, into the MetadataSummary), op, value, details
+  check: "per_column"  over ("column_stats" | "date_ranges" | "posting_anomalies"),
+                       field, op, value,
+                       message (format string over the column entry), types
+  check: "row"         where (row predicate, see app.core.row_checks), max_rate;
+                       evaluated during ingestion, fails when the violation
+                       rate (percent of rows) exceeds max_rate (default 0)
+  enabled: false       skips a rule without deleting it
+Any value may be {"env": NAME, "default": x}: read from the environment when
+the rules are compiled (as a number or flag when the default is one), e.g.
+an approval limit that differs per deployment.
+"""
+
+import hashlib
+import json
+import operator
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from app.models.schemas import MetadataSummary, RuleResult
+from app.core.row_checks import RowPredicate
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "rules")
+RULES_PATH = os.getenv("RULES_PATH", DEFAULT_RULES_PATH)
+RULE_FILE_EXTENSIONS = (".json", ".yaml", ".yml")
+
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "non_empty": lambda actual, _: bool(actual),
+}
+PER_COLUMN_SOURCES = ("column_stats", "date_ranges", "posting_anomalies")
+TEMPLATE_FIELD = re.compile(r"\{([\w.]+)\}")
+
+
+class RuleConfigError(ValueError):
+    """Raised when a rule file cannot be compiled."""
+
+
+def resolve_path(obj: Any, path: str) -> Any:
+    """Dotted lookup through pydantic models and dicts; None when any step is missing."""
+    for part in path.split("."):
+        if obj is None:
+            return None
+        if isinstance(obj, dict):
+            obj = obj.get(part)
+        elif isinstance(obj, BaseModel):
+            obj = getattr(obj, part, None)
+        else:
+            return None
+    return obj
+
+
+def _resolve_value(value: Any) -> Any:
+    """Threshold placeholders resolved at evaluation time."""
+    if value == "today":
+        return datetime.now().date().isoformat()
+    return value
+
+
+def _compare(op: Callable, actual: Any, expected: Any) -> bool:
+    if actual is None:
+        return False
+    try:
+        return bool(op(actual, _resolve_value(expected)))
+    except TypeError:
+        return False  # e.g. a text stat compared with a number
+
+
+def _compile_details(spec: Optional[Dict[str, Any]]) -> Callable[[MetadataSummary], Dict[str, Any]]:
+    """
+    Detail values are a dotted path (raw value), a template with {dotted.path}
+    fields, or {"filter": path, "equals": value} to keep matching mapping entries.
+    """
+    if not spec:
+        return lambda metadata: {}
+
+    getters: List[Tuple[str, Callable[[MetadataSummary], Any]]] = []
+    for key, source in spec.items():
+        if isinstance(source, dict) and "filter" in source:
+            getters.append((key, lambda m, p=source["filter"], v=source.get("equals"): {
+                k: x for k, x in (resolve_path(m, p) or {}).items() if x == v
+            }))
+        elif isinstance(source, str) and TEMPLATE_FIELD.search(source):
+            getters.append((key, lambda m, t=source: TEMPLATE_FIELD.sub(lambda f: str(resolve_path(m, f.group(1))), t)))
+        elif isinstance(source, str):
+            getters.append((key, lambda m, p=source: resolve_path(m, p)))
+        else:
+            raise RuleConfigError(f"Unsupported detail spec for '{key}': {source!r}")
+    return lambda metadata: {key: getter(metadata) for key, getter in getters}
+
+
+class CompiledRule:
+    """A rule with its predicate compiled to closures."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        missing = [k for k in ("id", "severity", "description", "check") if k not in spec]
+        if missing:
+            raise RuleConfigError(f"Rule {spec.get('id', '?')} is missing {', '.join(missing)}")
+        op_name = spec.get("op", "non_empty")
+        if op_name not in OPERATORS:
+            raise RuleConfigError(f"Rule {spec['id']}: unknown operator '{op_name}'")
+
+        self.rule_id = spec["id"]
+        self.framework = spec.get("framework", "AuditX_Core")
+        self.severity = spec["severity"]
+        self.description = spec["description"]
+        self.check = spec["check"]
+        op = OPERATORS[op_name]
+        expected = spec.get("value")
+
+        if self.check == "metric":
+            path = spec["path"]
+            self.metric = lambda metadata: _compare(op, resolve_path(metadata, path), expected)
+            self.details = _compile_details(spec.get("details"))
+        elif self.check == "per_column":
+            self.over = spec.get("over", "column_stats")
+            if self.over not in PER_COLUMN_SOURCES:
+                raise RuleConfigError(f"Rule {self.rule_id}: cannot iterate '{self.over}'")
+            field = spec["field"]
+            types = tuple(spec.get("types", ()))
+            message = spec.get("message", "{" + field + "}")
+
+            def column_check(entry: Dict[str, Any]) -> Optional[str]:
+                if types and not str(entry.get("type", "")).startswith(types):
+                    return None
+                if not _compare(op, entry.get(field), expected):
+                    return None
+                return message.format(**entry)
+            self.column_check = column_check
+        elif self.check == "row":
+            if "where" not in spec:
+                raise RuleConfigError(f"Rule {self.rule_id}: row rules need a 'where' predicate")
+            self.predicate = RowPredicate(spec["where"])
+            self.max_rate = float(spec.get("max_rate", 0.0))
+        else:
+            raise RuleConfigError(f"Rule {self.rule_id}: unknown check '{self.check}'")
+
+    def result(self, passed: bool, details: Optional[Dict[str, Any]]) -> RuleResult:
+        return RuleResult(
+            rule_id=self.rule_id,
+            framework=self.framework,
+            severity=self.severity,
+            description=self.description,
+            passed=passed,
+            details=details if not passed else None
+        )
+
+
+class RuleSet:
+    """Compiled rules, grouped so per-column rules share one pass per mapping."""
+
+    def __init__(self, rules: List[CompiledRule], version: str):
+        self.rules = rules
+        self.version = version
+        self.per_column = {
+            source: [r for r in rules if r.check == "per_column" and r.over == source]
+            for source in PER_COLUMN_SOURCES
+        }
+        # Pushed down into ingestion; results arrive as metadata.row_checks
+        self.row_predicates = {r.rule_id: r.predicate for r in rules if r.check == "row"}
+
+    def evaluate(self, metadata: MetadataSummary) -> List[RuleResult]:
+        findings: Dict[str, Dict[str, str]] = {r.rule_id: {} for r in self.rules if r.check == "per_column"}
+        for source, rules in self.per_column.items():
+            if not rules:
+                continue
+            for col, entry in getattr(metadata, source).items():
+                for rule in rules:
+                    message = rule.column_check(entry)
+                    if message is not None:
+                        findings[rule.rule_id][col] = message
+
+        results = []
+        for rule in self.rules:
+            if rule.check == "per_column":
+                details = findings[rule.rule_id]
+                results.append(rule.result(not details, details))
+            elif rule.check == "row":
+                counts = metadata.row_checks.get(rule.rule_id)
+                failed = bool(counts) and counts["violations"] > 0 and counts["violation_rate"] > rule.max_rate
+                results.append(rule.result(not failed, counts))
+            else:
+                failed = rule.metric(metadata)
+                results.append(rule.result(not failed, rule.details(metadata) if failed else None))
+        return results
+
+
+def _rule_files(path: str) -> List[str]:
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(RULE_FILE_EXTENSIONS)
+        )
+    return [path] if os.path.exists(path) else []
+
+
+def _load_rule_file(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuleConfigError(f"{path}: YAML rule files require PyYAML")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    rules = data.get("rules", []) if isinstance(data, dict) else data
+    if not isinstance(rules, list):
+        raise RuleConfigError(f"{path}: expected a list of rules")
+    return rules
+
+
+def _resolve_settings(value: Any, used: Dict[str, Any]) -> Any:
+    """Replaces {"env": NAME, "default": x} anywhere in a spec; records what was used."""
+    if isinstance(value, list):
+        return [_resolve_settings(v, used) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "env" in value and set(value) <= {"env", "default"}:
+        default, raw = value.get("default"), os.getenv(value["env"])
+        if raw is None:
+            resolved = default
+        elif isinstance(default, bool):
+            resolved = raw.strip().lower() in ("1", "true", "yes", "on")
+        elif isinstance(default, (int, float)):
+            try:
+                resolved = float(raw)
+            except ValueError:
+                raise RuleConfigError(f"{value['env']}={raw!r} is not a number")
+        else:
+            resolved = raw
+        used[value["env"]] = resolved
+        return resolved
+    return {k: _resolve_settings(v, used) for k, v in value.items()}
+
+
+def compile_rules(path: str = RULES_PATH) -> RuleSet:
+    """Loads every rule file under `path` (sorted by name) and compiles it."""
+    digest = hashlib.sha256()
+    compiled: List[CompiledRule] = []
+    seen = set()
+    settings: Dict[str, Any] = {}
+    for file_path in _rule_files(path):
+        with open(file_path, "rb") as f:
+            digest.update(f.read())
+        for spec in _load_rule_file(file_path):
+            spec = _resolve_settings(spec, settings)
+            if not spec.get("enabled", True):
+                continue
+            rule = CompiledRule(spec)
+            if rule.rule_id in seen:
+                raise RuleConfigError(f"Duplicate rule id {rule.rule_id} in {file_path}")
+            seen.add(rule.rule_id)
+            compiled.append(rule)
+    # Settings from the environment change results just like the files do
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return RuleSet(compiled, digest.hexdigest()[:16])
+
+
+class RuleRegistry:
+    """Holds the active RuleSet and recompiles it when a rule file changes."""
+
+    def __init__(self, path: str = RULES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple] = None
+        self._ruleset = RuleSet([], "")
+        self.reload_if_changed()
+
+    def _current_signature(self) -> Tuple:
+        files = _rule_files(self.path)
+        return tuple((f, os.path.getmtime(f), os.path.getsize(f)) for f in files)
+
+    def reload_if_changed(self):
+        signature = self._current_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            try:
+                self._ruleset = compile_rules(self.path)
+                print(f"📜 Loaded {len(self._ruleset.rules)} audit rules (version {self._ruleset.version})")
+            except Exception as e:
+                print(f"⚠️  Rule reload failed, keeping previous rules: {e}")
+            self._signature = signature
+
+    @property
+    def ruleset(self) -> RuleSet:
+        self.reload_if_changed()
+        return self._ruleset
+
+    @property
+    def version(self) -> str:
+        return self.ruleset.version
+
+    def evaluate(self, metadata: MetadataSummary) -> List[RuleResult]:
+        return self.ruleset.evaluate(metadata)
+
+
+# Global Instance
+rule_registry = RuleRegistry()
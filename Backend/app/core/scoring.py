@@ -1,4 +1,7 @@
-from typing import List
+import hashlib
+import json
+import numpy as np
+from typing import List, Tuple
 from app.models.schemas import RuleResult, ComplianceScore
 
 SEVERITY_DEDUCTIONS = {
@@ -7,6 +10,31 @@ SEVERITY_DEDUCTIONS = {
     "LOW": 5
 }
 
+# Minimum score per risk band, highest first; anything below is RED
+BAND_THRESHOLDS = [(85, "GREEN"), (50, "YELLOW")]
+LOWEST_BAND = "RED"
+
+def get_risk_band(score: int) -> str:
+    for threshold, band in BAND_THRESHOLDS:
+        if score >= threshold:
+            return band
+    return LOWEST_BAND
+
+def scoring_version() -> str:
+    """Tag of the deduction table and band thresholds, stored with re-scored audits."""
+    config = json.dumps({"deductions": SEVERITY_DEDUCTIONS, "bands": BAND_THRESHOLDS}, sort_keys=True)
+    return hashlib.sha256(config.encode()).hexdigest()[:12]
+
+def score_batch(total_deductions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized calculate_score for many audits: (final scores, risk bands)."""
+    scores = np.maximum(0, 100 - np.asarray(total_deductions, dtype=np.int64))
+    bands = np.select(
+        [scores >= threshold for threshold, _ in BAND_THRESHOLDS],
+        [band for _, band in BAND_THRESHOLDS],
+        LOWEST_BAND
+    )
+    return scores, bands
+
 def calculate_score(rule_results: List[RuleResult]) -> ComplianceScore:
     current_score = 100
     breakdown = []
@@ -21,12 +49,7 @@ def calculate_score(rule_results: List[RuleResult]) -> ComplianceScore:
     final_score = max(0, current_score)
     
     # Determine Risk Band
-    if final_score >= 85:
-        risk_band = "GREEN"
-    elif final_score >= 50:
-        risk_band = "YELLOW"
-    else:
-        risk_band = "RED"
+    risk_band = get_risk_band(final_score)
         
     return ComplianceScore(
         final_score=final_score,
@@ -0,0 +1,187 @@
+"""
+Segmented Benford Analysis
+First-digit histograms per segment of a grouping column (vendor, account,
+posting month), built in one grouped pass per chunk: segment ids and digits
+are combined into a single code and counted with one bincount. Only the
+(segments x digits) count matrix is kept; segments are ranked by MAD with one
+matrix operation at summary time.
+Segment labels are raw values of the grouping column (vendor names), and the
+summary is stored with the audit, returned by the API and sent to the LLM, so
+it reports keyed pseudonyms instead (months are kept as they are). Anyone with
+SEGMENT_LABEL_KEY can map a name to its pseudonym with segment_pseudonym().
+"""
+
+import hashlib
+import hmac
+import os
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+from app.core.benford import BENFORD_PROBS, MIN_SAMPLE, benford_battery, first_digits, get_risk_label
+from app.core.duplicates import detect_key_columns
+
+# Grouping columns; empty = the detected vendor and date (per month) columns
+BENFORD_SEGMENT_COLUMNS = [c.strip() for c in os.getenv("BENFORD_SEGMENT_COLUMNS", "").split(",") if c.strip()]
+SEGMENT_TOP_N = int(os.getenv("BENFORD_SEGMENT_TOP_N", "20"))
+# Segments with fewer digits are not ranked (MAD is meaningless on tiny samples)
+MIN_SEGMENT_SIZE = max(MIN_SAMPLE, int(os.getenv("BENFORD_MIN_SEGMENT_SIZE", "50")))
+# HMAC key for segment pseudonyms; set it, or names can be confirmed by hashing guesses
+SEGMENT_LABEL_KEY = os.getenv("SEGMENT_LABEL_KEY", "CHANGE_THIS_IN_PRODUCTION")
+
+EXPECTED_FIRST = np.array(list(BENFORD_PROBS.values()))
+
+
+def segment_pseudonym(label: Any) -> str:
+    """
+    Stable keyed pseudonym of a raw value: segment labels here, heavy-hitter
+    values in the column sketches (same value -> same pseudonym across audits).
+    """
+    return "seg_" + hmac.new(SEGMENT_LABEL_KEY.encode(), str(label).encode(), hashlib.sha256).hexdigest()[:12]
+
+
+class SegmentDigitCounts:
+    """(segments x 10) first-digit counts of `amount_column` grouped by `column`."""
+
+    def __init__(self, column: str, amount_column: str, by_month: bool = False):
+        self.column = column
+        self.amount_column = amount_column
+        self.by_month = by_month
+        self.labels = pd.Index([], dtype=object)
+        self.counts = np.zeros((0, 10), dtype=np.int64)
+
+    @property
+    def dimension(self) -> str:
+        return f"{self.column}:month" if self.by_month else self.column
+
+    def _factorize(self, series: pd.Series):
+        """Per-row codes (-1 for nulls) and the text label of each code."""
+        if self.by_month:
+            months = pd.to_datetime(series, errors="coerce").dt.to_period("M")
+            codes, uniques = pd.factorize(months)
+            return codes, pd.Index(uniques.astype(str))
+        codes, uniques = pd.factorize(series)
+        # Labels are compared as text, so 5 and "5" (mixed-type chunks) are one segment
+        text_codes, uniques = pd.factorize(pd.Index(uniques).astype(str))
+        return np.where(codes >= 0, text_codes[codes], -1), pd.Index(uniques)
+
+    def _segment_ids(self, series: pd.Series) -> np.ndarray:
+        """Global segment id per row (-1 for nulls); new labels are appended."""
+        codes, uniques = self._factorize(series)
+        ids = self.labels.get_indexer(uniques)
+        new = ids < 0
+        if new.any():
+            ids[new] = np.arange(len(self.labels), len(self.labels) + int(new.sum()))
+            self.labels = self.labels.append(uniques[new])
+            self.counts = np.vstack([self.counts, np.zeros((int(new.sum()), 10), dtype=np.int64)])
+        return np.where(codes >= 0, ids[codes], -1)
+
+    def update(self, df: pd.DataFrame):
+        if self.column not in df.columns or self.amount_column not in df.columns:
+            return
+        digits = first_digits(pd.to_numeric(df[self.amount_column], errors="coerce").to_numpy(dtype=np.float64))
+        segments = self._segment_ids(df[self.column])
+        valid = (segments >= 0) & (digits > 0)
+        # One bincount over segment x digit codes instead of a group-by per segment
+        codes = segments[valid] * 10 + digits[valid]
+        self.counts += np.bincount(codes, minlength=self.counts.size).reshape(-1, 10)
+
+    def merge(self, other: "SegmentDigitCounts") -> "SegmentDigitCounts":
+        ids = self.labels.get_indexer(other.labels)
+        new = ids < 0
+        if new.any():
+            ids[new] = np.arange(len(self.labels), len(self.labels) + int(new.sum()))
+            self.labels = self.labels.append(other.labels[new])
+            self.counts = np.vstack([self.counts, np.zeros((int(new.sum()), 10), dtype=np.int64)])
+        self.counts[ids] += other.counts
+        return self
+
+    def report(self, top_n: int = SEGMENT_TOP_N, include_labels: bool = True) -> Dict[str, Any]:
+        """
+        Worst `top_n` segments by first-digit MAD. Labels are pseudonymized
+        (months excepted) and withheld entirely for PII-risk columns.
+        """
+        digit_counts = self.counts[:, 1:]
+        sizes = digit_counts.sum(axis=1)
+        eligible = np.flatnonzero(sizes >= MIN_SEGMENT_SIZE)
+
+        worst: List[Dict[str, Any]] = []
+        if eligible.size:
+            results = benford_battery(digit_counts[eligible].astype(np.float64), EXPECTED_FIRST)
+            mad = results["mad"]
+            k = min(top_n, eligible.size)
+            top = np.argpartition(-mad, k - 1)[:k]
+            top = top[np.argsort(-mad[top], kind="stable")]
+            for i in top:
+                segment = int(eligible[i])
+                if not include_labels:
+                    label = f"segment_{segment}"
+                elif self.by_month:
+                    label = str(self.labels[segment])
+                else:
+                    label = segment_pseudonym(self.labels[segment])
+                worst.append({
+                    "segment": label,
+                    "n": int(sizes[segment]),
+                    "mad": round(float(mad[i]), 5),
+                    "chi_square": round(float(results["chi_square"][i]), 3),
+                    "risk": get_risk_label(float(mad[i])),
+                })
+
+        return {
+            "amount_column": self.amount_column,
+            "segments": int(len(self.labels)),
+            "tested_segments": int(eligible.size),
+            "min_segment_size": MIN_SEGMENT_SIZE,
+            "worst_segments": worst,
+        }
+
+
+class SegmentedBenford:
+    """Segment digit counts for every configured grouping dimension."""
+
+    def __init__(self, dimensions: List[SegmentDigitCounts]):
+        self.dimensions = dimensions
+
+    @classmethod
+    def for_columns(cls, columns: List[str]) -> Optional["SegmentedBenford"]:
+        keys = detect_key_columns(columns)
+        if "amount" not in keys:
+            return None
+        amount = keys["amount"]
+        if BENFORD_SEGMENT_COLUMNS:
+            chosen = [c for c in BENFORD_SEGMENT_COLUMNS if c in columns and c != amount]
+        else:
+            chosen = [keys[role] for role in ("vendor", "date") if role in keys]
+        dimensions = [
+            SegmentDigitCounts(col, amount, by_month=(col == keys.get("date") or "date" in col.lower()))
+            for col in chosen
+        ]
+        return cls(dimensions) if dimensions else None
+
+    @property
+    def columns(self) -> List[str]:
+        needed = []
+        for dim in self.dimensions:
+            for col in (dim.column, dim.amount_column):
+                if col not in needed:
+                    needed.append(col)
+        return needed
+
+    def update(self, df: pd.DataFrame):
+        for dim in self.dimensions:
+            dim.update(df)
+
+    def merge(self, other: "SegmentedBenford") -> "SegmentedBenford":
+        mine = {dim.dimension: dim for dim in self.dimensions}
+        for dim in other.dimensions:
+            if dim.dimension in mine:
+                mine[dim.dimension].merge(dim)
+            else:
+                self.dimensions.append(dim)
+        return self
+
+    def summary(self, pii_columns: List[str]) -> Dict[str, Any]:
+        return {
+            dim.dimension: dim.report(include_labels=dim.column not in pii_columns)
+            for dim in self.dimensions
+        }
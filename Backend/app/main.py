@@ -12,6 +12,13 @@ from app.api.upload_regulation import router as upload_router
 from app.api.chat import router as chat_router
 from app.api.history_endpoint import router as history_router
 from app.api.report import router as report_router
+from app.api.chunked_upload import router as chunked_upload_router
+from app.api.reconcile import router as reconcile_router
+from app.api.batch import router as batch_router
+from app.api.jobs import router as jobs_router
+from app.api.analyze import finalize_audit
+from app.core.jobs import job_queue
+from app.ai.providers import provider_manager
 
 # Import auth and rate limiting
 from app.api.auth import (
@@ -46,7 +53,7 @@ app.add_middleware(
     allow_origins=ALLOWED_ORIGINS,  # Whitelist instead of "*"
     allow_credentials=True,
     allow_methods=["GET", "POST"],  # Restrict to needed methods
-    allow_headers=["Authorization", "Content-Type"],  # Explicit headers
+    allow_headers=["Authorization", "Content-Type", "X-Part-SHA256"],  # Explicit headers
 )
 
 # Include routers
@@ -55,6 +62,19 @@ app.include_router(upload_router, prefix="/api", tags=["Regulations"])
 app.include_router(chat_router, prefix="/api", tags=["Chat"])
 app.include_router(history_router, prefix="/api", tags=["History"])
 app.include_router(report_router, prefix="/api", tags=["Reporting"])
+app.include_router(chunked_upload_router, prefix="/api", tags=["Analysis"])
+app.include_router(reconcile_router, prefix="/api", tags=["Reconciliation"])
+app.include_router(batch_router, prefix="/api", tags=["Analysis"])
+app.include_router(jobs_router, prefix="/api", tags=["Jobs"])
+
+@app.on_event("startup")
+def start_job_queue():
+    """Starts the audit job workers and re-queues jobs interrupted by a restart."""
+    job_queue.start(finalize_audit)
+
+@app.on_event("shutdown")
+async def close_llm_connections():
+    await provider_manager.aclose()
 
 # Authentication endpoint
 @app.post("/api/token", response_model=Token, tags=["Authentication"])
@@ -114,4 +134,4 @@ async def root(request: Request):
 @app.get("/health")
 @limiter.limit("200/minute")
 async def health_check(request: Request):
-    return {"status": "ok", "version": "2.0.0"}
+    return {"status": "ok", "version": "2.0.0", "llm_providers": provider_manager.status()}
@@ -7,6 +7,14 @@ class BenfordAnalysis(BaseModel):
     mad_scores: Dict[str, float]
     risk_labels: Dict[str, str] # Close, Acceptable, Marginal, Non-conforming
     passed: bool
+    # Extended digit histograms collected in the same ingestion pass
+    first_two_digits: Dict[str, Dict[str, int]] = {} # Column -> "10".."99" -> Count
+    second_digits: Dict[str, Dict[str, int]] = {} # Column -> "0".."9" -> Count
+    last_two_digits: Dict[str, Dict[str, int]] = {} # Column -> "00".."99" -> Count
+    extended_mad_scores: Dict[str, Dict[str, float]] = {} # Column -> first_two/second/last_two -> MAD
+    # Nigrini test battery: Column -> n, mad, chi_square, ks, z_scores (per digit), significant_digits
+    first_digit_tests: Dict[str, Dict[str, Any]] = {}
+    first_two_digit_tests: Dict[str, Dict[str, Any]] = {}
 
 class RuleResult(BaseModel):
     rule_id: str
@@ -23,6 +31,12 @@ class MetadataSummary(BaseModel):
     date_ranges: Dict[str, Dict[str, Any]] # min, max
     benford_analysis: Optional[BenfordAnalysis] = None
     suspicious_entities: Dict[str, Any] = {} # Name of suspicious entity -> count OR pii_columns -> list
+    column_sketches: Dict[str, Dict[str, Any]] = {} # Column -> serialized quantile / distinct / heavy-hitter sketches
+    duplicate_analysis: Optional[Dict[str, Any]] = None # Exact / near-duplicate row counts (no row values)
+    segmented_benford: Dict[str, Dict[str, Any]] = {} # Grouping dimension -> worst segments by first-digit MAD
+    row_checks: Dict[str, Dict[str, Any]] = {} # Row rule id -> violations, rows_evaluated, violation_rate
+    posting_calendar: Dict[str, Dict[str, Any]] = {} # Date column -> posting counts per day (from origin) and per hour
+    posting_anomalies: Dict[str, Dict[str, Any]] = {} # Date column -> volume spikes, weekend/holiday clusters, period-end bursts
 
 class ComplianceScore(BaseModel):
     final_score: int
@@ -39,4 +53,43 @@ class AuditResult(BaseModel):
     ai_explanation: Optional[str] = None
     provenance_hash: Optional[str] = None
     blockchain_metadata: Optional[Dict[str, Any]] = None
+    related_audits: Optional[Dict[str, str]] = None # Other sheets / archive members: name -> audit_id
+    cache_hit: bool = False # Served from the content-addressed result cache
+    base_audit_id: Optional[str] = None # Incremental audits: the audit this delta was appended to
 
+class ReconciliationSide(BaseModel):
+    file: Optional[str] = None
+    rows: int
+    key_columns: List[str]
+    amount_column: str
+    null_keys: int
+    invalid_amounts: int
+    total_amount: float
+
+class ReconciliationResult(BaseModel):
+    left: ReconciliationSide
+    right: ReconciliationSide
+    tolerance: float
+    match_rate: float # % of left rows whose key matched with an agreeing amount
+    right_match_rate: float
+    key_match_rate: float # % of left keys found in the right file
+    matched_keys: int
+    amount_mismatch_keys: int
+    left_only_keys: int
+    right_only_keys: int
+    left_duplicate_keys: int
+    right_duplicate_keys: int
+    left_matched_rows: int
+    right_matched_rows: int
+    left_mismatch_rows: int
+    right_mismatch_rows: int
+    left_unmatched_rows: int
+    right_unmatched_rows: int
+    left_unmatched_amount: float
+    right_unmatched_amount: float
+    amount_variance: float # Right minus left, over keys present in both files
+    absolute_variance: float
+    max_key_variance: float
+    partitions: int
+    partitions_split: int
+    elapsed_seconds: float
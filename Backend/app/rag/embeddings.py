@@ -0,0 +1,100 @@
+"""
+Embedding Service
+Shares one SentenceTransformer across all requests. The model is loaded on
+first use, not at import. Single-text requests (chat questions, rule queries)
+are queued and encoded together: a background thread takes the first waiting
+request, collects whatever else arrives within EMBED_BATCH_WINDOW_MS (up to
+EMBED_MAX_BATCH texts) and runs one batched forward pass for all of them.
+Under concurrent load this replaces many batch-size-1 passes with a few
+larger ones. Bulk ingestion calls encode() directly.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+import numpy as np
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+
+
+class EmbeddingService:
+    """Lazily loaded embedding model with a micro-batching request queue."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL):
+        self.model_name = model_name
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self.batches = 0
+        self.embedded = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    print(f"🧠 Loading embedding model {self.model_name}")
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Direct batched encode (bulk ingestion); float32, one row per text."""
+        return np.asarray(self.model.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+    def submit(self, text: str) -> Future:
+        """Queues one text for the next micro-batch; the future resolves to a (dim,) vector."""
+        if self._worker is None:
+            with self._load_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._worker.start()
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> np.ndarray:
+        """Blocking single-text embedding via the micro-batcher; shape (1, dim)."""
+        return self.submit(text).result()[None, :]
+
+    async def aembed(self, text: str) -> np.ndarray:
+        """Awaitable embed(); the event loop stays free while the batch runs."""
+        return (await asyncio.wrap_future(self.submit(text)))[None, :]
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + EMBED_BATCH_WINDOW_MS / 1000
+        while len(batch) < EMBED_MAX_BATCH:
+            timeout = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [(text, future) for text, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                vectors = self.encode([text for text, _ in batch], batch_size=len(batch))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.embedded += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+# Global Instance
+embedding_service = EmbeddingService()
@@ -5,16 +5,15 @@ import numpy as np
 from io import BytesIO
 from typing import List, Dict
 from pypdf import PdfReader
-from sentence_transformers import SentenceTransformer
+from app.rag.embeddings import embedding_service
 
 # Constants
 INDEX_PATH = "auditx_faiss.index"
 METADATA_PATH = "auditx_metadata.pkl"
-MODEL_NAME = 'all-MiniLM-L6-v2'
 
 class RAGService:
     def __init__(self):
-        self.model = SentenceTransformer(MODEL_NAME)
+        # Model loads on first use (embedding_service), not at import
         self.index = None
         self.metadata = [] # List of dicts: {"text": "...", "source": "..."}
         self.load_index()
@@ -64,7 +63,7 @@ class RAGService:
 
         # Embed
         texts = [c["text"] for c in text_chunks]
-        embeddings = self.model.encode(texts)
+        embeddings = embedding_service.encode(texts)
         
         # Add to index
         self.index.add(np.array(embeddings).astype('float32'))
@@ -1,16 +1,32 @@
 from typing import List, Dict, Any
 from app.rag.ingest import rag_service
+from app.rag.embeddings import embedding_service
 import numpy as np
 
-def query_regulations(query_text: str, top_k: int = 3) -> List[Dict[str, Any]]:
+def embed_query(query_text: str) -> np.ndarray:
+    """
+    Embeds a query with the RAG model (float32, shape (1, dim)).
+    Concurrent queries share one batched forward pass.
+    """
+    return embedding_service.embed(query_text)
+
+def corpus_size() -> int:
+    """
+    Number of indexed regulation chunks; changes whenever regulations are added.
+    """
+    return rag_service.index.ntotal if rag_service.index else 0
+
+def query_regulations(query_text: str, top_k: int = 3, query_vector: np.ndarray = None) -> List[Dict[str, Any]]:
     """
     Queries the RAG index for relevant regulation articles.
+    Pass query_vector when the query was already embedded.
     """
     if not rag_service.index or rag_service.index.ntotal == 0:
         return []
 
     # Embed query
-    query_vector = rag_service.model.encode([query_text])
+    if query_vector is None:
+        query_vector = embed_query(query_text)
     
     # Search
     distances, indices = rag_service.index.search(np.array(query_vector).astype('float32'), top_k)
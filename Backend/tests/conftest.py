@@ -0,0 +1,161 @@
+"""
+Shared fixtures. The app modules read their configuration at import, so the
+environment is set here, before any test imports them: caches go to a
+temporary directory and no real LLM provider is configured.
+"""
+
+import json
+import os
+import select
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_tmp = tempfile.mkdtemp(prefix="auditx_tests_")
+os.environ["LLM_CACHE_DB"] = os.path.join(_tmp, "llm_cache.db")
+os.environ["UPLOAD_DIR"] = os.path.join(_tmp, "uploads")
+os.environ["RESULT_CACHE_DB"] = os.path.join(_tmp, "result_cache.db")
+os.environ["JOBS_DB"] = os.path.join(_tmp, "jobs.db")
+os.environ["JOB_DIR"] = os.path.join(_tmp, "job_uploads")
+for _key in ("OPENAI_API_KEY", "GROK_API_KEY", "GEMINI_API_KEY"):
+    os.environ.pop(_key, None)
+
+
+class MockLLMServer:
+    """
+    OpenAI-compatible /chat/completions on a local port. Tests set `status`,
+    `delay` (seconds before the response starts), `tokens` and `token_delay`;
+    `requests` counts calls and `disconnected` is set when a client hangs up
+    before the response is finished.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = 200
+        self.delay = 0.0
+        self.tokens: List[str] = [f"{name} ", "says ", "hi"]
+        self.token_delay = 0.0
+        self.requests = 0
+        self.disconnected = threading.Event()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "MockLLMServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _wait(self, seconds: float) -> bool:
+                """Sleeps, returning False as soon as the client closes the connection."""
+                deadline = time.monotonic() + seconds
+                while True:
+                    remaining = deadline - time.monotonic()
+                    readable, _, _ = select.select([self.connection], [], [], max(0.0, min(remaining, 0.01)))
+                    if readable and not self.connection.recv(1, socket.MSG_PEEK):
+                        server.disconnected.set()
+                        return False
+                    if remaining <= 0:
+                        return True
+
+            def _chunk(self, data: bytes) -> bool:
+                try:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    server.disconnected.set()
+                    return False
+                return True
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.requests += 1
+                if not self._wait(server.delay):
+                    return
+                if server.status != 200:
+                    payload = json.dumps({"error": {"message": f"{server.name} unavailable"}}).encode()
+                    self.send_response(server.status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+                if not body.get("stream"):
+                    payload = json.dumps({"choices": [{"message": {"content": "".join(server.tokens)}}]}).encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, token in enumerate(server.tokens):
+                    if i and not self._wait(server.token_delay):
+                        return
+                    chunk = {"choices": [{"delta": {"content": token}}]}
+                    if not self._chunk(f"data: {json.dumps(chunk)}\n\n".encode()):
+                        return
+                if self._chunk(b"data: [DONE]\n\n"):
+                    self._chunk(b"")
+
+        return Handler
+
+
+@pytest.fixture
+def llm_server():
+    """Factory for mock provider endpoints; all are stopped after the test."""
+    servers = []
+
+    def start(name: str) -> MockLLMServer:
+        servers.append(MockLLMServer(name).start())
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def provider_manager_for():
+    """ProviderManager over the given mock servers, in preference order."""
+    from app.ai.providers import Provider, ProviderManager
+    managers = []
+
+    def build(*servers: MockLLMServer) -> ProviderManager:
+        manager = ProviderManager()
+        manager.providers = [Provider(s.name, s.url, "test-key", f"mock-{s.name}") for s in servers]
+        managers.append(manager)
+        return manager
+
+    yield build
+    for manager in managers:
+        for provider in manager.providers:
+            provider.client.close()
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import uuid
+
+from app.ai.chat_stream import chat_events, replay_events
+from app.ai.providers import ProviderManager
+
+
+def _messages():
+    # A fresh question per test, so the LLM cache never answers
+    return [{"role": "user", "content": f"question {uuid.uuid4()}"}]
+
+
+def _parse(event: str):
+    lines = dict(line.split(": ", 1) for line in event.strip().split("\n"))
+    return lines["event"], json.loads(lines["data"])
+
+
+async def _collect(events):
+    return [_parse(event) async for event in events]
+
+
+def test_events_are_sources_tokens_done(llm_server, provider_manager_for):
+    server = llm_server("primary")
+    server.tokens = ["Hello", ", ", "auditor"]
+    manager = provider_manager_for(server)
+    completed = []
+
+    async def on_complete(text):
+        completed.append(text)
+
+    async def run():
+        try:
+            return await _collect(chat_events(_messages(), ["Reg 1"], on_complete=on_complete, manager=manager))
+        finally:
+            await manager.aclose()
+
+    events = asyncio.run(run())
+    assert [name for name, _ in events] == ["sources", "token", "token", "token", "done"]
+    assert events[0][1] == ["Reg 1"]
+    assert [data["text"] for name, data in events if name == "token"] == ["Hello", ", ", "auditor"]
+    assert events[-1][1] == {"response": "Hello, auditor"}
+    assert completed == ["Hello, auditor"]
+
+
+def test_error_event_when_upstream_fails(llm_server, provider_manager_for):
+    server = llm_server("primary")
+    server.status = 500
+    manager = provider_manager_for(server)
+    completed = []
+
+    async def on_complete(text):
+        completed.append(text)
+
+    async def run():
+        try:
+            return await _collect(chat_events(_messages(), [], on_complete=on_complete, manager=manager))
+        finally:
+            await manager.aclose()
+
+    events = asyncio.run(run())
+    assert [name for name, _ in events] == ["sources", "error"]
+    assert "500" in events[1][1]["detail"]
+    assert events[1][1]["response"] == ""
+    assert completed == []
+
+
+def test_client_disconnect_closes_upstream(llm_server, provider_manager_for):
+    server = llm_server("primary")
+    server.tokens = [f"token{i} " for i in range(50)]
+    server.token_delay = 0.1
+    manager = provider_manager_for(server)
+    completed = []
+
+    async def on_complete(text):
+        completed.append(text)
+
+    async def run():
+        events = chat_events(_messages(), [], on_complete=on_complete, manager=manager)
+        try:
+            assert _parse(await events.__anext__())[0] == "sources"
+            assert _parse(await events.__anext__())[0] == "token"
+            # What StreamingResponse does when the client goes away
+            await events.aclose()
+            # Blocking on purpose: the upstream connection must already be
+            # closed, not left to a finalizer on a later loop iteration
+            return server.disconnected.wait(timeout=1.0)
+        finally:
+            await manager.aclose()
+
+    # The provider sees the hang-up long before its 5 seconds of tokens are done
+    assert asyncio.run(run())
+    assert completed == []
+
+
+def test_mock_answer_without_provider():
+    manager = ProviderManager()
+    manager.providers = []
+    events = asyncio.run(_collect(chat_events(_messages(), ["Reg 1"], mock_text="mock answer", manager=manager)))
+    assert [name for name, _ in events] == ["sources", "token", "done"]
+    assert events[-1][1] == {"response": "mock answer"}
+
+
+def test_cached_answer_replays_in_the_same_shape():
+    cached = {"sources": ["Reg 2"], "response": "cached answer"}
+    events = asyncio.run(_collect(replay_events(cached)))
+    assert [name for name, _ in events] == ["sources", "token", "done"]
+    assert events[-1][1] == {"response": "cached answer", "cached": True}
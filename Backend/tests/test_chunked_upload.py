@@ -0,0 +1,82 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core.chunked_upload import UploadSession, UploadSessionStore
+
+
+def _csv_parts(rows: int, part_bytes: int):
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        "amount": rng.integers(1, 500, rows),
+        "vendor": rng.choice(["a", "b", "c"], rows),
+        "invoice_date": "2024-01-31",
+    })
+    data = df.to_csv(index=False).encode()
+    return [data[i:i + part_bytes] for i in range(0, len(data), part_bytes)]
+
+
+def _slow_profile(monkeypatch, seconds: float):
+    """Widens the window in which a retried part overlaps the original."""
+    profile = UploadSession._profile
+
+    def slow(self, records):
+        time.sleep(seconds)
+        profile(self, records)
+    monkeypatch.setattr(UploadSession, "_profile", slow)
+
+
+def test_concurrent_retry_of_a_part_is_profiled_once(tmp_path, monkeypatch):
+    _slow_profile(monkeypatch, 0.2)
+    store = UploadSessionStore(str(tmp_path))
+    session = store.create("ledger.csv")
+    parts = _csv_parts(1000, 8000)
+    start = threading.Barrier(2)
+    acks = []
+
+    def send(number, data):
+        start.wait()
+        acks.append(store.get(session.upload_id).add_part(number, data))
+
+    threads = [threading.Thread(target=send, args=(1, parts[0])) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(ack["duplicate"] for ack in acks) == [False, True]
+    for number, data in enumerate(parts[1:], 2):
+        session.add_part(number, data)
+    summary = session.complete()
+    assert summary.row_count == 1000
+    assert summary.duplicate_analysis["rows_fingerprinted"] == 1000
+
+
+def test_complete_waits_for_a_part_in_flight(tmp_path, monkeypatch):
+    _slow_profile(monkeypatch, 0.3)
+    store = UploadSessionStore(str(tmp_path))
+    session = store.create("ledger.csv")
+    parts = _csv_parts(200, 10 ** 6)
+    assert len(parts) == 1
+
+    sender = threading.Thread(target=session.add_part, args=(1, parts[0]))
+    sender.start()
+    time.sleep(0.05)
+    summary = session.complete()
+    sender.join()
+    assert summary.row_count == 200
+
+
+def test_checkpoint_round_trip_restores_a_lock(tmp_path):
+    store = UploadSessionStore(str(tmp_path))
+    session = store.create("ledger.csv")
+    session.add_part(1, _csv_parts(50, 10 ** 6)[0])
+    store.checkpoint(session)
+
+    resumed = UploadSessionStore(str(tmp_path)).get(session.upload_id)
+    assert resumed is not session
+    assert resumed.next_part == 2
+    with resumed.lock:
+        assert resumed.complete().row_count == 50
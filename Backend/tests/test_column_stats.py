@@ -0,0 +1,34 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.core.accumulators import ColumnAccumulator
+from app.core.columnar import ingest_parquet
+
+
+def _dates():
+    return pd.date_range("2024-01-01", periods=366)
+
+
+def test_native_datetime_column_counts_distinct_values():
+    acc = ColumnAccumulator("posted")  # name does not look like a date
+    acc.update(pd.Series(_dates()))
+    stats = acc.stats(366)
+    assert abs(stats["distinct_count"] - 366) <= 366 * 0.05
+    assert acc.date_range()["min"].startswith("2024-01-01")
+    assert acc.sketches()["heavy_hitters"]
+
+
+def test_parquet_timestamp_column_counts_distinct_values(tmp_path):
+    path = str(tmp_path / "ledger.parquet")
+    frame = pd.DataFrame({"posted": _dates(), "day": _dates().date})
+    pq.write_table(pa.Table.from_pandas(frame), path)
+    stats = ingest_parquet(path).column_stats
+    for column in ("posted", "day"):
+        assert abs(stats[column]["distinct_count"] - 366) <= 366 * 0.05
+
+
+def test_unscanned_column_reports_no_distinct_count():
+    acc = ColumnAccumulator("notes")
+    acc.add_counts(10, 0, "object")
+    assert "distinct_count" not in acc.stats(10)
@@ -0,0 +1,40 @@
+import io
+import zipfile
+
+import openpyxl
+import pytest
+
+from app.core.decoding import ingest_upload, is_xlsx
+
+
+def _workbook() -> io.BytesIO:
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Ledger"
+    sheet.append(["vendor", "amount"])
+    sheet.append(["Acme", 120.5])
+    data = io.BytesIO()
+    workbook.save(data)
+    data.seek(0)
+    return data
+
+
+def test_workbook_is_detected_by_content():
+    assert is_xlsx(_workbook(), "export.bin")
+    assert list(ingest_upload(_workbook(), "ledger.xlsx")) == ["ledger.xlsx:Ledger"]
+
+
+def test_csv_named_xlsx_is_profiled_as_csv():
+    source = io.BytesIO(b"vendor,amount\nAcme,120.5\n")
+    assert not is_xlsx(source, "ledger.xlsx")
+    summaries = ingest_upload(source, "ledger.xlsx")
+    assert summaries["ledger.xlsx"].columns == ["vendor", "amount"]
+
+
+def test_zip_named_xlsx_is_a_value_error():
+    source = io.BytesIO()
+    with zipfile.ZipFile(source, "w") as archive:
+        archive.writestr("notes.txt", "not a workbook")
+    source.seek(0)
+    with pytest.raises(ValueError, match="Invalid XLSX"):
+        ingest_upload(source, "ledger.xlsx")
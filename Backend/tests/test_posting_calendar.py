@@ -0,0 +1,15 @@
+import pandas as pd
+
+from app.core.posting_calendar import PostingHistogram
+
+
+def test_sentinel_dates_do_not_wrap_around():
+    # pandas parses these to datetime64[us]; 9999-12-31 is past the ns range
+    dates = pd.to_datetime(pd.Series(["2024-01-02", "2024-01-03", "9999-12-31"]))
+    histogram = PostingHistogram()
+    histogram.update(dates)
+    summary = histogram.summary()
+    assert summary["origin"] == "2024-01-02"
+    assert summary["daily"] == [1, 1]
+    assert summary["outside_window"] == 1
+    assert histogram.postings == 3
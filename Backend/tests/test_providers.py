@@ -0,0 +1,157 @@
+import asyncio
+import time
+import uuid
+
+from app.ai import providers
+from app.ai.providers import CircuitBreaker
+
+
+def _messages():
+    # A fresh prompt per call, so the LLM cache never answers
+    return [{"role": "user", "content": f"prompt {uuid.uuid4()}"}]
+
+
+def _warm(provider, kind: str, latency: float):
+    """Gives a provider a p95 without making real calls."""
+    for _ in range(providers.HEDGE_MIN_SAMPLES):
+        provider.stats[kind].record(latency, True)
+
+
+def test_breaker_opens_then_half_open_probe_closes_it(llm_server, provider_manager_for, monkeypatch):
+    monkeypatch.setattr(providers, "LLM_HEDGE", False)
+    monkeypatch.setattr(providers, "BREAKER_COOLDOWN_SECONDS", 0.2)
+    primary, backup = llm_server("primary"), llm_server("backup")
+    primary.status = 503
+    manager = provider_manager_for(primary, backup)
+    breaker = manager.providers[0].breaker
+
+    for _ in range(providers.BREAKER_CONSECUTIVE_FAILURES):
+        assert manager.complete(_messages()) == "backup says hi"
+    assert breaker.state == "open"
+
+    # While open the primary is skipped entirely
+    calls = primary.requests
+    assert manager.complete(_messages()) == "backup says hi"
+    assert primary.requests == calls
+
+    # After the cooldown one probe goes to the primary; success closes the circuit
+    primary.status = 200
+    time.sleep(0.25)
+    assert manager.complete(_messages()) == "primary says hi"
+    assert primary.requests == calls + 1
+    assert breaker.state == "closed"
+
+
+def test_half_open_admits_one_probe_and_reopens_on_failure(monkeypatch):
+    monkeypatch.setattr(providers, "BREAKER_COOLDOWN_SECONDS", 0.05)
+    breaker = CircuitBreaker("primary")
+    for _ in range(providers.BREAKER_CONSECUTIVE_FAILURES):
+        breaker.record(False)
+    assert breaker.state == "open" and not breaker.available()
+
+    time.sleep(0.06)
+    assert breaker.available()
+    breaker.on_launch()
+    assert breaker.state == "half_open"
+    assert not breaker.available()  # no second probe while the first is in flight
+
+    breaker.record(False)
+    assert breaker.state == "open" and not breaker.available()
+
+    time.sleep(0.06)
+    breaker.on_launch()
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.available()
+
+
+def test_completion_hedges_after_p95(llm_server, provider_manager_for, monkeypatch):
+    monkeypatch.setattr(providers, "HEDGE_MIN_SECONDS", 0.05)
+    primary, backup = llm_server("primary"), llm_server("backup")
+    primary.delay = 1.5
+    manager = provider_manager_for(primary, backup)
+    _warm(manager.providers[0], "completion", 0.2)
+
+    start = time.monotonic()
+    assert manager.complete(_messages()) == "backup says hi"
+    elapsed = time.monotonic() - start
+
+    # Not before the primary's p95, and well before the primary would answer
+    assert 0.2 <= elapsed < 1.0
+    assert manager.providers[1].hedged == 1
+    assert manager.providers[1].hedge_wins == 1
+
+
+def test_stream_hedges_after_first_token_p95_and_cancels_loser(llm_server, provider_manager_for, monkeypatch):
+    monkeypatch.setattr(providers, "HEDGE_MIN_SECONDS", 0.05)
+    primary, backup = llm_server("primary"), llm_server("backup")
+    primary.delay = 5.0
+    manager = provider_manager_for(primary, backup)
+    first, second = manager.providers
+    _warm(first, "first_token", 0.2)
+
+    async def run():
+        try:
+            start = time.monotonic()
+            text = "".join([token async for token in manager.stream(_messages())])
+            return text, time.monotonic() - start
+        finally:
+            await manager.aclose()
+
+    text, elapsed = asyncio.run(run())
+    assert text == "backup says hi"
+    assert 0.2 <= elapsed < 2.0
+    assert second.hedge_wins == 1
+    # The losing request is cancelled: its connection is dropped, it does not
+    # count against the primary and it leaves no half-open probe behind
+    assert primary.disconnected.wait(timeout=1.0)
+    assert first.stats["first_token"].summary()["calls"] == providers.HEDGE_MIN_SAMPLES
+    assert not first.breaker.probing
+
+
+def test_failover_on_5xx(llm_server, provider_manager_for, monkeypatch):
+    monkeypatch.setattr(providers, "LLM_HEDGE", False)
+    primary, backup = llm_server("primary"), llm_server("backup")
+    primary.status = 502
+    manager = provider_manager_for(primary, backup)
+
+    assert manager.complete(_messages()) == "backup says hi"
+
+    async def run():
+        try:
+            return await manager.acomplete(_messages())
+        finally:
+            await manager.aclose()
+
+    assert asyncio.run(run()) == "backup says hi"
+    assert primary.requests == 2
+    assert manager.providers[0].stats["completion"].summary()["error_rate"] == 1.0
+    assert manager.providers[0].stats["first_token"].summary()["error_rate"] == 1.0
+
+
+def test_failover_on_timeout(llm_server, provider_manager_for, monkeypatch):
+    monkeypatch.setattr(providers, "LLM_HEDGE", False)
+    monkeypatch.setattr(providers, "LLM_TIMEOUT_SECONDS", 0.3)
+    primary, backup = llm_server("primary"), llm_server("backup")
+    primary.delay = 3.0
+    manager = provider_manager_for(primary, backup)
+
+    start = time.monotonic()
+    assert manager.complete(_messages()) == "backup says hi"
+
+    async def run():
+        try:
+            return await manager.acomplete(_messages())
+        finally:
+            await manager.aclose()
+
+    assert asyncio.run(run()) == "backup says hi"
+    assert time.monotonic() - start < 2.0
+    assert manager.providers[0].stats["completion"].summary()["error_rate"] == 1.0
+    assert manager.providers[0].stats["first_token"].summary()["error_rate"] == 1.0
+
+
+def test_executor_is_created_on_first_blocking_completion(llm_server, provider_manager_for):
+    manager = provider_manager_for(llm_server("primary"))
+    assert manager._executor is None
+    assert manager.complete(_messages()) == "primary says hi"
+    assert manager._executor is not None
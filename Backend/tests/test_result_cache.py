@@ -0,0 +1,40 @@
+import gzip
+import hashlib
+import io
+import zipfile
+
+from app.core.decoding import ingest_upload
+from app.core.jobs import JobQueue
+from app.core.result_cache import HashingReader
+
+CSV = ("vendor,amount\n" + "".join(f"v{i % 7},{i * 3}\n" for i in range(5000))).encode()
+
+
+def _zip() -> bytes:
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("ledger.csv", CSV)
+    return data.getvalue()
+
+
+def test_upload_is_hashed_in_the_ingestion_pass():
+    for name, data in (("ledger.csv", CSV), ("ledger.csv.gz", gzip.compress(CSV))):
+        upload = HashingReader(io.BytesIO(data))
+        summaries = ingest_upload(upload, name)
+        assert list(summaries.values())[0].row_count == 5000
+        # Detection peeks and the parse covered every byte: nothing left to read
+        assert upload._hashed == len(data)
+        assert upload.hexdigest() == hashlib.sha256(data).hexdigest()
+
+
+def test_random_access_reads_are_completed_by_hexdigest():
+    data = _zip()
+    upload = HashingReader(io.BytesIO(data))
+    assert list(ingest_upload(upload, "ledger.zip")) == ["ledger.zip:ledger.csv"]
+    assert upload.hexdigest() == hashlib.sha256(data).hexdigest()
+
+
+def test_job_stores_the_hash_of_its_upload(tmp_path):
+    jobs = JobQueue(db_path=str(tmp_path / "jobs.db"), directory=str(tmp_path / "uploads"))
+    job = jobs.submit(io.BytesIO(CSV), "ledger.csv")
+    assert job["content_hash"] == hashlib.sha256(CSV).hexdigest()